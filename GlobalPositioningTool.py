@@ -5,68 +5,122 @@
 
     DATE: 7/5/2017
 
-    VERSION: 2.0
+    VERSION: 3.4
 
     USAGE: GlobalPositioning allows the animator to move their pose based on a chosen pivot, a control or locator. 
+           the UI is opened with:
+               import GlobalPositioningTool
+               GlobalPositioningTool.showUI()
     
+    List of functions:
+        showUI()
     List of methods for class GlobalPositioning:
-        __init__()
+        __init__(ui)
         getPivotCtrl()
         deleteObj(obj)
         avatarahCtrlCheck(pivot)
         getTargetCtrls()
-        placeLocAtTargetCtrls()
+        setCrowdTargets(pattern)
+        showTargets()
         capturePose()
         constrainMoveKey(driver, driven, constraintType)
+        getTargetLevels(ctrls)
         positionPose()
+        positionAnimation(deferred)
+        positionAnimationSteps(chunkSize)
+        solveTargetFrames(ctrl, frames, matrices, previous, delta)
+        keyTargetSteps(name, ctrls, frameLists, matrixLists, writeChannel, chunkSize, done, total, delta)
+        followPivot(startFrame, endFrame, deferred)
+        followPivotSteps(frames, chunkSize)
+        followPivotCmd()
+        getPoseLibrary()
+        savePose(name, startFrame, endFrame)
+        applyPose(name, frameIndex)
+        poseLibraryCmd(action)
         cleanUpScene()
         UI()
       
         
-    NOTES:
+    NOTES: positionPose only writes the controls that need to move. The pivot's world matrix is kept from the last capture or snap,
+           if the pivot hasn't moved past snapTolerance each control's current matrix is checked against its solved one
+           and controls already in place are skipped, otherwise every control is written.
+           Snap Animation runs chunkSize keys per control at a time with a progress window and can be cancelled,
+           every key is written in its last step, so cancelling leaves the animation untouched and the move undoes in one step.
+           Each channel is only keyed on the frames it already had keys on, a channel with no keys is keyed on every keyed frame
+           of its control if the move changes it, so the animation doesn't get keys it didn't have.
+           Follow Pivot keys the captured pose onto the pivot on every frame of a range, ex: a character riding a vehicle.
+           The pivot is sampled once over the range and every target's world matrices are solved from it in one pass,
+           then each hierarchy level is keyed before the level below is solved, all in the last step and one undo chunk.
+           The pivot can't be driven by the targets.
+           With reduceKeys on, the followed channels only keep the keys needed to stay within keyPositionTolerance
+           and keyRotationTolerance, see keyReducer, and the compression ratio is printed and kept in keyReduction.
+           Set Crowd Targets makes every registered rig whose namespace matches the pattern a target, looked up in bulk by the rig registry.
+           Past targetListLimit controls the target list shows a line per rig instead of every control.
+           capturePose, positionPose, positionAnimation, followPivot, savePose and applyPose are timed by profiler when it's enabled.
 
 '''
 
-from pymel.all import *
+import collections
 import itertools
+import os
+import maya.cmds as cmds
+import matrixSnap
+import poseSolver
+import matrixMath
+import animIO
+import rigRegistry
+import profiler
+import sceneTransaction
+import sceneBackend
+import poseLibrary
+import chunkedTask
+import keyReducer
 
 class GlobalPositioning:    
 
-    def __init__(self):
+    def __init__(self, ui=True):
         #instance variables
-        self.projAvatarahRigs = ['Astrea', 'Proteus', 'Tartarus']
-        self.projAvatarahRigCtrls = [DependNodeName(u'ik_left_arm'), 
-                                     DependNodeName(u'ik_right_arm'), 
-                                     DependNodeName(u'ik_right_leg'),     
-                                     DependNodeName(u'ik_left_leg'),
-                                     DependNodeName(u'COG_ctrl'), 
-                                     DependNodeName(u'right_leg_poleVec'),
-                                     DependNodeName(u'left_leg_poleVec'),
-                                     DependNodeName(u'left_arm_poleVec'),
-                                     DependNodeName(u'right_arm_poleVec')]
+        self.backend = sceneBackend.getBackend()
+        self.rigRegistry = rigRegistry.getRegistry()
         self.targetCtrls = []
         self.pivotCtrl = ''
         self.locatorPivot = 'locatorPivot'
         self.locScale = [50, 50, 50]
         self.selectPivotMessage = 'Please select a control to be the pivot.'
-        self.gpLocSuffix = '_gpLoc'
-        self.targetCtrlLoc = []
-        self.targetCtrlLocGrp = ''
-        self.targetCtrlLocGrpVis = 0
-        self.targetCtrlLocGrpNm = 'targetCtrlLoc_Grp'
-        self.pivotTargetCon = ''
+        self.capturedCtrls = []
+        self.capturedMatrices = []
+        self.capturedPivotMatrix = []
+        self.snappedPivotMatrix = None
+        self.snapTolerance = 1e-4
+        self.chunkSize = 100
+        self.targetListLimit = 50
+        self.reduceKeys = False
+        self.keyPositionTolerance = 0.01
+        self.keyRotationTolerance = 0.05
+        self.keyReduction = keyReducer.newReport()
+        self.task = None
+        self.animChannels = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ']
+        self.poseLibraryDir = os.path.join(cmds.internalVar(userAppDir=True), 'globalPositioningPoses')
+        self.poseLibrary = None
         
         #UI   
         self.windowName = 'globalPositioningToolWin'
         self.uiLabel = 'Global Positioning Tool'
         self.winWidth = 400
-        self.winHeight = 350
+        self.winHeight = 400
         self.winSizing = False
         self.instructions = 'Moves the rig\'s pose to match the pivot\'s change in location and orientation'
         self.pivotDscrpt = 'Select the control that will be the pivot. \n\nIf using the locator option, position the locator before hitting Capture Pose.\n'
         self.targetDscrpt = 'Select the target controls that will be moved(ex: ik controls, cog control, pole vector controls, etc)\n\n*Note: If pole vector controls are not in world space, select those controls last.'
         self.captureBtnLbl = 'Capture Pose'
         self.positionBtnLbl = 'Snap Pose'
+        self.positionAnimBtnLbl = 'Snap Animation'
+        self.followPivotBtnLbl = 'Follow Pivot'
+        self.reduceChkLbl = 'Reduce followed keys'
+        self.reduceChkBx = 'globalPositioningReduceChkBxWidget'
+        self.savePoseBtnLbl = 'Save Pose'
+        self.applyPoseBtnLbl = 'Apply Pose'
+        self.poseNameField = 'poseNameFieldWidget'
         self.pivotOptionList = ['use selected object', 'use locator']
         self.pivotSetBtnLbl = 'Set Pivot'
         self.targetBtnLbl = 'Set Target Controls'
@@ -74,45 +128,47 @@ class GlobalPositioning:
         self.pivotMenu = 'pivotMenuWidget'
         self.pivotFieldBx = 'pivotFieldBxWidget'
         self.targetScroll = 'targetScrollWidget'
+        self.crowdField = 'crowdFieldWidget'
+        self.crowdBtnLbl = 'Set Crowd Targets'
+        self.crowdPlaceholder = 'rig namespaces, ex: Crowd*'
         self.btnH = 20
         self.btnW = 20
-        self.UI()
+        if ui:
+            self.UI()
 
-        #scriptJob
-        cycleCheck(evaluation=False)
-        scriptJob(uid=[self.windowName, self.cleanUpScene])
+            #scriptJob
+            cmds.cycleCheck(evaluation=False)
+            cmds.scriptJob(uid=[self.windowName, self.cleanUpScene])
         
     def getPivotCtrl(self):
         '''
             Checks the pivot type from the menu.
             Gets rid of 
         '''
-        type = optionMenu(self.pivotMenu, q=True, value=True)
+        type = cmds.optionMenu(self.pivotMenu, q=True, value=True)
         if type == self.pivotOptionList[0]:
             #if the objects already exist, they get deleted 
             self.locatorPivot = self.deleteObj(self.locatorPivot)            
-            self.targetCtrlLocGrp = self.deleteObj(self.targetCtrlLocGrp)
-            if len(selected()):
-                self.pivotCtrl = selected()[0]
+            if len(self.backend.selection()):
+                self.pivotCtrl = self.backend.selection()[0]
             else:
-                confirmDialog(m=self.selectPivotMessage)
+                cmds.confirmDialog(m=self.selectPivotMessage)
                 
         if type == self.pivotOptionList[-1]:
-            self.locatorPivot = spaceLocator(n=self.locatorPivot)
-            self.locatorPivot.setScale(self.locScale)
+            self.locatorPivot = self.backend.createLocator(self.locatorPivot or 'locatorPivot', self.locScale)
             self.pivotCtrl = self.locatorPivot
-        textScrollList(self.pivotFieldBx, e=True,  removeAll=True)
-        textScrollList(self.pivotFieldBx, e=True,  a=self.pivotCtrl)
+        cmds.textScrollList(self.pivotFieldBx, e=True,  removeAll=True)
+        cmds.textScrollList(self.pivotFieldBx, e=True,  a=self.pivotCtrl)
         self.avatarahCtrlCheck(self.pivotCtrl)
         return self.pivotCtrl
     
     def deleteObj(self, obj):
         '''
-            Deletes the object's name, not pymel object so there won't be a pymel error.
+            Deletes the object by name.
         '''
-        if objExists(obj):
+        if self.backend.exists(obj):
             try:
-                delete(obj.name())
+                self.backend.delete(obj)
             except:
                 print '%s is having a hard time getting deleted' %obj
             return ''
@@ -122,163 +178,470 @@ class GlobalPositioning:
     def avatarahCtrlCheck(self, pivot):
         '''
            Checks if the pivot control is part of an Avatarah game rig.
-           If it is, it automatically populates the targetScroll list.
+           If it is, it automatically populates the targetScroll list with the rig's target controls from the rig registry.
         ''' 
-        for rig in self.projAvatarahRigs:
-            if rig in str(pivot):
-                textScrollList(self.targetScroll, e=True, removeAll=True)
-                rigNamespace = pivot.namespace()
-                self.targetCtrls = []
-                for ctrl in self.projAvatarahRigCtrls: 
-                    c = ctrl.addPrefix(rigNamespace)
-                    c = PyNode(c)
-                    self.targetCtrls.append(c)
-                for sel in self.targetCtrls:
-                    textScrollList(self.targetScroll, e=True, a=sel)
-                self.positionMethod = 'constraint'                            
-                return self.targetCtrls
+        targetCtrls = self.rigRegistry.globalCtrlNodes(pivot)
+        if targetCtrls:
+            self.targetCtrls = list(targetCtrls)
+            self.showTargets()
+            self.positionMethod = 'constraint'                            
+            return self.targetCtrls
         return False
             
     def getTargetCtrls(self):
         '''
            Clears the targetScroll list and repopulates it with the current selection.
         ''' 
-        textScrollList(self.targetScroll, e=True, removeAll=True)
-        for sel in selected():
-            textScrollList(self.targetScroll, e=True, a=sel) 
-        self.targetCtrls = selected()
+        self.targetCtrls = self.backend.selection()
+        self.showTargets()
         return self.targetCtrls
-        
-    def placeLocAtTargetCtrls(self):
+    
+    def setCrowdTargets(self, pattern=None):
         '''
-           Places locators at the positions of the target locators.
-           Positions an empty group at the location of the pivot control.
-           Parents the locators to the group. 
+           Makes the target controls of every registered rig whose namespace matches pattern, ex: 'Crowd*', the targets.
+           The pattern is read from the UI if it isn't given. Returns the targets.
         ''' 
-        self.targetCtrlLocGrp = self.deleteObj(self.targetCtrlLocGrp)    
-        self.targetCtrlLoc = []
-        for ctrl in self.targetCtrls:
-            ctrlLoc = spaceLocator(n=str(ctrl)+self.gpLocSuffix)
-            self.constrainMoveKey(ctrl, ctrlLoc, 'parentConstraint')
-            self.targetCtrlLoc.append(ctrlLoc)
-        self.targetCtrlLocGrp = group(em=True, n=self.targetCtrlLocGrpNm)
-        setAttr(self.targetCtrlLocGrp+'.v', self.targetCtrlLocGrpVis)
-        self.constrainMoveKey(self.pivotCtrl, self.targetCtrlLocGrp, 'parentConstraint')
-        parent(self.targetCtrlLoc, self.targetCtrlLocGrp)
-        return self.targetCtrlLocGrp
+        if pattern is None:
+            pattern = cmds.textField(self.crowdField, q=True, text=True) or '*'
+        crowd = self.rigRegistry.crowdGlobalCtrlNodes(pattern)
+        if not crowd:
+            cmds.confirmDialog(m = 'No Avatarah rigs found matching %s.' %(pattern))
+            return []
+        self.targetCtrls = [ctrl for namespace, ctrls in crowd for ctrl in ctrls]
+        self.showTargets()
+        return self.targetCtrls
+    
+    def showTargets(self):
+        '''
+           Fills the targetScroll list with the target controls in one edit.
+           Past targetListLimit controls, a line per rig namespace is shown instead of every control.
+        ''' 
+        if not cmds.textScrollList(self.targetScroll, exists=True):
+            return
+        cmds.textScrollList(self.targetScroll, e=True, removeAll=True)
+        if len(self.targetCtrls) <= self.targetListLimit:
+            lines = [str(ctrl) for ctrl in self.targetCtrls]
+        else:
+            counts = collections.OrderedDict()
+            for ctrl in self.targetCtrls:
+                namespace = rigRegistry.splitName(ctrl)[0] or ':'
+                counts[namespace] = counts.get(namespace, 0) + 1
+            lines = ['%d target controls in %d rigs' %(len(self.targetCtrls), len(counts))]
+            lines += ['%s  %d controls' %(namespace, count) for namespace, count in counts.items()]
+        if lines:
+            cmds.textScrollList(self.targetScroll, e=True, a=lines)
         
+    @profiler.profiled('GlobalPositioning.capturePose')
     def capturePose(self):
         '''
-            Constraints the group of target locators to the pivot control.
+            Saves the target controls' world matrices relative to the pivot control.
+            Nothing is created in the scene.
         ''' 
         if self.pivotCtrl:
-            self.pivotTargetCon = self.deleteObj(self.pivotTargetCon) 
-            self.placeLocAtTargetCtrls()
-            self.pivotTargetCon = parentConstraint(self.pivotCtrl, self.targetCtrlLocGrp, mo=True)
-            select(cl=True)
+            pivotName = str(self.pivotCtrl)
+            self.capturedCtrls = [ctrl for ctrl in self.targetCtrls if str(ctrl) != pivotName]
+            targetMatrices = [poseSolver.targetMatrix(self.backend.worldMatrix(ctrl), self.backend.worldRotatePivot(ctrl)) 
+                              for ctrl in self.capturedCtrls]
+            self.capturedPivotMatrix = self.backend.worldMatrix(self.pivotCtrl)
+            self.capturedMatrices = poseSolver.capturePose(targetMatrices, self.capturedPivotMatrix)
+            self.snappedPivotMatrix = self.capturedPivotMatrix
+            cmds.select(cl=True)
         else:
-            confirmDialog(m = 'Please choose a pivot before you capture pose.')
+            cmds.confirmDialog(m = 'Please choose a pivot before you capture pose.')
             
     def constrainMoveKey(self, driver, driven, constraintType):
         '''
-            Constrains moves driven to driver location based on constraintType. Ex: 'parentConstraint', 'pointConstraint', etc. 
+            Moves driven to driver location based on constraintType. Ex: 'parentConstraint', 'pointConstraint', etc. 
+            Solved by matrixSnap, so no constraint is created.
         '''
-        execStr = 'con = %s(driver, driven, mo=False)' %(constraintType)
-        exec(execStr)
-        location = driven.getTranslation('world')
-        rotation = driven.getRotation('world')
-        delete(con.name())
-        driven.setTranslation(location, 'world')
-        driven.setRotation(rotation, 'world')
+        location, rotation = matrixSnap.snap(driver, driven, matrixSnap.constraintModes[constraintType])
         return driver, driven, constraintType, location
         
+    def getTargetLevels(self, ctrls):
+        '''
+            Groups the indices of ctrls by how many of the other ctrls are above them in the hierarchy.
+            A level can be written in one flush once every level above it has been written.
+        '''
+        fullPaths = [self.backend.fullPath(ctrl) for ctrl in ctrls]
+        pathSet = set(fullPaths)
+        levels = []
+        for i, path in enumerate(fullPaths):
+            #only the path's own ancestors are looked up, so a crowd's thousands of controls aren't compared pair by pair
+            parts = path.split('|')
+            depth = len([j for j in range(1, len(parts)) if '|'.join(parts[:j]) in pathSet])
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(i)
+        return [level for level in levels if level]
+    
+    @profiler.profiled('GlobalPositioning.positionPose')
     def positionPose(self):
         '''
-            Moves the rig into place based on self.positionMethod(constraint, xform, or pymel)
-            
+            Moves the rig into place by following the pivot's change in position and orientation since capturePose.
+            The writes are queued and flushed once per hierarchy level, so controls parented under other targets come out right.
+            Controls already at their solved matrix, within snapTolerance, are skipped. Returns the controls that were written.
+            If anything fails, the controls are put back where they were.
         ''' 
-        if self.pivotCtrl and self.pivotTargetCon:
-            targetCtrlsTmp = list(self.targetCtrls)
-            targetCtrlLocTmp = list(self.targetCtrlLoc)
-            for i in targetCtrlsTmp:
-                if i == str(self.pivotCtrl):
-                    targetCtrlsTmp.remove(i)
-            for i in targetCtrlLocTmp:
-                if i == str(self.pivotCtrl)+self.gpLocSuffix:
-                    targetCtrlLocTmp.remove(i)
-            
-            for ctrl, loc in itertools.izip(targetCtrlsTmp, targetCtrlLocTmp):
-                try:
-                    self.constrainMoveKey(loc, ctrl, 'pointConstraint')
-                    ctrl.setRotation(loc.getRotation('world'), 'world')   
-                except: 
-                    #if the new fixes are made this won't be necessary
-                    confirmDialog(m='Please get rid of any constraints on %s. \nThis tool will not work properly otherwise.' %(ctrl))
+        snapped = []
+        if self.pivotCtrl and self.capturedMatrices:
+            pivotMatrix = self.backend.worldMatrix(self.pivotCtrl)
+            newMatrices = poseSolver.solvePose(self.capturedMatrices, pivotMatrix)
+            #if the pivot moved every control is dirty, otherwise only the ones moved since the last snap
+            pivotMoved = not matrixMath.isEquivalent(pivotMatrix, self.snappedPivotMatrix, self.snapTolerance)
+            #locked or constrained channels are skipped by matrixSnap instead of stopping the snap
+            with sceneTransaction.SceneTransaction('positionPose') as transaction:
+                for level in self.getTargetLevels(self.capturedCtrls):
+                    if pivotMoved:
+                        dirty = level
+                    else:
+                        #read after the levels above are flushed, so a moved parent makes its children dirty
+                        dirty = [i for i in level if not matrixMath.isEquivalent(newMatrices[i], 
+                                 poseSolver.targetMatrix(self.backend.worldMatrix(self.capturedCtrls[i]), 
+                                                         self.backend.worldRotatePivot(self.capturedCtrls[i])), self.snapTolerance)]
+                    for i in dirty:
+                        matrixSnap.snapToMatrix(self.capturedCtrls[i], newMatrices[i], 'parent', transaction=transaction)
+                        snapped.append(self.capturedCtrls[i])
+                    if dirty:
+                        transaction.flush()
+            self.snappedPivotMatrix = pivotMatrix
                                     
-        if self.pivotCtrl and not self.pivotTargetCon:
-            confirmDialog(m = 'Please capture pose first.')
+        if self.pivotCtrl and not self.capturedMatrices:
+            cmds.confirmDialog(m = 'Please capture pose first.')
         if not self.pivotCtrl:
-            confirmDialog(m = 'Please set pivot and capture pose first.')
+            cmds.confirmDialog(m = 'Please set pivot and capture pose first.')
+        return snapped
             
+    @profiler.profiled('GlobalPositioning.positionAnimation')
+    def positionAnimation(self, deferred=False):
+        '''
+            Moves every key of the captured target controls by the pivot's change in position and orientation since capturePose.
+            Each control's keys are read in one pass, moved together and written back onto its existing curves.
+            With deferred, chunkSize keys are read and solved at a time from Maya's idle queue, see chunkedTask,
+            and this returns before the keys are moved.
+        ''' 
+        if not (self.pivotCtrl and self.capturedMatrices):
+            cmds.confirmDialog(m = 'Please set pivot and capture pose first.')
+            return
+        steps = self.positionAnimationSteps(self.chunkSize if deferred else None)
+        if deferred:
+            self.task = chunkedTask.ChunkedTask('Snapping animation', steps).start()
+        else:
+            chunkedTask.runSteps(steps)
+    
+    def positionAnimationSteps(self, chunkSize=None):
+        '''
+            Generator behind positionAnimation, each step reads or solves up to chunkSize keys of one control and yields (done, total).
+            A control is solved on the frames any of its channels is keyed on, but each channel only keeps its own keys.
+            Every key is moved in the last step, see keyTargetSteps.
+        '''
+        delta = poseSolver.pivotDelta(self.capturedPivotMatrix, self.backend.worldMatrix(self.pivotCtrl))
+        keyedCtrls = []
+        #(ctrl, channel) -> the frames the channel is keyed on
+        channelFrames = {}
+        for ctrl in self.capturedCtrls:
+            for channel in self.animChannels:
+                channelFrames[(str(ctrl), channel)] = animIO.keyTimes(ctrl, [channel])
+            frames = sorted(set(frame for channel in self.animChannels for frame in channelFrames[(str(ctrl), channel)]))
+            if frames:
+                keyedCtrls.append((ctrl, frames, []))
+        #read and solved once each
+        total = 2*sum(len(frames) for ctrl, frames, worldMatrices in keyedCtrls)
+        done = 0
+        
+        #all of the original animation is read before anything is written,
+        #so controls parented under other targets aren't moved twice
+        for ctrl, frames, worldMatrices in keyedCtrls:
+            for chunk in chunkedTask.chunks(frames, chunkSize):
+                worldMatrices.extend(animIO.sampleMatrices([ctrl], 'worldMatrix', chunk)[str(ctrl)])
+                done += len(chunk)
+                yield done, total
+        
+        def writeChannel(ctrl, channel, frames, values):
+            keyed = set(channelFrames[(str(ctrl), channel)])
+            if not keyed:
+                #a channel without keys is only keyed if the move changes it
+                current = self.backend.getAttr(ctrl+'.'+channel)
+                if max(abs(val - current) for val in values) <= self.snapTolerance:
+                    return
+                keyed = set(frames)
+            keys = [(frame, val) for frame, val in zip(frames, values) if frame in keyed]
+            animIO.setKeyValues(ctrl, channel, [frame for frame, val in keys], [val for frame, val in keys])
+        for progress in self.keyTargetSteps('positionAnimation', [ctrl for ctrl, frames, worldMatrices in keyedCtrls], 
+                                            [frames for ctrl, frames, worldMatrices in keyedCtrls], 
+                                            [worldMatrices for ctrl, frames, worldMatrices in keyedCtrls], writeChannel, 
+                                            chunkSize, done, total, delta):
+            yield progress
+    
+    def solveTargetFrames(self, ctrl, frames, matrices, previous=None, delta=None):
+        '''
+            Returns the translates and euler filtered rotates that put ctrl on its world matrices at frames,
+            solved against its parentInverseMatrix sampled on frames. The filter starts from previous, ctrl's rotate on the first frame by default.
+            With delta, from poseSolver.pivotDelta, matrices are ctrl's current world matrices and they're moved by delta first.
+        '''
+        state = matrixSnap.getSnapState(ctrl)
+        if delta is not None:
+            targetMatrices = [poseSolver.targetMatrix(mtx, matrixMath.getTranslation(matrixSnap.multPoint(state['rotatePivot'], mtx)))
+                              for mtx in matrices]
+            matrices = matrixMath.multMatrices(targetMatrices, delta)
+        translates = []
+        rotates = []
+        parentInvs = animIO.sampleMatrices([ctrl], 'parentInverseMatrix', frames)[str(ctrl)]
+        for mtx, parentInv in itertools.izip(matrices, parentInvs):
+            state['parentInverseMatrix'] = parentInv
+            translate, rotate = matrixSnap.solveSnap(mtx, matrixMath.getTranslation(mtx), mode='parent', **state)
+            translates.append(translate)
+            rotates.append(rotate)
+        if previous is None:
+            previous = animIO.sampleValues([ctrl], 'rotate', frames[:1])[str(ctrl)][0]
+        return translates, matrixMath.filterEulerList(rotates, state['rotateOrder'], previous)
+    
+    def keyTargetSteps(self, name, ctrls, frameLists, matrixLists, writeChannel, chunkSize=None, done=0, total=0, delta=None):
+        '''
+            Generator that keys each of ctrls onto its list of world matrices at its list of frames, yielding (done, total).
+            The top level of ctrls is solved chunkSize frames at a time. The levels below need the level above keyed first,
+            so they're solved as they're keyed in the last step, which writes everything in one sceneTransaction called name,
+            one undo chunk. writeChannel(ctrl, channel, frames, values) keys one channel, the keys already written are put back if it fails.
+            delta is passed on to solveTargetFrames.
+        '''
+        levels = self.getTargetLevels(ctrls)
+        solved = {}
+        for i in (levels[0] if levels else []):
+            translates = []
+            rotates = []
+            for chunk, chunkMatrices in itertools.izip(chunkedTask.chunks(frameLists[i], chunkSize), chunkedTask.chunks(matrixLists[i], chunkSize)):
+                chunkTranslates, chunkRotates = self.solveTargetFrames(ctrls[i], chunk, chunkMatrices, rotates[-1] if rotates else None, delta)
+                translates += chunkTranslates
+                rotates += chunkRotates
+                done += len(chunk)
+                yield done, total
+            solved[i] = (translates, rotates)
+        
+        with sceneTransaction.SceneTransaction(name):
+            snapshots = []
+            try:
+                for level in levels:
+                    for i in level:
+                        if i not in solved:
+                            solved[i] = self.solveTargetFrames(ctrls[i], frameLists[i], matrixLists[i], delta=delta)
+                    #the level is keyed before the next one is solved, so its children's parentInverseMatrix follows the new keys
+                    for i in level:
+                        ctrl = ctrls[i]
+                        translates, rotates = solved[i]
+                        channels = [channel for channel in self.animChannels if self.backend.getAttr(ctrl+'.'+channel, settable=True)]
+                        snapshots.append((ctrl, animIO.snapshotKeys(ctrl, channels)))
+                        for axis, channel in enumerate(self.animChannels):
+                            if channel in channels:
+                                values = translates if axis < 3 else rotates
+                                writeChannel(ctrl, channel, frameLists[i], [val[axis%3] for val in values])
+            except:
+                for ctrl, snapshot in reversed(snapshots):
+                    animIO.restoreKeys(ctrl, snapshot)
+                raise
+        yield total, total
+        
+    @profiler.profiled('GlobalPositioning.followPivot')
+    def followPivot(self, startFrame=None, endFrame=None, deferred=False):
+        '''
+            Keys the captured target controls on every frame from startFrame to endFrame, the playback range by default,
+            so the captured pose follows the pivot's animation. Keys already in the range are replaced.
+            With deferred, chunkSize frames are read and solved at a time from Maya's idle queue, see chunkedTask,
+            and this returns before anything is keyed.
+        '''
+        if not (self.pivotCtrl and self.capturedMatrices):
+            cmds.confirmDialog(m = 'Please set pivot and capture pose first.')
+            return
+        steps = self.followPivotSteps(animIO.frameRange(startFrame, endFrame), self.chunkSize if deferred else None)
+        if deferred:
+            self.task = chunkedTask.ChunkedTask('Following pivot', steps).start()
+        else:
+            chunkedTask.runSteps(steps)
+    
+    def followPivotSteps(self, frames, chunkSize=None):
+        '''
+            Generator behind followPivot, each step samples the pivot or solves one control over up to chunkSize frames and yields (done, total).
+            Every control is keyed in the last step, see keyTargetSteps.
+        '''
+        total = len(frames)*(len(self.capturedCtrls) + 1)
+        done = 0
+        pivotMatrices = []
+        for chunk in chunkedTask.chunks(frames, chunkSize):
+            pivotMatrices.extend(animIO.sampleMatrices([self.pivotCtrl], 'worldMatrix', chunk)[str(self.pivotCtrl)])
+            done += len(chunk)
+            yield done, total
+        #every target on every frame in one pass
+        matrixFrames = poseSolver.solvePoseFrames(self.capturedMatrices, pivotMatrices)
+        
+        self.keyReduction = keyReducer.newReport()
+        def writeChannel(ctrl, channel, frames, values):
+            tolerance = None
+            if self.reduceKeys:
+                tolerance = keyReducer.channelTolerance(channel, self.keyPositionTolerance, self.keyRotationTolerance)
+            animIO.writeKeys(ctrl, channel, frames, values, tolerance, self.keyReduction)
+        for progress in self.keyTargetSteps('followPivot', self.capturedCtrls, [frames]*len(self.capturedCtrls), matrixFrames, 
+                                            writeChannel, chunkSize, done, total):
+            yield progress
+        if self.reduceKeys and self.keyReduction['sampled']:
+            print(keyReducer.describe(self.keyReduction))
+    
+    def followPivotCmd(self):
+        '''
+            Runs followPivot from the UI over the playback range, reducing the keys if the reduce checkbox is on.
+        '''
+        self.reduceKeys = cmds.checkBox(self.reduceChkBx, q=True, value=True)
+        self.followPivot(deferred=True)
+        
+    def getPoseLibrary(self):
+        '''
+            Opens the pose library the first time it's needed.
+        '''
+        if self.poseLibrary is None:
+            self.poseLibrary = poseLibrary.PoseLibrary(self.poseLibraryDir)
+        return self.poseLibrary
+    
+    @profiler.profiled('GlobalPositioning.savePose')
+    def savePose(self, name, startFrame=None, endFrame=None):
+        '''
+            Saves the captured pose to the pose library.
+            If a frame range is given, the targets are sampled relative to the pivot on every frame of the range instead.
+        '''
+        if not (self.pivotCtrl and self.capturedMatrices):
+            cmds.confirmDialog(m = 'Please set pivot and capture pose first.')
+            return None
+        namespace = rigRegistry.splitName(self.pivotCtrl)[0]
+        ctrlNames = [str(ctrl) for ctrl in self.capturedCtrls]
+        if startFrame is None and endFrame is None:
+            return self.getPoseLibrary().savePose(name, namespace, ctrlNames, [self.capturedMatrices], 
+                                                  pivotMatrix=self.capturedPivotMatrix)
+        frames = animIO.frameRange(startFrame, endFrame)
+        worldSamples = animIO.sampleMatrices(self.capturedCtrls + [self.pivotCtrl], 'worldMatrix', frames)
+        rotatePivots = [self.backend.getAttr(ctrl+'.rotatePivot')[0] for ctrl in self.capturedCtrls]
+        matrixFrames = []
+        for i in range(len(frames)):
+            targetMatrices = [poseSolver.targetMatrix(worldSamples[ctrl][i], matrixMath.getTranslation(matrixSnap.multPoint(rp, worldSamples[ctrl][i])))
+                              for ctrl, rp in itertools.izip(ctrlNames, rotatePivots)]
+            matrixFrames.append(poseSolver.capturePose(targetMatrices, worldSamples[str(self.pivotCtrl)][i]))
+        return self.getPoseLibrary().savePose(name, namespace, ctrlNames, matrixFrames, frames, 
+                                              pivotMatrix=self.capturedPivotMatrix)
+        
+    @profiler.profiled('GlobalPositioning.applyPose')
+    def applyPose(self, name, frameIndex=0):
+        '''
+            Loads a saved pose onto the rig of the current pivot and snaps it relative to the pivot.
+            frameIndex picks the frame of a saved range.
+        '''
+        if not self.pivotCtrl:
+            cmds.confirmDialog(m = 'Please set pivot first.')
+            return None
+        library = self.getPoseLibrary()
+        entry = library.getPose(name)
+        namespace = rigRegistry.splitName(self.pivotCtrl)[0]
+        ctrlNames = [ctrl for ctrl in entry['ctrls'] if self.backend.exists(namespace + ctrl)]
+        self.capturedCtrls = [namespace + ctrl for ctrl in ctrlNames]
+        self.capturedMatrices = library.readMatrices(name, frameIndex, ctrlNames)
+        self.capturedPivotMatrix = entry['pivotMatrix'] or self.backend.worldMatrix(self.pivotCtrl)
+        self.snappedPivotMatrix = None
+        self.positionPose()
+        return self.capturedCtrls
+        
+    def poseLibraryCmd(self, action):
+        '''
+            Saves or applies the pose named in the UI. action is 'save' or 'apply'.
+        '''
+        name = cmds.textField(self.poseNameField, q=True, text=True)
+        if not name:
+            cmds.confirmDialog(m = 'Please enter a pose name.')
+            return
+        if action == 'save':
+            self.savePose(name)
+        if action == 'apply':
+            if name not in self.getPoseLibrary().index:
+                cmds.confirmDialog(m = 'There is no saved pose called %s.' %(name))
+                return
+            self.applyPose(name)
+        
     def cleanUpScene(self):
         '''
-            Deletes the group of locators in the scene.
+            Deletes the pivot locator in the scene.
             Turns on cycle check again.
         ''' 
-        self.targetCtrlLocGrp = self.deleteObj(self.targetCtrlLocGrp)
         self.locatorPivot = self.deleteObj(self.locatorPivot)
-        cycleCheck(evaluation=True)
+        cmds.cycleCheck(evaluation=True)
         
     def UI(self):
         '''
             Generates the UI.
         '''    
-        if window(self.windowName, exists = True):
-            deleteUI(self.windowName)
-        window(self.windowName, w = self.winWidth, h = self.winHeight, sizeable = self.winSizing)
+        if cmds.window(self.windowName, exists = True):
+            cmds.deleteUI(self.windowName)
+        cmds.window(self.windowName, w = self.winWidth, h = self.winHeight, sizeable = self.winSizing)
         #main layout
-        mainFormLayout = formLayout(p=self.windowName)
-        uiTitle = text(l=self.uiLabel, p=mainFormLayout, ww=True)
-        instructText = text(l=self.instructions, p=mainFormLayout, ww=True)
+        mainFormLayout = cmds.formLayout(p=self.windowName)
+        uiTitle = cmds.text(l=self.uiLabel, p=mainFormLayout, ww=True)
+        instructText = cmds.text(l=self.instructions, p=mainFormLayout, ww=True)
         #pivot frame layout
-        pivotFrame = frameLayout(p=mainFormLayout, labelVisible=False, borderVisible=True, marginWidth=5, marginHeight=5, width=175, height=250)
-        pivotText = text(p=pivotFrame, l=self.pivotDscrpt, ww=True, align='left')
-        self.pivotMenu = optionMenu(p=pivotFrame)
+        pivotFrame = cmds.frameLayout(p=mainFormLayout, labelVisible=False, borderVisible=True, marginWidth=5, marginHeight=5, width=175, height=250)
+        pivotText = cmds.text(p=pivotFrame, l=self.pivotDscrpt, ww=True, align='left')
+        self.pivotMenu = cmds.optionMenu(p=pivotFrame)
         for obj in self.pivotOptionList:
-            menuItem(p=self.pivotMenu, label=obj)
-        pivotSetBtn = button(p=pivotFrame, l=self.pivotSetBtnLbl, height=self.btnH, c=Callback(self.getPivotCtrl))
-        pivotTxtFieldLbl = text(p=pivotFrame, l=self.pivotTxtLbl, align='left')
-        self.pivotFieldBx = textScrollList(p=pivotFrame, h=10)
+            cmds.menuItem(p=self.pivotMenu, label=obj)
+        pivotSetBtn = cmds.button(p=pivotFrame, l=self.pivotSetBtnLbl, height=self.btnH, c=lambda *args: self.getPivotCtrl())
+        pivotTxtFieldLbl = cmds.text(p=pivotFrame, l=self.pivotTxtLbl, align='left')
+        self.pivotFieldBx = cmds.textScrollList(p=pivotFrame, h=10)
         #target frame layout
-        targetFrame = frameLayout(p=mainFormLayout, labelVisible=False, borderVisible=True, marginWidth=5, marginHeight=5, width=175, height=250)
-        targetText = text(p=targetFrame, l=self.targetDscrpt, ww=True, align='left')
-        targetBtn = button(l=self.targetBtnLbl, c=Callback(self.getTargetCtrls))
-        self.targetScroll = textScrollList(p=targetFrame, height=20)
+        targetFrame = cmds.frameLayout(p=mainFormLayout, labelVisible=False, borderVisible=True, marginWidth=5, marginHeight=5, width=175, height=250)
+        targetText = cmds.text(p=targetFrame, l=self.targetDscrpt, ww=True, align='left')
+        targetBtn = cmds.button(l=self.targetBtnLbl, c=lambda *args: self.getTargetCtrls())
+        self.targetScroll = cmds.textScrollList(p=targetFrame, height=20)
+        crowdRow = cmds.rowLayout(p=targetFrame, numberOfColumns=2, adjustableColumn=1)
+        self.crowdField = cmds.textField(p=crowdRow, placeholderText=self.crowdPlaceholder)
+        cmds.button(p=crowdRow, l=self.crowdBtnLbl, c=lambda *args: self.setCrowdTargets())
         #buttons at end of main layout
-        captureBtn = button(p=mainFormLayout, l=self.captureBtnLbl, c=Callback(self.capturePose))
-        positionBtn = button(p=mainFormLayout, l=self.positionBtnLbl, c=Callback(self.positionPose))
-        formLayout(mainFormLayout, edit=True, attachForm=[
-                                                          (uiTitle, "top", 5),
-                                                          (uiTitle, "left", 5),
-                                                          (uiTitle, "right", 5),
-                                                          (instructText, "left", 5), 
-                                                          (instructText, "right", 5),
-                                                          (pivotFrame, "left", 5),
-                                                          (targetFrame, "right", 5),
-                                                          (captureBtn, "left", 5),
-                                                          (captureBtn, "right", 5),
-                                                          (positionBtn, "left", 5),
-                                                          (positionBtn, "right", 5),
-                                                          (positionBtn, "bottom", 5),
-                                                         ],
-                                          attachControl=[
-                                                          (instructText, "top", 5, uiTitle),
-                                                          (pivotFrame, "top", 5, instructText),
-                                                          (targetFrame, "top", 5, instructText),
-                                                          (targetFrame, "left", 5, pivotFrame),
-                                                          (captureBtn, "top", 5, targetFrame),
-                                                          (positionBtn, "top", 5, captureBtn),
-                                                         ])        
-        showWindow(self.windowName)
-        
-GP = GlobalPositioning()
+        captureBtn = cmds.button(p=mainFormLayout, l=self.captureBtnLbl, c=lambda *args: self.capturePose())
+        positionBtn = cmds.button(p=mainFormLayout, l=self.positionBtnLbl, c=lambda *args: self.positionPose())
+        positionAnimBtn = cmds.button(p=mainFormLayout, l=self.positionAnimBtnLbl, c=lambda *args: self.positionAnimation(deferred=True))
+        followPivotBtn = cmds.button(p=mainFormLayout, l=self.followPivotBtnLbl, c=lambda *args: self.followPivotCmd())
+        self.reduceChkBx = cmds.checkBox(p=mainFormLayout, l=self.reduceChkLbl, value=False)
+        poseRow = cmds.rowLayout(p=mainFormLayout, numberOfColumns=3, adjustableColumn=1)
+        self.poseNameField = cmds.textField(p=poseRow)
+        cmds.button(p=poseRow, l=self.savePoseBtnLbl, c=lambda *args: self.poseLibraryCmd('save'))
+        cmds.button(p=poseRow, l=self.applyPoseBtnLbl, c=lambda *args: self.poseLibraryCmd('apply'))
+        cmds.formLayout(mainFormLayout, edit=True, attachForm=[
+                                                               (uiTitle, "top", 5),
+                                                               (uiTitle, "left", 5),
+                                                               (uiTitle, "right", 5),
+                                                               (instructText, "left", 5), 
+                                                               (instructText, "right", 5),
+                                                               (pivotFrame, "left", 5),
+                                                               (targetFrame, "right", 5),
+                                                               (captureBtn, "left", 5),
+                                                               (captureBtn, "right", 5),
+                                                               (positionBtn, "left", 5),
+                                                               (positionBtn, "right", 5),
+                                                               (positionAnimBtn, "left", 5),
+                                                               (positionAnimBtn, "right", 5),
+                                                               (followPivotBtn, "left", 5),
+                                                               (followPivotBtn, "right", 5),
+                                                               (self.reduceChkBx, "left", 5),
+                                                               (poseRow, "left", 5),
+                                                               (poseRow, "right", 5),
+                                                               (poseRow, "bottom", 5),
+                                                              ],
+                                               attachControl=[
+                                                               (instructText, "top", 5, uiTitle),
+                                                               (pivotFrame, "top", 5, instructText),
+                                                               (targetFrame, "top", 5, instructText),
+                                                               (targetFrame, "left", 5, pivotFrame),
+                                                               (captureBtn, "top", 5, targetFrame),
+                                                               (positionBtn, "top", 5, captureBtn),
+                                                               (positionAnimBtn, "top", 5, positionBtn),
+                                                               (followPivotBtn, "top", 5, positionAnimBtn),
+                                                               (self.reduceChkBx, "top", 5, followPivotBtn),
+                                                               (poseRow, "top", 5, self.reduceChkBx),
+                                                              ])        
+        cmds.showWindow(self.windowName)
+
+def showUI():
+    '''
+        Opens the Global Positioning Tool window and returns the tool.
+    '''
+    return GlobalPositioning()
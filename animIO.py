@@ -0,0 +1,272 @@
+'''
+    MODULE: animIO
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.6
+
+    USAGE: Bulk reads and writes of animation data for the bake modes of the animation tools.
+           Values are sampled with getAttr(time=...) so the current time is never changed,
+           and keys are written with one anim curve edit per channel.
+               frames = frameRange(1, 100)
+               mats = sampleMatrices(['fk_left_elb'], 'worldMatrix', frames)
+               writeKeys('ik_left_arm', 'translateX', frames, values)
+
+    List of functions:
+        frameRange(startFrame, endFrame)
+        sampleMatrices(nodes, attr, frames)
+        sampleValues(nodes, attr, frames)
+        writeKeys(node, attr, frames, values, tolerance, report)
+        writeVectorKeys(node, attr, frames, vectors, tolerance, report)
+        writeStepKeys(node, attr, frames, values)
+        keyTimes(node, attrs)
+        setKeyValues(node, attr, frames, values)
+        snapshotKeys(node, attrs)
+        restoreKeys(node, snapshot)
+
+    NOTES: writeKeys replaces keys in the range, setKeyValues edits the values of existing keys and keeps their tangent types.
+           With a tolerance, writeKeys only keys the frames keyReducer keeps and gives them linear tangents.
+           Every write runs in its own undo chunk, the keys it cuts and the API anim curve edits it makes, recorded and put on
+           the undo queue by apiUndo, are undone together. snapshotKeys and restoreKeys put keys back when an operation fails,
+           with their tangent types, and the angles of fixed tangents.
+           Sampled matrices are served from matrixCache, so a range read again before the scene changes isn't evaluated again.
+
+'''
+
+import contextlib
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+import matrixCache
+import keyReducer
+import apiUndo
+
+#channels of the compound transform attributes
+vectorChannels = {'translate' : ['translateX', 'translateY', 'translateZ'],
+                  'rotate' : ['rotateX', 'rotateY', 'rotateZ'],
+                  'scale' : ['scaleX', 'scaleY', 'scaleZ']}
+
+def frameRange(startFrame=None, endFrame=None):
+    '''
+        Returns the list of whole frames from startFrame to endFrame.
+        Uses the playback range for any frame that isn't given.
+    '''
+    if startFrame is None:
+        startFrame = cmds.playbackOptions(q=True, min=True)
+    if endFrame is None:
+        endFrame = cmds.playbackOptions(q=True, max=True)
+    return [float(frame) for frame in range(int(round(startFrame)), int(round(endFrame))+1)]
+
+def sampleMatrices(nodes, attr, frames):
+    '''
+        Returns a dictionary of node name to a list of flat matrices, one per frame.
+        ex: attr='worldMatrix' or 'parentInverseMatrix'
+    '''
+    cache = matrixCache.getCache()
+    samples = dict((str(node), []) for node in nodes)
+    for frame in frames:
+        read = lambda node: cmds.getAttr('%s.%s' %(node, attr), time=frame)
+        for node in nodes:
+            samples[str(node)].append(cache.get(attr, node, frame, read))
+    return samples
+
+def sampleValues(nodes, attr, frames):
+    '''
+        Returns a dictionary of node name to a list of values, one per frame.
+        Compound attributes like 'rotate' give a tuple per frame.
+    '''
+    samples = dict((str(node), []) for node in nodes)
+    for frame in frames:
+        for node in nodes:
+            value = cmds.getAttr('%s.%s' %(node, attr), time=frame)
+            if isinstance(value, list):
+                value = value[0]
+            samples[str(node)].append(value)
+    return samples
+
+def _getPlug(node, attr):
+    sel = om2.MSelectionList()
+    sel.add('%s.%s' %(node, attr))
+    return sel.getPlug(0)
+
+def _getCurve(plug, modifier):
+    '''
+        Returns an MFnAnimCurve for the curve driving plug, creating one with modifier if it isn't animated.
+    '''
+    curves = oma2.MAnimUtil.findAnimation(plug)
+    curveFn = oma2.MFnAnimCurve()
+    if curves:
+        curveFn.setObject(curves[0])
+    else:
+        curveFn.create(plug, modifier=modifier)
+        modifier.doIt()
+    return curveFn
+
+@contextlib.contextmanager
+def _curveEdit(name):
+    '''
+        Opens an undo chunk and yields the MDGModifier and MAnimCurveChange to record API edits in.
+        The edits are put on the undo queue when the chunk closes, so they undo with the cmds run inside it.
+    '''
+    modifier = om2.MDGModifier()
+    change = oma2.MAnimCurveChange()
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    try:
+        yield modifier, change
+    finally:
+        try:
+            apiUndo.commit(modifier, change)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+def _toCurveUnits(curveFn, values):
+    '''
+        Converts ui unit values to the units the curve stores, anim curves store angles in radians and distances in centimeters.
+    '''
+    curveType = curveFn.animCurveType
+    if curveType in (oma2.MFnAnimCurve.kAnimCurveTA, oma2.MFnAnimCurve.kAnimCurveUA):
+        return [om2.MAngle(val, om2.MAngle.uiUnit()).asRadians() for val in values]
+    if curveType in (oma2.MFnAnimCurve.kAnimCurveTL, oma2.MFnAnimCurve.kAnimCurveUL):
+        return [om2.MDistance(val, om2.MDistance.uiUnit()).asCentimeters() for val in values]
+    return list(values)
+
+def writeKeys(node, attr, frames, values, tolerance=None, report=None):
+    '''
+        Keys values onto node.attr at frames with a single anim curve edit.
+        Keys already inside the frame range are replaced, keys outside it are kept.
+        With a tolerance, only the keys needed to stay within it are written, see keyReducer.
+        report, from keyReducer.newReport, counts the frames given and the keys written.
+    '''
+    if not frames:
+        return None
+    tangentType = oma2.MFnAnimCurve.kTangentGlobal
+    if report is not None:
+        report['sampled'] += len(frames)
+    firstFrame, lastFrame = frames[0], frames[-1]
+    if tolerance is not None:
+        frames, values = keyReducer.reduceKeys(frames, values, tolerance)
+        tangentType = oma2.MFnAnimCurve.kTangentLinear
+    if report is not None:
+        report['written'] += len(frames)
+    with _curveEdit('writeKeys') as (modifier, change):
+        cmds.cutKey(str(node), attribute=attr, time=(firstFrame, lastFrame), clear=True)
+        curveFn = _getCurve(_getPlug(node, attr), modifier)
+        times = om2.MTimeArray([om2.MTime(frame, om2.MTime.uiUnit()) for frame in frames])
+        curveFn.addKeys(times, om2.MDoubleArray(_toCurveUnits(curveFn, values)), tangentInType=tangentType, tangentOutType=tangentType,
+                        keepExistingKeys=True, change=change)
+    matrixCache.invalidateNode(node)
+    return curveFn.name()
+
+def _getTangents(curveFn, index):
+    '''
+        Returns the tangents of a key, (inType, outType, (inAngle, inWeight), (outAngle, outWeight)).
+    '''
+    return (curveFn.inTangentType(index), curveFn.outTangentType(index),
+            curveFn.getTangentAngleWeight(index, True), curveFn.getTangentAngleWeight(index, False))
+
+def _setTangents(curveFn, index, tangents, change):
+    '''
+        Sets the tangents returned by _getTangents back on a key. Only fixed tangents get their angle and weight back,
+        the others are worked out from the keys around them.
+    '''
+    inType, outType, inAngleWeight, outAngleWeight = tangents
+    curveFn.setInTangentType(index, inType, change=change)
+    curveFn.setOutTangentType(index, outType, change=change)
+    for isInTangent, tangentType, (angle, weight) in [(True, inType, inAngleWeight), (False, outType, outAngleWeight)]:
+        if tangentType != oma2.MFnAnimCurve.kTangentFixed:
+            continue
+        curveFn.setAngle(index, angle, isInTangent, change=change)
+        if curveFn.isWeighted:
+            curveFn.setWeight(index, weight, isInTangent, change=change)
+
+def snapshotKeys(node, attrs):
+    '''
+        Returns the keys of node's attrs for restoreKeys, a dictionary of attr to a list of (time, value, tangents)
+        in the curve's units. Attrs that aren't animated are kept as None.
+    '''
+    snapshot = {}
+    for attr in attrs:
+        curves = oma2.MAnimUtil.findAnimation(_getPlug(node, attr))
+        if not curves:
+            snapshot[attr] = None
+            continue
+        curveFn = oma2.MFnAnimCurve(curves[0])
+        snapshot[attr] = [(curveFn.input(index), curveFn.value(index), _getTangents(curveFn, index)) for index in range(curveFn.numKeys)]
+    return snapshot
+
+def restoreKeys(node, snapshot):
+    '''
+        Puts back the keys saved by snapshotKeys. Keys added since are removed and the others get their old values and
+        tangents back. Curves that didn't exist are cut.
+    '''
+    with _curveEdit('restoreKeys') as (modifier, change):
+        for attr, keys in snapshot.items():
+            if keys is None:
+                cmds.cutKey(str(node), attribute=attr, clear=True)
+                continue
+            curveFn = _getCurve(_getPlug(node, attr), modifier)
+            kept = set(curveFn.find(time) for time, value, tangents in keys)
+            for index in reversed(range(curveFn.numKeys)):
+                if index not in kept:
+                    curveFn.remove(index, change=change)
+            for time, value, tangents in keys:
+                index = curveFn.find(time)
+                if index is None:
+                    curveFn.addKey(time, value, change=change)
+                    index = curveFn.find(time)
+                else:
+                    curveFn.setValue(index, value, change=change)
+                _setTangents(curveFn, index, tangents, change)
+    matrixCache.invalidateNode(node)
+
+def writeVectorKeys(node, attr, frames, vectors, tolerance=None, report=None):
+    '''
+        Keys a list of xyz vectors onto the three channels of a compound attribute, ex: 'translate' or 'rotate'.
+        tolerance and report are passed on to writeKeys for each channel.
+    '''
+    curves = []
+    for axis, channel in enumerate(vectorChannels[attr]):
+        curves.append(writeKeys(node, channel, frames, [vec[axis] for vec in vectors], tolerance, report))
+    return curves
+
+def writeStepKeys(node, attr, frames, values):
+    '''
+        Keys values onto node.attr at frames with stepped tangents, for enum attributes like a space switch.
+        Keys already inside the frame range are replaced, keys outside it are kept.
+    '''
+    if not frames:
+        return None
+    with _curveEdit('writeStepKeys') as (modifier, change):
+        cmds.cutKey(str(node), attribute=attr, time=(frames[0], frames[-1]), clear=True)
+        curveFn = _getCurve(_getPlug(node, attr), modifier)
+        times = om2.MTimeArray([om2.MTime(frame, om2.MTime.uiUnit()) for frame in frames])
+        curveFn.addKeys(times, om2.MDoubleArray([float(val) for val in values]), tangentInType=oma2.MFnAnimCurve.kTangentGlobal,
+                        tangentOutType=oma2.MFnAnimCurve.kTangentStep, keepExistingKeys=True, change=change)
+    matrixCache.invalidateNode(node)
+    return curveFn.name()
+
+def keyTimes(node, attrs):
+    '''
+        Returns the sorted frames that have a key on any of the attrs.
+    '''
+    times = cmds.keyframe(str(node), attribute=attrs, q=True, timeChange=True) or []
+    return sorted(set(times))
+
+def setKeyValues(node, attr, frames, values):
+    '''
+        Sets the values of the keys at frames on node.attr, adding keys where there are none.
+        Existing keys keep their tangent types so the curve's shape stays consistent.
+    '''
+    with _curveEdit('setKeyValues') as (modifier, change):
+        curveFn = _getCurve(_getPlug(node, attr), modifier)
+        for frame, val in zip(frames, _toCurveUnits(curveFn, values)):
+            time = om2.MTime(frame, om2.MTime.uiUnit())
+            index = curveFn.find(time)
+            if index is None:
+                curveFn.addKey(time, val, change=change)
+            else:
+                curveFn.setValue(index, val, change=change)
+    matrixCache.invalidateNode(node)
+    return curveFn.name()
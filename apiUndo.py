@@ -0,0 +1,101 @@
+'''
+    MODULE: apiUndo
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.0
+
+    USAGE: Puts anim curve edits made through the Maya API on Maya's undo queue, so they undo with the cmds run around them.
+           The edits are recorded in an MDGModifier and an MAnimCurveChange and handed over once they're made:
+               modifier = om2.MDGModifier()
+               change = oma2.MAnimCurveChange()
+               curveFn.addKeys(times, values, change=change)
+               apiUndo.commit(modifier, change)
+           The module is also the Maya plugin that registers the command, commit loads it the first time it's called.
+
+    List of functions:
+        load()
+        commit(modifier, change)
+        initializePlugin(plugin)
+        uninitializePlugin(plugin)
+    List of methods from class ApiUndoCommand:
+        doIt(args)
+        undoIt()
+        redoIt()
+        isUndoable()
+
+    NOTES: commit runs the animToolsApiUndo command, which takes the edits over and undoes or redoes them with the undo queue.
+           The edits are already made when commit is called, the command only makes them again on redo.
+           Run commit inside an undo chunk with the cmds the edits belong with, ex: animIO cuts keys and writes the new ones in one chunk.
+           The pending edits are kept on the module as imported, Maya loads the plugin from the same file as a separate module.
+
+'''
+
+import os
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+maya_useNewAPI = True
+pluginName = 'apiUndo'
+commandName = 'animToolsApiUndo'
+
+_pending = []
+_loaded = []
+
+class ApiUndoCommand(om2.MPxCommand):
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.modifier = None
+        self.change = None
+
+    def doIt(self, args):
+        '''
+            Takes over the edits passed to commit, they're already made.
+        '''
+        import apiUndo
+        self.modifier, self.change = apiUndo._pending.pop(0)
+
+    def undoIt(self):
+        self.change.undoIt()
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+        self.change.redoIt()
+
+    def isUndoable(self):
+        return True
+
+def _creator():
+    return ApiUndoCommand()
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, 'Veronica Tello', '1.0').registerCommand(commandName, _creator)
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(commandName)
+
+def load():
+    '''
+        Loads this module as a plugin if it isn't already, so commandName can be run.
+    '''
+    if _loaded:
+        return
+    if not cmds.pluginInfo(pluginName, q=True, loaded=True):
+        cmds.loadPlugin(os.path.splitext(os.path.abspath(__file__))[0] + '.py', quiet=True)
+    _loaded.append(True)
+
+def commit(modifier, change):
+    '''
+        Puts the edits recorded in modifier and change on the undo queue as one command.
+    '''
+    load()
+    _pending.append((modifier, change))
+    try:
+        getattr(cmds, commandName)()
+    finally:
+        #the command takes the edits, nothing is left pending if it couldn't run
+        del _pending[:]
@@ -0,0 +1,284 @@
+'''
+    MODULE: batchProcessor
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.5
+
+    USAGE: Runs ikFkMatching and GlobalPositioning over a list of scenes without their UIs, ex: a sequence overnight.
+           Each scene is opened, processed and saved by its own worker process, and a timing report is written per job.
+               mayapy batchProcessor.py shots.json --processes 4 --report shots_report.json
+               python batchProcessor.py shots.json --standIn
+           --standIn runs on scenes exported by the benchmarks' sceneStandIn, so the pipeline can be tested without a Maya license.
+           Manifest layout:
+               {"outputDir" : "/shots/processed",
+                "jobs" : [{"scene" : "/shots/sh010.ma",
+                           "output" : "/shots/processed/sh010.ma",
+                           "operations" : [{"type" : "ikToFk", "rig" : "Astrea01:", "limbs" : ["left_arm"], "bake" : true, "reduceKeys" : true},
+                                           {"type" : "verify", "rig" : "Astrea01:", "limbs" : ["left_arm"], "positionTolerance" : 0.01},
+                                           {"type" : "positionAnimation", "rig" : "Astrea01:", "pivot" : "COG_ctrl",
+                                            "translate" : [0, 0, 100], "rotate" : [0, 90, 0]},
+                                           {"type" : "positionPose", "pivot" : "crowdPivot", "crowd" : "Crowd*",
+                                            "translate" : [500, 0, 0]},
+                                           {"type" : "spaceSwitch", "rig" : "Astrea01:", "ctrls" : ["ik_left_arm"], "space" : "world", "bake" : true}]}]}
+
+    List of functions:
+        loadManifest(path)
+        openScene(path, standIn)
+        saveScene(path, standIn)
+        runOperation(operation)
+        runJob(jobArgs)
+        runManifest(manifest, processes, standIn)
+        writeReport(results, path)
+        main()
+
+    NOTES: Operation types:
+               ikToFk, fkToIk : matches the rig's limbs ("left_arm", ...), every limb of the rig if limbs isn't given.
+                                bake, startFrame, endFrame and pvOffset are passed on to MatchingIkFk.batchMatch.
+                                reduceKeys reduces the baked keys, keyPositionTolerance and keyRotationTolerance override the defaults.
+               verify : compares the fk and ik chains of the rig's limbs with MatchingIkFk.verifyMatch, on the current frame
+                        or from startFrame to endFrame. The job fails if any frame is above positionTolerance or rotationTolerance.
+               positionPose, positionAnimation : captures the targets (the rig registry's globalCtrls unless targets is given),
+                                                 sets the pivot's translate and/or rotate, then snaps the pose or every key.
+                                                 With crowd, a namespace pattern, every matching rig's globalCtrls are the targets.
+               spaceSwitch : switches the rig's ctrls, every one of its spaceCtrls if ctrls isn't given, to space without them moving.
+                             bake, startFrame, endFrame and the key reduction options work the same as ikToFk.
+           A job without an output is saved to outputDir, or next to its scene with _processed added to the name.
+           A job that fails is reported with its traceback and isn't saved, the other jobs still run.
+           Each worker handles one scene and exits, so no scene state carries over between jobs, --processes 1 included.
+
+'''
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import traceback
+
+moduleDir = os.path.dirname(os.path.abspath(__file__))
+mayaFileTypes = {'.ma' : 'mayaAscii', '.mb' : 'mayaBinary'}
+
+_initialized = []
+
+def loadManifest(path):
+    '''
+        Reads a manifest and fills in each job's output path. Raises ValueError if a job is missing its scene or operations.
+    '''
+    with open(path) as f:
+        manifest = json.load(f)
+    outputDir = manifest.get('outputDir')
+    for index, job in enumerate(manifest.get('jobs', [])):
+        if 'scene' not in job or not job.get('operations'):
+            raise ValueError('Job %d of %s needs a scene and a list of operations' %(index, path))
+        if not job.get('output'):
+            if outputDir:
+                job['output'] = os.path.join(outputDir, os.path.basename(job['scene']))
+            else:
+                base, ext = os.path.splitext(job['scene'])
+                job['output'] = base + '_processed' + ext
+    return manifest
+
+def _initialize(standIn):
+    '''
+        Gets the worker's scene ready, once per process: the sceneStandIn or a standalone Maya session.
+    '''
+    if _initialized:
+        return _initialized[0]
+    if standIn:
+        benchmarksDir = os.path.join(moduleDir, 'benchmarks')
+        if benchmarksDir not in sys.path:
+            sys.path.insert(0, benchmarksDir)
+        import sceneStandIn
+        _initialized.append(sceneStandIn.install())
+    else:
+        import maya.standalone
+        maya.standalone.initialize(name='python')
+        _initialized.append(None)
+    return _initialized[0]
+
+def openScene(path, standIn=False):
+    '''
+        Opens the scene at path, discarding the current one.
+    '''
+    if standIn:
+        return _initialize(standIn).load(path)
+    import maya.cmds as cmds
+    return cmds.file(path, open=True, force=True)
+
+def saveScene(path, standIn=False):
+    '''
+        Saves the current scene to path, creating its folder if needed.
+    '''
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    if standIn:
+        return _initialize(standIn).save(path)
+    import maya.cmds as cmds
+    cmds.file(rename=path)
+    return cmds.file(save=True, force=True, type=mayaFileTypes.get(os.path.splitext(path)[1].lower(), 'mayaAscii'))
+
+def runOperation(operation):
+    '''
+        Runs one manifest operation on the open scene. Returns a dictionary of what was matched or moved.
+    '''
+    import ikFkMatching
+    import GlobalPositioningTool
+    import animIO
+    import rigRegistry
+    import sceneBackend
+    opType = operation['type']
+    rig = operation.get('rig', '')
+    if opType in ('ikToFk', 'fkToIk'):
+        #the registry finds a limb from the rig's namespace and a name with its side and limb, ex: Astrea01:left_arm
+        limbs = operation.get('limbs')
+        ctrls = [rig + limb for limb in limbs] if limbs else [rig]
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        matcher.reduceKeys = operation.get('reduceKeys', False)
+        matcher.keyPositionTolerance = operation.get('keyPositionTolerance', matcher.keyPositionTolerance)
+        matcher.keyRotationTolerance = operation.get('keyRotationTolerance', matcher.keyRotationTolerance)
+        matched = matcher.batchMatch(ctrls, opType, bake=operation.get('bake', False), startFrame=operation.get('startFrame'),
+                                     endFrame=operation.get('endFrame'), allLimbs=not limbs, pvOffset=operation.get('pvOffset', 2))
+        if not matched:
+            raise ValueError('No registered limbs found for %s' %(', '.join(ctrls)))
+        return {'limbs' : [str(nodes['ikCtl']) for nodes in matched], 'residuals' : matcher.residuals, 'keyReduction' : matcher.keyReduction}
+    if opType == 'verify':
+        limbs = operation.get('limbs')
+        ctrls = [rig + limb for limb in limbs] if limbs else [rig]
+        frames = None
+        if 'startFrame' in operation or 'endFrame' in operation:
+            frames = animIO.frameRange(operation.get('startFrame'), operation.get('endFrame'))
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        report = matcher.verifyMatch(ctrls, frames, allLimbs=not limbs, positionTolerance=operation.get('positionTolerance'), 
+                                     rotationTolerance=operation.get('rotationTolerance'))
+        if not report:
+            raise ValueError('No registered limbs found for %s' %(', '.join(ctrls)))
+        flagged = ['%s on %d frames' %(ctrl, len(summary['flagged'])) for ctrl, summary in sorted(report.items()) if summary['flagged']]
+        if flagged:
+            raise ValueError('Match verification failed: %s' %(', '.join(flagged)))
+        #the per frame errors are left out of the report, the summary is enough to tell a bake is good
+        return dict((ctrl, dict((key, value) for key, value in summary.items() if key not in ('position', 'rotation', 'frames'))) 
+                    for ctrl, summary in report.items())
+    if opType in ('positionPose', 'positionAnimation'):
+        tool = GlobalPositioningTool.GlobalPositioning(ui=False)
+        tool.pivotCtrl = rig + operation['pivot']
+        if 'targets' in operation:
+            targets = [rig + ctrl for ctrl in operation['targets']]
+        elif 'crowd' in operation:
+            targets = tool.setCrowdTargets(operation['crowd'])
+        else:
+            targets = rigRegistry.getRegistry().globalCtrlNodes(tool.pivotCtrl)
+        if not targets:
+            raise ValueError('No target controls found for the pivot %s' %(tool.pivotCtrl))
+        tool.targetCtrls = list(targets)
+        tool.capturePose()
+        backend = sceneBackend.getBackend()
+        for attr in ('translate', 'rotate'):
+            if attr in operation:
+                backend.setAttr('%s.%s' %(tool.pivotCtrl, attr), *operation[attr])
+        if opType == 'positionPose':
+            tool.positionPose()
+        else:
+            tool.positionAnimation()
+        return {'targets' : [str(ctrl) for ctrl in tool.capturedCtrls]}
+    if opType == 'spaceSwitch':
+        names = operation.get('ctrls')
+        ctrls = [rig + ctrl for ctrl in names] if names else [rig]
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        matcher.reduceKeys = operation.get('reduceKeys', False)
+        matcher.keyPositionTolerance = operation.get('keyPositionTolerance', matcher.keyPositionTolerance)
+        matcher.keyRotationTolerance = operation.get('keyRotationTolerance', matcher.keyRotationTolerance)
+        switched = matcher.switchSpace(ctrls, operation['space'], bake=operation.get('bake', False), startFrame=operation.get('startFrame'),
+                                       endFrame=operation.get('endFrame'), allCtrls=not names)
+        if not switched:
+            raise ValueError('No controls with a %s space found for %s' %(operation['space'], ', '.join(ctrls)))
+        return {'ctrls' : [ctrl for ctrl, attr, value in switched], 'keyReduction' : matcher.keyReduction}
+    raise ValueError('Unknown operation type: %s' %(opType))
+
+def runJob(jobArgs):
+    '''
+        Opens a job's scene, runs its operations and saves it. jobArgs is (job, standIn) so it can be sent to a process pool.
+        Returns the job's report: seconds and scene command counts per operation, and the error if it failed.
+    '''
+    job, standIn = jobArgs
+    start = timeit.default_timer()
+    report = {'scene' : job['scene'], 'output' : job['output'], 'pid' : os.getpid(), 'operations' : [], 'error' : None}
+    try:
+        _initialize(standIn)
+        import profiler
+        profiler.enable()
+        try:
+            with profiler.span('openScene') as span:
+                openScene(job['scene'], standIn)
+            report['openSeconds'] = round(span.seconds, 6)
+            for operation in job['operations']:
+                with profiler.span(operation['type']) as span:
+                    details = runOperation(operation)
+                report['operations'].append({'type' : operation['type'], 'seconds' : round(span.seconds, 6),
+                                             'counts' : span.totals(), 'details' : details})
+            with profiler.span('saveScene') as span:
+                saveScene(job['output'], standIn)
+            report['saveSeconds'] = round(span.seconds, 6)
+        finally:
+            #a failed job's spans and patched commands don't carry over to the next job
+            profiler.disable()
+            profiler.reset()
+    except Exception:
+        report['error'] = traceback.format_exc()
+    report['seconds'] = round(timeit.default_timer() - start, 6)
+    return report
+
+def runManifest(manifest, processes=1, standIn=False):
+    '''
+        Runs every job of the manifest and returns their reports in manifest order.
+        Every job runs in a worker process of its own, processes of them at a time.
+    '''
+    jobArgs = [(job, standIn) for job in manifest['jobs']]
+    if not jobArgs:
+        return []
+    import multiprocessing
+    #workers are replaced after each job, so a scene's state never reaches the next one, even running one job at a time
+    pool = multiprocessing.Pool(max(1, min(processes, len(jobArgs))), maxtasksperchild=1)
+    try:
+        return pool.map(runJob, jobArgs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+def writeReport(results, path=None):
+    '''
+        Prints a line per job and, if path is given, writes the full reports to it as JSON.
+        Returns the number of failed jobs.
+    '''
+    failed = 0
+    for report in results:
+        status = 'failed' if report['error'] else 'ok'
+        ops = '  '.join('%s %.2fs' %(op['type'], op['seconds']) for op in report['operations'])
+        print('%-50s %-6s %8.2fs  %s' %(report['scene'], status, report['seconds'], ops))
+        if report['error']:
+            failed += 1
+            print(report['error'])
+    total = sum(report['seconds'] for report in results)
+    print('%d jobs, %d failed, %.2fs of work' %(len(results), failed, total))
+    if path:
+        with open(path, 'w') as f:
+            json.dump({'jobs' : results, 'failed' : failed, 'seconds' : round(total, 6)}, f, indent=1, sort_keys=True)
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs ikFkMatching and GlobalPositioning operations over a manifest of scenes.')
+    parser.add_argument('manifest', help='JSON manifest of scenes and the operations to run on each')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes, one scene per worker')
+    parser.add_argument('--report', help='write the per job timing report to this JSON file')
+    parser.add_argument('--standIn', action='store_true', help='process sceneStandIn exports instead of Maya scenes')
+    args = parser.parse_args()
+
+    manifest = loadManifest(args.manifest)
+    results = runManifest(manifest, args.processes, args.standIn)
+    return 1 if writeReport(results, args.report) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
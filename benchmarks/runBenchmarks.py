@@ -0,0 +1,349 @@
+'''
+    MODULE: runBenchmarks
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.8
+
+    USAGE: Runs ikFkMatching and GlobalPositioning against the sceneStandIn scene and reports, per operation,
+           wall time, node creations and DG writes while sweeping limb count, target control count and frame range length.
+           Run with Maya's python interpreter (or any python 2.7), Maya itself isn't needed:
+               mayapy benchmarks/runBenchmarks.py
+               mayapy benchmarks/runBenchmarks.py --save benchmarks/baseline.json
+               mayapy benchmarks/runBenchmarks.py --compare benchmarks/baseline.json
+
+    List of functions:
+        buildCharacters(numLimbs)
+        benchIkFk(matchType, numLimbs, numFrames, reduceKeys)
+        benchRematch(matchType, numLimbs)
+        benchVerify(numLimbs, numFrames)
+        benchCapture(numTargets)
+        benchPosition(numTargets)
+        benchResnap(numTargets, numMoved)
+        benchPositionAnimation(numTargets, numFrames)
+        benchFollowPivot(numTargets, numFrames, reduceKeys)
+        benchCrowd(numRigs)
+        benchSpaceSwitch(numRigs, numFrames)
+        runCase(name, params, setup, repeats)
+        runSweep(repeats, quick)
+        compareResults(baseline, results, timeTolerance)
+        main()
+
+    NOTES: Times are the best of the repeats and only cover the operation, not building the scene.
+           DG writes are setAttr calls, xform edits, anim curve edits and every key written, keyWrites is also reported on its own.
+           Counts are deterministic, so any increase against the baseline is reported as a regression.
+           Times depend on the machine, keep a baseline per machine and use --tolerance for the allowed slowdown.
+
+'''
+
+import argparse
+import json
+import sys
+import time
+
+import sceneStandIn
+
+scene = sceneStandIn.install()
+
+import ikFkMatching
+import GlobalPositioningTool
+import rigRegistry
+import animIO
+
+rigsPerCharacter = ['Astrea', 'Proteus', 'Tartarus']
+limbSweep = [1, 4, 16, 64]
+targetSweep = [10, 100, 1000]
+frameSweep = [10, 100, 500]
+rigSweep = [10, 50, 200]
+
+def _newScene():
+    scene.reset()
+    rigRegistry.getRegistry().invalidate()
+
+def buildCharacters(numLimbs):
+    '''
+        Builds enough characters for numLimbs limbs, cycling through the registered rigs.
+        Returns the first numLimbs ikFk switch controls.
+    '''
+    switches = []
+    index = 0
+    while len(switches) < numLimbs:
+        rig = rigsPerCharacter[index % len(rigsPerCharacter)]
+        switches += sceneStandIn.buildAvatarahRig(scene, '%s%02d:' %(rig, index), rig)
+        index += 1
+    return switches[:numLimbs]
+
+def _keyTargets(targets, numFrames):
+    for target in targets:
+        for axis, channel in enumerate(['translateX', 'translateY', 'rotateZ']):
+            values = [frame*(axis+1)*0.5 for frame in range(numFrames)]
+            plug = sceneStandIn.MSelectionList()
+            plug.add('%s.%s' %(target, channel))
+            curveFn = sceneStandIn.MFnAnimCurve()
+            curveFn.create(plug.getPlug(0))
+            curveFn.curve.keys = dict((float(frame+1), val) for frame, val in enumerate(values))
+
+def benchIkFk(matchType, numLimbs, numFrames=0, reduceKeys=False):
+    '''
+        Returns the setup for a batch ikFk match of numLimbs limbs, baked over numFrames frames if given.
+    '''
+    def setup():
+        _newScene()
+        switches = buildCharacters(numLimbs)
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        matcher.reduceKeys = reduceKeys
+        if numFrames:
+            return lambda: matcher.batchMatch(switches, matchType, bake=True, startFrame=1, endFrame=numFrames)
+        return lambda: matcher.batchMatch(switches, matchType)
+    return setup
+
+def benchRematch(matchType, numLimbs):
+    '''
+        Returns the setup for matching the same limbs again on the same frame, matrixCache keeps nothing between operations
+        so it costs the same as the first match.
+    '''
+    def setup():
+        _newScene()
+        switches = buildCharacters(numLimbs)
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        matcher.batchMatch(switches, matchType)
+        return lambda: matcher.batchMatch(switches, matchType)
+    return setup
+
+def benchVerify(numLimbs, numFrames):
+    '''
+        Returns the setup for verifying numLimbs limbs' matches over numFrames frames.
+    '''
+    def setup():
+        _newScene()
+        switches = buildCharacters(numLimbs)
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        frames = animIO.frameRange(1, numFrames)
+        return lambda: matcher.verifyMatch(switches, frames, positionTolerance=0.01)
+    return setup
+
+def _globalPositioning(numTargets, numFrames=0):
+    pivot, targets = sceneStandIn.buildTargets(scene, numTargets)
+    if numFrames:
+        _keyTargets(targets, numFrames)
+    gp = GlobalPositioningTool.GlobalPositioning(ui=False)
+    gp.pivotCtrl = pivot
+    gp.targetCtrls = list(targets)
+    return gp, pivot
+
+def _movePivot(pivot):
+    sceneStandIn.setAttr(pivot+'.translate', 25.0, 0.0, -10.0)
+    sceneStandIn.setAttr(pivot+'.rotate', 0.0, 45.0, 0.0)
+
+def benchCapture(numTargets):
+    def setup():
+        _newScene()
+        gp, pivot = _globalPositioning(numTargets)
+        return gp.capturePose
+    return setup
+
+def benchPosition(numTargets):
+    def setup():
+        _newScene()
+        gp, pivot = _globalPositioning(numTargets)
+        gp.capturePose()
+        _movePivot(pivot)
+        return gp.positionPose
+    return setup
+
+def benchResnap(numTargets, numMoved):
+    def setup():
+        _newScene()
+        gp, pivot = _globalPositioning(numTargets)
+        gp.capturePose()
+        _movePivot(pivot)
+        gp.positionPose()
+        #the animator moves a few controls by hand, then snaps again without moving the pivot
+        for ctrl in gp.capturedCtrls[:numMoved]:
+            sceneStandIn.setAttr(ctrl+'.translateY', 5.0)
+        return gp.positionPose
+    return setup
+
+def benchPositionAnimation(numTargets, numFrames):
+    def setup():
+        _newScene()
+        gp, pivot = _globalPositioning(numTargets, numFrames)
+        gp.capturePose()
+        _movePivot(pivot)
+        return gp.positionAnimation
+    return setup
+
+def _keyPivot(pivot, numFrames):
+    for axis, channel in enumerate(['translateX', 'translateZ', 'rotateY']):
+        plug = sceneStandIn.MSelectionList()
+        plug.add('%s.%s' %(pivot, channel))
+        curveFn = sceneStandIn.MFnAnimCurve()
+        curveFn.create(plug.getPlug(0))
+        curveFn.curve.keys = dict((float(frame+1), frame*(axis+1)*2.0) for frame in range(numFrames))
+
+def benchFollowPivot(numTargets, numFrames, reduceKeys=False):
+    '''
+        Returns the setup for keying numTargets captured controls onto a pivot animated over numFrames frames.
+    '''
+    def setup():
+        _newScene()
+        gp, pivot = _globalPositioning(numTargets)
+        gp.reduceKeys = reduceKeys
+        gp.capturePose()
+        _keyPivot(pivot, numFrames)
+        return lambda: gp.followPivot(1, numFrames)
+    return setup
+
+def benchCrowd(numRigs):
+    '''
+        Returns the setup for finding numRigs rigs' target controls by namespace pattern, capturing and snapping them around one pivot.
+    '''
+    def setup():
+        _newScene()
+        #every character has four limbs
+        buildCharacters(numRigs*4)
+        pivot = scene.createNode('crowdPivot')
+        gp = GlobalPositioningTool.GlobalPositioning(ui=False)
+        gp.pivotCtrl = pivot
+        def operation():
+            gp.setCrowdTargets('*')
+            gp.capturePose()
+            _movePivot(pivot)
+            gp.positionPose()
+        return operation
+    return setup
+
+def benchSpaceSwitch(numRigs, numFrames=0):
+    '''
+        Returns the setup for switching every space control of numRigs rigs to their world space, baked over numFrames frames if given.
+        The rigs' COG controls are animated so the controls in the COG's space move.
+    '''
+    def setup():
+        _newScene()
+        switches = buildCharacters(numRigs*4)
+        namespaces = sorted(set(switch.split(':')[0]+':' for switch in switches))
+        for namespace in namespaces:
+            sceneStandIn.buildSpaces(scene, namespace, namespace[:-3])
+            _keyPivot(namespace+'COG_ctrl', max(numFrames, 1))
+        matcher = ikFkMatching.MatchingIkFk(ui=False)
+        if numFrames:
+            return lambda: matcher.switchSpace(namespaces, 'world', bake=True, startFrame=1, endFrame=numFrames, allCtrls=True)
+        return lambda: matcher.switchSpace(namespaces, 'world', allCtrls=True)
+    return setup
+
+def runCase(name, params, setup, repeats=3):
+    '''
+        Runs one benchmark case. setup builds a fresh scene and returns the operation to time.
+        Returns a result dictionary: name, params, seconds and the scene counters of one run.
+    '''
+    best = None
+    counters = None
+    for i in range(repeats):
+        operation = setup()
+        scene.resetCounters()
+        start = time.time()
+        operation()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+        counters = dict(scene.counters)
+    counters['dgWrites'] = counters['attrWrites'] + counters['keyWrites']
+    return {'name' : name, 'params' : params, 'seconds' : round(best, 6), 'counters' : counters}
+
+def _caseKey(result):
+    return '%s(%s)' %(result['name'], ', '.join('%s=%s' %(key, result['params'][key]) for key in sorted(result['params'])))
+
+def runSweep(repeats=3, quick=False):
+    '''
+        Runs every benchmark case and returns the results in order.
+    '''
+    limbs = limbSweep[:2] if quick else limbSweep
+    targets = targetSweep[:2] if quick else targetSweep
+    frames = frameSweep[:2] if quick else frameSweep
+    rigs = rigSweep[:2] if quick else rigSweep
+    cases = []
+    for numLimbs in limbs:
+        cases.append(('ikToFk', {'limbs' : numLimbs}, benchIkFk('ikToFk', numLimbs)))
+        cases.append(('fkToIk', {'limbs' : numLimbs}, benchIkFk('fkToIk', numLimbs)))
+    cases.append(('rematchIkToFk', {'limbs' : 4}, benchRematch('ikToFk', 4)))
+    cases.append(('rematchFkToIk', {'limbs' : 4}, benchRematch('fkToIk', 4)))
+    for numFrames in frames:
+        cases.append(('bakeIkToFk', {'limbs' : 4, 'frames' : numFrames}, benchIkFk('ikToFk', 4, numFrames)))
+        cases.append(('bakeFkToIk', {'limbs' : 4, 'frames' : numFrames}, benchIkFk('fkToIk', 4, numFrames)))
+        cases.append(('reducedBakeIkToFk', {'limbs' : 4, 'frames' : numFrames}, benchIkFk('ikToFk', 4, numFrames, True)))
+        cases.append(('verifyMatch', {'limbs' : 4, 'frames' : numFrames}, benchVerify(4, numFrames)))
+    for numTargets in targets:
+        cases.append(('capturePose', {'targets' : numTargets}, benchCapture(numTargets)))
+        cases.append(('positionPose', {'targets' : numTargets}, benchPosition(numTargets)))
+        cases.append(('resnapPose', {'targets' : numTargets, 'moved' : numTargets//10}, benchResnap(numTargets, numTargets//10)))
+    for numRigs in rigs:
+        cases.append(('crowdPositionPose', {'rigs' : numRigs}, benchCrowd(numRigs)))
+    cases.append(('spaceSwitch', {'rigs' : 4}, benchSpaceSwitch(4)))
+    for numFrames in frames:
+        cases.append(('positionAnimation', {'targets' : 20, 'frames' : numFrames}, benchPositionAnimation(20, numFrames)))
+        cases.append(('followPivot', {'targets' : 20, 'frames' : numFrames}, benchFollowPivot(20, numFrames)))
+        cases.append(('reducedFollowPivot', {'targets' : 20, 'frames' : numFrames}, benchFollowPivot(20, numFrames, True)))
+        cases.append(('bakeSpaceSwitch', {'rigs' : 4, 'frames' : numFrames}, benchSpaceSwitch(4, numFrames)))
+
+    results = []
+    for name, params, setup in cases:
+        result = runCase(name, params, setup, repeats)
+        results.append(result)
+        counters = result['counters']
+        print('%-45s %10.4fs  nodes %6d  dgWrites %7d  keys %8d  reads %8d' %(_caseKey(result), result['seconds'], counters['nodeCreates'],
+                                                                           counters['dgWrites'], counters['keyWrites'], counters['attrReads']))
+    return results
+
+def compareResults(baseline, results, timeTolerance=1.25):
+    '''
+        Compares results against a saved baseline. Returns the list of regression messages.
+        A case regresses if it's slower than the baseline by more than timeTolerance or any of its counts went up.
+    '''
+    baseCases = dict((_caseKey(result), result) for result in baseline['results'])
+    regressions = []
+    for result in results:
+        key = _caseKey(result)
+        base = baseCases.get(key)
+        if base is None:
+            print('%-45s new case' %(key))
+            continue
+        ratio = result['seconds']/base['seconds'] if base['seconds'] else 1.0
+        line = '%-45s time x%.2f' %(key, ratio)
+        if ratio > timeTolerance:
+            regressions.append('%s is %.2f times slower' %(key, ratio))
+        for counter in sorted(result['counters']):
+            diff = result['counters'][counter] - base['counters'].get(counter, 0)
+            if diff:
+                line += '  %s %+d' %(counter, diff)
+            if diff > 0:
+                regressions.append('%s %s went up by %d' %(key, counter, diff))
+        print(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks ikFkMatching and GlobalPositioning without Maya.')
+    parser.add_argument('--save', help='write the results to this baseline file')
+    parser.add_argument('--compare', help='compare the results against this baseline file')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per case, the best time is kept')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='allowed slowdown against the baseline')
+    parser.add_argument('--quick', action='store_true', help='only run the smaller sizes of each sweep')
+    args = parser.parse_args()
+
+    results = runSweep(args.repeats, args.quick)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python' : sys.version.split()[0], 'results' : results}, f, indent=1, sort_keys=True)
+        print('Saved baseline to %s' %(args.save))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compareResults(baseline, results, args.tolerance)
+        for message in regressions:
+            print('REGRESSION: %s' %(message))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1155 @@
+'''
+    MODULE: sceneStandIn
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.8
+
+    USAGE: Lightweight in-memory stand-in for the parts of maya.cmds and the Maya API the animation tools call,
+           so they can be exercised and benchmarked without Maya. install() must run before the tools are imported,
+           it also makes a StandInBackend the tools' sceneBackend.
+               scene = install()
+               buildAvatarahRig(scene, 'Astrea01:', 'Astrea')
+               import ikFkMatching
+
+    List of functions:
+        install()
+        buildAvatarahRig(scene, namespace, rig)
+        buildTargets(scene, count, namespace)
+        buildSpaces(scene, namespace, rig)
+    List of classes:
+        StandInBackend, sceneBackend implementation on the stand-in scene
+    List of methods from class StandInScene:
+        __init__()
+        reset()
+        resetCounters()
+        createNode(name, nodeType, parent)
+        getNode(name)
+        deleteNode(name)
+        setParent(name, parent)
+        setSpaces(name, attr, parents, enumNames)
+        parentOf(node, time)
+        notifyDirty(name)
+        recordUndo(entry)
+        undo()
+        setTime(frame)
+        evalChannel(node, channel, time)
+        localMatrix(node, time)
+        worldMatrix(node, time)
+        save(path)
+        load(path)
+
+    NOTES: Transforms are evaluated as RP^-1 * rotateAxis * rotate * jointOrient * RP * rotatePivotTranslate * translate,
+           scale is always one. Constraints snap once when they are built and are not evaluated afterwards.
+           Animation curves interpolate linearly, key tangent types and angles are kept but don't change the evaluation.
+           A node with spaces is evaluated under the parent its space enum picks, like a space switch's constraint, None is the world.
+           Dirty, timeChanged and scene callbacks are called like Maya's, a write calls the dirty callbacks of the node and its descendants.
+           save and load keep a scene as JSON, for exported animation data run through batchProcessor.
+           Only anim curve edits are undoable, cutKey and the commands registered by plugins like apiUndo go on undoQueue,
+           grouped by undoInfo chunks, and cmds.undo() undoes the last chunk.
+           counters tracks nodeCreates, nodeDeletes, constraintBuilds, attrReads, attrWrites and keyWrites.
+
+'''
+
+import json
+import math
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import matrixMath
+
+#attribute names the tools use, mapped to the stand-in's channels
+attrAliases = {'t' : 'translate', 'r' : 'rotate', 's' : 'scale', 'v' : 'visibility', 'rp' : 'rotatePivot', 'ro' : 'rotateOrder'}
+vectorAttrs = ['translate', 'rotate', 'scale', 'rotatePivot', 'rotatePivotTranslate', 'rotateAxis', 'jointOrient']
+angularAttrs = ['rotate', 'rotateAxis', 'jointOrient']
+
+#callback id -> (kind, function), and kind -> the functions to call, dirty callbacks are kept per node as ('dirty', name)
+_callbacks = {}
+_callbackFuncs = {}
+
+def _addCallback(kind, func):
+    callbackId = len(_callbacks) + 1
+    while callbackId in _callbacks:
+        callbackId += 1
+    _callbacks[callbackId] = (kind, func)
+    funcs = _callbackFuncs.setdefault(kind, [])
+    if func not in funcs:
+        funcs.append(func)
+    return callbackId
+
+def _removeCallback(callbackId):
+    kind, func = _callbacks.pop(callbackId, (None, None))
+    if kind and (kind, func) not in _callbacks.values():
+        _callbackFuncs[kind].remove(func)
+
+def _callCallbacks(kind):
+    for func in list(_callbackFuncs.get(kind, ())):
+        func()
+
+class StandInNode:
+
+    def __init__(self, name, nodeType='transform', parent=None):
+        self.name = name
+        self.nodeType = nodeType
+        self.parent = parent
+        self.values = {'translate' : [0.0, 0.0, 0.0],
+                       'rotate' : [0.0, 0.0, 0.0],
+                       'scale' : [1.0, 1.0, 1.0],
+                       'rotatePivot' : [0.0, 0.0, 0.0],
+                       'rotatePivotTranslate' : [0.0, 0.0, 0.0],
+                       'rotateAxis' : [0.0, 0.0, 0.0],
+                       'jointOrient' : [0.0, 0.0, 0.0],
+                       'rotateOrder' : 0,
+                       'visibility' : 1}
+        self.locked = set()
+        self.curves = {}
+        self.overrides = {}
+        self.spaces = None
+        self.enums = {}
+
+class StandInScene:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        '''
+            Empties the scene and the counters.
+        '''
+        self.nodes = {}
+        self.children = {}
+        self.dependents = {}
+        self.selection = []
+        self.currentTime = 1.0
+        self.playbackRange = [1.0, 24.0]
+        self.undoQueue = []
+        self.openChunks = 0
+        self.resetCounters()
+        _callCallbacks('scene')
+
+    def resetCounters(self):
+        self.counters = dict((key, 0) for key in ['nodeCreates', 'nodeDeletes', 'constraintBuilds', 'attrReads', 'attrWrites', 'keyWrites'])
+
+    def createNode(self, name, nodeType='transform', parent=None):
+        name = str(name)
+        if name in self.nodes:
+            index = 1
+            while '%s%d' %(name, index) in self.nodes:
+                index += 1
+            name = '%s%d' %(name, index)
+        self.nodes[name] = StandInNode(name, nodeType, str(parent) if parent else None)
+        self.children.setdefault(self.nodes[name].parent, []).append(name)
+        self.counters['nodeCreates'] += 1
+        return name
+
+    def getNode(self, name):
+        name = str(name).split('|')[-1]
+        if name not in self.nodes:
+            raise ValueError('No object matches name: %s' %(name))
+        return self.nodes[name]
+
+    def deleteNode(self, name):
+        name = str(name)
+        for child in list(self.children.get(name, [])):
+            self.deleteNode(child)
+        self.notifyDirty(name)
+        self.setParent(name, None)
+        self.children.pop(name, None)
+        del self.nodes[name]
+        self.counters['nodeDeletes'] += 1
+
+    def setParent(self, name, parent):
+        '''
+            Moves the node under parent, None for the world.
+        '''
+        node = self.getNode(name)
+        siblings = self.children.get(node.parent, [])
+        if node.name in siblings:
+            siblings.remove(node.name)
+        node.parent = str(parent) if parent else None
+        if parent:
+            self.children.setdefault(node.parent, []).append(node.name)
+
+    def setSpaces(self, name, attr, parents, enumNames):
+        '''
+            Makes the node's parent follow its attr enum, parents and enumNames are listed by enum index.
+        '''
+        node = self.getNode(name)
+        node.spaces = (attr, [str(parent) if parent else None for parent in parents])
+        node.enums[attr] = dict(enumerate(enumNames))
+        node.values.setdefault(attr, 0)
+        for parent in node.spaces[1]:
+            if parent:
+                self.dependents.setdefault(parent, []).append(node.name)
+
+    def parentOf(self, node, time=None):
+        '''
+            Returns the name of the node's parent on time, the space it's switched to if it has spaces.
+        '''
+        if not node.spaces:
+            return node.parent
+        attr, parents = node.spaces
+        index = int(round(self.evalChannel(node, attr, time)))
+        return parents[min(max(index, 0), len(parents) - 1)]
+
+    def notifyDirty(self, name):
+        '''
+            Calls the dirty callbacks of the node and everything below it, like Maya's dirty propagation.
+        '''
+        if not _callbacks:
+            return
+        names = [str(name).split('|')[-1]]
+        for name in names:
+            _callCallbacks(('dirty', name))
+            names.extend(self.children.get(name, ()))
+            names.extend(self.dependents.get(name, ()))
+
+    def recordUndo(self, entry):
+        '''
+            Adds an entry with undoIt and redoIt to the undo queue, as part of the open undo chunk if there is one.
+        '''
+        if self.openChunks:
+            self.undoQueue[-1].append(entry)
+        else:
+            self.undoQueue.append([entry])
+
+    def undo(self):
+        '''
+            Undoes the last chunk of the undo queue.
+        '''
+        if self.undoQueue:
+            for entry in reversed(self.undoQueue.pop()):
+                entry.undoIt()
+
+    def setTime(self, frame):
+        self.currentTime = float(frame)
+        for node in self.nodes.values():
+            node.overrides = {}
+        _callCallbacks('timeChanged')
+
+    def evalChannel(self, node, channel, time=None):
+        '''
+            Returns the value of a scalar channel, ex: 'rotateX', in ui units.
+        '''
+        if time is None or time == self.currentTime:
+            if channel in node.overrides:
+                return node.overrides[channel]
+        if time is None:
+            time = self.currentTime
+        curve = node.curves.get(channel)
+        if curve and curve.keys:
+            value = curve.evaluate(time)
+        else:
+            attr, axis = channel[:-1], 'XYZ'.index(channel[-1]) if channel[-1] in 'XYZ' else None
+            value = node.values[attr][axis] if axis is not None else node.values[channel]
+        return value
+
+    def evalVector(self, node, attr, time=None):
+        if attr in ['translate', 'rotate', 'scale']:
+            return [self.evalChannel(node, attr+axis, time) for axis in 'XYZ']
+        return list(node.values[attr])
+
+    def localMatrix(self, node, time=None):
+        rp = matrixMath.setTranslation(matrixMath.identityMatrix(), node.values['rotatePivot'])
+        local = matrixMath.inverseMatrix(rp)
+        local = matrixMath.multMatrix(local, matrixMath.eulerToMatrix(node.values['rotateAxis']))
+        local = matrixMath.multMatrix(local, matrixMath.eulerToMatrix(self.evalVector(node, 'rotate', time), node.values['rotateOrder']))
+        local = matrixMath.multMatrix(local, matrixMath.eulerToMatrix(node.values['jointOrient']))
+        local = matrixMath.multMatrix(local, rp)
+        offset = matrixMath.addVector(node.values['rotatePivotTranslate'], self.evalVector(node, 'translate', time))
+        return matrixMath.multMatrix(local, matrixMath.setTranslation(matrixMath.identityMatrix(), offset))
+
+    def worldMatrix(self, node, time=None):
+        matrix = self.localMatrix(node, time)
+        parent = self.parentOf(node, time)
+        while parent:
+            node = self.nodes[parent]
+            matrix = matrixMath.multMatrix(matrix, self.localMatrix(node, time))
+            parent = self.parentOf(node, time)
+        return matrix
+
+    def parentMatrix(self, node, time=None):
+        parent = self.parentOf(node, time)
+        if parent:
+            return self.worldMatrix(self.nodes[parent], time)
+        return matrixMath.identityMatrix()
+
+    def save(self, path):
+        '''
+            Writes the scene's nodes, animation curves and time settings to path as JSON.
+        '''
+        nodes = {}
+        for name, node in self.nodes.items():
+            nodes[name] = {'nodeType' : node.nodeType,
+                           'parent' : node.parent,
+                           'values' : node.values,
+                           'locked' : sorted(node.locked),
+                           'spaces' : node.spaces,
+                           'enums' : node.enums,
+                           'curves' : dict((channel, {'angular' : curve.angular, 'keys' : sorted(curve.keys.items())})
+                                           for channel, curve in node.curves.items())}
+        with open(path, 'w') as f:
+            json.dump({'currentTime' : self.currentTime, 'playbackRange' : self.playbackRange, 'nodes' : nodes}, f, indent=1, sort_keys=True)
+        return path
+
+    def load(self, path):
+        '''
+            Replaces the scene with one written by save.
+        '''
+        with open(path) as f:
+            data = json.load(f)
+        self.reset()
+        self.currentTime = float(data['currentTime'])
+        self.playbackRange = [float(frame) for frame in data['playbackRange']]
+        for name, nodeData in data['nodes'].items():
+            node = StandInNode(str(name), str(nodeData['nodeType']), str(nodeData['parent']) if nodeData['parent'] else None)
+            node.values.update(dict((str(attr), value) for attr, value in nodeData['values'].items()))
+            node.locked = set(str(plug) for plug in nodeData['locked'])
+            if nodeData.get('spaces'):
+                attr, parents = nodeData['spaces']
+                node.spaces = (str(attr), [str(parent) if parent else None for parent in parents])
+            node.enums = dict((str(attr), dict((int(index), str(name)) for index, name in enums.items()))
+                              for attr, enums in nodeData.get('enums', {}).items())
+            for channel, curveData in nodeData['curves'].items():
+                curve = StandInCurve('%s_%s' %(name, channel), curveData['angular'], node.name, str(channel))
+                curve.keys = dict((float(time), value) for time, value in curveData['keys'])
+                node.curves[str(channel)] = curve
+            self.nodes[node.name] = node
+        for node in self.nodes.values():
+            if node.parent:
+                self.children.setdefault(node.parent, []).append(node.name)
+            for parent in (node.spaces or (None, []))[1]:
+                if parent:
+                    self.dependents.setdefault(parent, []).append(node.name)
+        _callCallbacks('scene')
+        return self
+
+class StandInCurve:
+
+    def __init__(self, name, angular, drivenNode=None, drivenAttr=None):
+        self.nodeName = name
+        self.angular = angular
+        self.drivenNode = drivenNode
+        self.drivenAttr = drivenAttr
+        #keys are stored in internal units, radians and centimeters, like anim curves
+        self.keys = {}
+        #time -> [inType, outType, inAngle, outAngle], angles in radians, keys without an entry have global tangents
+        self.tangents = {}
+
+    def tangent(self, time):
+        return self.tangents.get(time) or [MFnAnimCurve.kTangentGlobal, MFnAnimCurve.kTangentGlobal, 0.0, 0.0]
+
+    def evaluate(self, time):
+        times = sorted(self.keys)
+        if time <= times[0]:
+            value = self.keys[times[0]]
+        elif time >= times[-1]:
+            value = self.keys[times[-1]]
+        else:
+            for before, after in zip(times, times[1:]):
+                if before <= time <= after:
+                    weight = (time - before)/(after - before)
+                    value = self.keys[before]*(1.0 - weight) + self.keys[after]*weight
+                    break
+        return math.degrees(value) if self.angular else value
+
+scene = StandInScene()
+
+def _splitPlug(plug):
+    node, attr = str(plug).split('.', 1)
+    attr = attr.replace('[0]', '')
+    return scene.getNode(node), attrAliases.get(attr, attr)
+
+def _flatten(values):
+    flat = []
+    for val in values:
+        if isinstance(val, (list, tuple)):
+            flat.extend(_flatten(val))
+        else:
+            flat.append(val)
+    return flat
+
+#maya.cmds stand-ins
+
+def cmdsGetAttr(plug, time=None, settable=False, asVector=False):
+    node, attr = _splitPlug(plug)
+    scene.counters['attrReads'] += 1
+    if settable:
+        return attr not in node.locked and attr[:-1] not in node.locked
+    if attr == 'worldMatrix':
+        return scene.worldMatrix(node, time)
+    if attr == 'parentInverseMatrix':
+        return matrixMath.inverseMatrix(scene.parentMatrix(node, time))
+    if attr == 'parentMatrix':
+        return scene.parentMatrix(node, time)
+    if attr in vectorAttrs:
+        value = scene.evalVector(node, attr, time)
+        return value if asVector else [tuple(value)]
+    if attr in node.values:
+        return node.values[attr]
+    return scene.evalChannel(node, attr, time)
+
+def pmGetAttr(plug, time=None, settable=False, asString=False):
+    return cmdsGetAttr(plug, time, settable, asVector=True)
+
+def setAttr(plug, *values, **kwargs):
+    node, attr = _splitPlug(plug)
+    values = _flatten(values)
+    scene.counters['attrWrites'] += 1
+    scene.notifyDirty(node.name)
+    if attr in ['translate', 'rotate', 'scale']:
+        for axis, val in zip('XYZ', values):
+            _setChannel(node, attr+axis, val)
+    elif attr in vectorAttrs:
+        node.values[attr] = [float(val) for val in values]
+    elif attr[:-1] in ['translate', 'rotate', 'scale']:
+        _setChannel(node, attr, values[0])
+    else:
+        node.values[attr] = values[0]
+
+def _setChannel(node, channel, value):
+    if channel in node.curves and node.curves[channel].keys:
+        node.overrides[channel] = float(value)
+    else:
+        node.values[channel[:-1]]['XYZ'.index(channel[-1])] = float(value)
+
+def xform(obj, q=False, ws=False, a=False, matrix=None, m=None, rotatePivot=None, rp=None, rotation=None, ro=None, translation=None, t=None, **kwargs):
+    node = scene.getNode(obj)
+    matrix = matrix if matrix is not None else m
+    rotatePivot = rotatePivot if rotatePivot is not None else rp
+    rotation = rotation if rotation is not None else ro
+    translation = translation if translation is not None else t
+    if q:
+        scene.counters['attrReads'] += 1
+        if matrix:
+            return scene.worldMatrix(node) if ws else scene.localMatrix(node)
+        if rotatePivot:
+            if ws:
+                return matrixMath.getTranslation(matrixMath.multMatrix(matrixMath.setTranslation(matrixMath.identityMatrix(), node.values['rotatePivot']),
+                                                                       scene.worldMatrix(node)))
+            return list(node.values['rotatePivot'])
+        if rotation:
+            return scene.evalVector(node, 'rotate')
+        if translation:
+            return scene.evalVector(node, 'translate')
+        return None
+    if rotation is not None:
+        setAttr(node.name+'.rotate', rotation)
+    if translation is not None:
+        setAttr(node.name+'.translate', translation)
+
+def objectType(obj, isAType=None, **kwargs):
+    node = scene.getNode(obj)
+    if isAType:
+        return node.nodeType == isAType
+    return node.nodeType
+
+def objExists(obj):
+    return str(obj).split('|')[-1] in scene.nodes
+
+def delete(*objs, **kwargs):
+    for obj in _flatten(objs):
+        if objExists(obj):
+            scene.deleteNode(str(obj))
+
+def spaceLocator(n='locator', **kwargs):
+    return PyNode(scene.createNode(n, 'locator'))
+
+def group(em=True, n='group', **kwargs):
+    return PyNode(scene.createNode(n, 'transform'))
+
+def parent(*objs, **kwargs):
+    objs = _flatten(objs)
+    for obj in objs[:-1]:
+        scene.setParent(obj, objs[-1])
+        scene.counters['attrWrites'] += 1
+        scene.notifyDirty(obj)
+
+def _constraint(constraintType, mode):
+    def constraint(driver, driven, mo=False, **kwargs):
+        import matrixSnap
+        scene.counters['constraintBuilds'] += 1
+        name = scene.createNode('%s_%s' %(driven, constraintType), constraintType)
+        if not mo:
+            matrixSnap.snap(driver, driven, mode)
+        return PyNode(name)
+    return constraint
+
+parentConstraint = _constraint('parentConstraint', 'parent')
+pointConstraint = _constraint('pointConstraint', 'point')
+orientConstraint = _constraint('orientConstraint', 'orient')
+
+def keyframe(obj, attribute=None, q=False, timeChange=False, **kwargs):
+    node = scene.getNode(obj)
+    times = set()
+    for attr in attribute or node.curves:
+        curve = node.curves.get(attr)
+        if curve:
+            times.update(curve.keys)
+    return sorted(times)
+
+def cutKey(obj, attribute=None, time=None, clear=True, **kwargs):
+    node = scene.getNode(obj)
+    curve = node.curves.get(attribute)
+    if curve:
+        modifier = MDGModifier()
+        change = MAnimCurveChange()
+        change.record(curve)
+        if time is None:
+            #cutting every key deletes the curve
+            modifier.deleteNode(curve)
+            modifier.doIt()
+        for frame in [frame for frame in curve.keys if time is None or time[0] <= frame <= time[1]]:
+            del curve.keys[frame]
+            curve.tangents.pop(frame, None)
+        scene.notifyDirty(node.name)
+        scene.recordUndo(_ApiEdit(modifier, change))
+
+def playbackOptions(q=True, min=False, max=False, **kwargs):
+    return scene.playbackRange[0] if min else scene.playbackRange[1]
+
+def currentTime(frame=None, q=False, **kwargs):
+    if q or frame is None:
+        return scene.currentTime
+    scene.setTime(frame)
+
+def select(*objs, **kwargs):
+    if kwargs.get('cl') or kwargs.get('clear'):
+        scene.selection = []
+    else:
+        scene.selection = [PyNode(obj) for obj in _flatten(objs)]
+
+def selected(**kwargs):
+    return list(scene.selection)
+
+def warning(message):
+    pass
+
+#pymel stand-ins
+
+class PyNode(object):
+
+    def __init__(self, name):
+        name = str(name).split('|')[-1]
+        if name not in scene.nodes:
+            raise ValueError('No object matches name: %s' %(name))
+        self._name = name
+
+    def __str__(self):
+        return self._name
+
+    def __repr__(self):
+        return 'PyNode(%r)' %(self._name)
+
+    def __add__(self, other):
+        return self._name + str(other)
+
+    def __radd__(self, other):
+        return str(other) + self._name
+
+    def __eq__(self, other):
+        return str(other) == self._name
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._name)
+
+    def name(self):
+        return self._name
+
+    def namespace(self):
+        return self._name.rpartition(':')[0] + (':' if ':' in self._name else '')
+
+    def fullPath(self):
+        path = ''
+        nodeName = self._name
+        while nodeName:
+            path = '|' + nodeName + path
+            nodeName = scene.getNode(nodeName).parent
+        return path
+
+    def getParent(self):
+        parentName = scene.getNode(self._name).parent
+        return PyNode(parentName) if parentName else None
+
+    def getAttr(self, attr, **kwargs):
+        return pmGetAttr(self._name+'.'+attr, **kwargs)
+
+    def setScale(self, scale):
+        setAttr(self._name+'.scale', scale)
+
+class StandInBackend:
+    '''
+        sceneBackend implementation on the stand-in scene.
+    '''
+
+    def node(self, name):
+        return PyNode(name).name()
+
+    def exists(self, node):
+        return bool(node) and objExists(node)
+
+    def existing(self, nodes):
+        return [str(node) for node in nodes if objExists(node)]
+
+    def namespaces(self):
+        namespaces = set()
+        for name in scene.nodes:
+            parts = name.split(':')[:-1]
+            for i in range(len(parts)):
+                namespaces.add(':'.join(parts[:i+1]) + ':')
+        return sorted(namespaces)
+
+    def enumNames(self, node, attr):
+        return scene.getNode(node).enums.get(attr)
+
+    def selection(self):
+        return [str(node) for node in scene.selection]
+
+    def parent(self, node):
+        return scene.getNode(node).parent
+
+    def fullPath(self, node):
+        return PyNode(node).fullPath()
+
+    def isJoint(self, node):
+        return objectType(node, isAType='joint')
+
+    def __init__(self):
+        import matrixCache
+        self.cache = matrixCache.getCache()
+
+    def worldMatrix(self, node):
+        return self.cache.get('worldMatrix', node, None, self.readWorldMatrix)
+
+    def parentInverseMatrix(self, node):
+        return self.cache.get('parentInverseMatrix', node, None, self.readParentInverseMatrix)
+
+    def worldRotatePivot(self, node):
+        return self.cache.get('worldRotatePivot', node, None, self.readWorldRotatePivot)
+
+    def readWorldMatrix(self, node):
+        return xform(node, q=True, ws=True, matrix=True)
+
+    def readParentInverseMatrix(self, node):
+        return cmdsGetAttr(str(node)+'.parentInverseMatrix')
+
+    def readWorldRotatePivot(self, node):
+        return xform(node, q=True, ws=True, rotatePivot=True)
+
+    def rotation(self, node):
+        return xform(node, q=True, rotation=True)
+
+    def getAttr(self, plug, **kwargs):
+        return cmdsGetAttr(plug, **kwargs)
+
+    def isSettable(self, plug):
+        return cmdsGetAttr(plug, settable=True)
+
+    def setAttr(self, plug, *values):
+        setAttr(plug, *values)
+
+    def createLocator(self, name, scale=(1, 1, 1)):
+        locator = scene.createNode(name, 'locator')
+        setAttr(locator+'.scale', *scale)
+        return locator
+
+    def delete(self, node):
+        delete(node)
+
+def _noOp(*args, **kwargs):
+    return args[0] if args else ''
+
+class Callback:
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self, *args):
+        return self.func(*self.args, **self.kwargs)
+
+class MVector:
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+def checkBox(*args, **kwargs):
+    if kwargs.get('q') or kwargs.get('query'):
+        return False
+    return args[0] if args else 'checkBox'
+
+def undoInfo(openChunk=False, closeChunk=False, **kwargs):
+    if openChunk:
+        if not scene.openChunks:
+            scene.undoQueue.append([])
+        scene.openChunks += 1
+    elif closeChunk:
+        scene.openChunks -= 1
+
+def undo(**kwargs):
+    scene.undo()
+
+def pluginInfo(name, q=True, loaded=False, **kwargs):
+    return name in _plugins
+
+def loadPlugin(path, quiet=False, **kwargs):
+    '''
+        Imports a plugin module from path and registers its commands on maya.cmds.
+    '''
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name not in _plugins:
+        module = __import__(name)
+        module.initializePlugin(name)
+        _plugins.append(name)
+    return [name]
+
+_plugins = []
+
+def internalVar(userAppDir=False, **kwargs):
+    import tempfile
+    return tempfile.gettempdir()
+
+uiCommands = ['window', 'deleteUI', 'formLayout', 'text', 'button', 'showWindow', 'frameLayout', 'optionMenu', 'menuItem',
+              'textScrollList', 'rowLayout', 'textField', 'confirmDialog', 'cycleCheck', 'scriptJob', 'refresh',
+              'progressWindow', 'progressBar', 'intField', 'floatField', 'columnLayout', 'separator', 'evalDeferred']
+
+#maya.api stand-ins
+
+class MTime:
+    uiUnitValue = 'film'
+
+    def __init__(self, value=0.0, unit=None):
+        self.value = float(value)
+
+    @staticmethod
+    def uiUnit():
+        return MTime.uiUnitValue
+
+class MAngle:
+    kDegrees = 'degrees'
+    kRadians = 'radians'
+
+    def __init__(self, value, unit=None):
+        self.value = value
+        self.unit = unit
+
+    def asRadians(self):
+        return math.radians(self.value) if self.unit == MAngle.kDegrees else self.value
+
+    @staticmethod
+    def uiUnit():
+        return MAngle.kDegrees
+
+class MDistance:
+
+    def __init__(self, value, unit=None):
+        self.value = value
+
+    def asCentimeters(self):
+        return self.value
+
+    @staticmethod
+    def uiUnit():
+        return 'centimeters'
+
+class MPlug:
+
+    def __init__(self, node, attr):
+        self.node = node
+        self.attr = attr
+
+class MSelectionList:
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        self.items.append(name)
+
+    def getPlug(self, index):
+        node, attr = _splitPlug(self.items[index])
+        return MPlug(node, attr)
+
+    def getDependNode(self, index):
+        return scene.getNode(self.items[index])
+
+class MPxCommand(object):
+
+    def __init__(self):
+        pass
+
+class MFnPlugin:
+
+    def __init__(self, plugin, *args):
+        self.plugin = plugin
+
+    def registerCommand(self, name, creator):
+        def command(*args):
+            instance = creator()
+            instance.doIt(args)
+            if instance.isUndoable():
+                scene.recordUndo(instance)
+        setattr(sys.modules['maya.cmds'], name, command)
+
+    def deregisterCommand(self, name):
+        delattr(sys.modules['maya.cmds'], name)
+
+class MDGModifier:
+
+    def __init__(self):
+        #[operation, curve, applied]
+        self.operations = []
+
+    def _attach(self, curve, attached):
+        node = scene.getNode(curve.drivenNode)
+        if attached:
+            node.curves[curve.drivenAttr] = curve
+        else:
+            node.curves.pop(curve.drivenAttr, None)
+        scene.notifyDirty(node.name)
+
+    def deleteNode(self, curve):
+        self.operations.append(['delete', curve, False])
+
+    def doIt(self):
+        for operation in self.operations:
+            if not operation[2]:
+                self._attach(operation[1], operation[0] == 'create')
+                operation[2] = True
+
+    def undoIt(self):
+        for operation in reversed(self.operations):
+            if operation[2]:
+                self._attach(operation[1], operation[0] != 'create')
+                operation[2] = False
+
+class MAnimCurveChange:
+
+    def __init__(self):
+        #(curve, keys, tangents) before the first edit of each curve
+        self.before = []
+        self.after = []
+
+    def record(self, curve):
+        if not [edited for edited, keys, tangents in self.before if edited is curve]:
+            self.before.append((curve, dict(curve.keys), dict(curve.tangents)))
+
+    def _setKeys(self, states):
+        for curve, keys, tangents in states:
+            curve.keys = dict(keys)
+            curve.tangents = dict(tangents)
+            scene.notifyDirty(curve.drivenNode)
+
+    def undoIt(self):
+        self.after = [(curve, dict(curve.keys), dict(curve.tangents)) for curve, keys, tangents in self.before]
+        self._setKeys(self.before)
+
+    def redoIt(self):
+        self._setKeys(self.after)
+
+class _ApiEdit:
+
+    def __init__(self, modifier, change):
+        self.modifier = modifier
+        self.change = change
+
+    def undoIt(self):
+        self.change.undoIt()
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+        self.change.redoIt()
+
+class MAnimUtil:
+
+    @staticmethod
+    def findAnimation(plug):
+        curve = plug.node.curves.get(plug.attr)
+        return [curve] if curve else []
+
+class MFnAnimCurve:
+    kAnimCurveTA = 0
+    kAnimCurveTL = 1
+    kAnimCurveTU = 3
+    kAnimCurveUA = 5
+    kAnimCurveUL = 6
+    kTangentGlobal = 0
+    kTangentFixed = 1
+    kTangentLinear = 2
+    kTangentFlat = 3
+    kTangentStep = 5
+    kTangentClamped = 8
+    kTangentAuto = 11
+
+    def __init__(self, curve=None):
+        self.curve = curve
+
+    def setObject(self, curve):
+        self.curve = curve
+
+    def create(self, plug, modifier=None, *args, **kwargs):
+        scene.counters['nodeCreates'] += 1
+        self.curve = StandInCurve('%s_%s' %(plug.node.name, plug.attr), plug.attr[:-1] in angularAttrs, plug.node.name, plug.attr)
+        plug.node.curves[plug.attr] = self.curve
+        if modifier is not None:
+            modifier.operations.append(['create', self.curve, True])
+        plug.node.overrides.pop(plug.attr, None)
+        scene.notifyDirty(plug.node.name)
+        return self.curve
+
+    @property
+    def animCurveType(self):
+        return MFnAnimCurve.kAnimCurveTA if self.curve.angular else MFnAnimCurve.kAnimCurveTL
+
+    def name(self):
+        return self.curve.nodeName
+
+    def _record(self, change):
+        if change is not None:
+            change.record(self.curve)
+
+    def addKeys(self, times, values, tangentInType=0, tangentOutType=0, keepExistingKeys=False, change=None):
+        self._record(change)
+        scene.counters['keyWrites'] += len(values)
+        scene.counters['attrWrites'] += 1
+        for time, val in zip(times, values):
+            self.curve.keys[time.value] = val
+            self.curve.tangents[time.value] = [tangentInType, tangentOutType, 0.0, 0.0]
+        scene.notifyDirty(self.curve.drivenNode)
+
+    def addKey(self, time, value, tangentInType=0, tangentOutType=0, change=None):
+        self._record(change)
+        scene.counters['keyWrites'] += 1
+        self.curve.keys[time.value] = value
+        self.curve.tangents[time.value] = [tangentInType, tangentOutType, 0.0, 0.0]
+        scene.notifyDirty(self.curve.drivenNode)
+
+    def find(self, time):
+        times = sorted(self.curve.keys)
+        return times.index(time.value) if time.value in self.curve.keys else None
+
+    def setValue(self, index, value, change=None):
+        self._record(change)
+        scene.counters['keyWrites'] += 1
+        self.curve.keys[sorted(self.curve.keys)[index]] = value
+        scene.notifyDirty(self.curve.drivenNode)
+
+    @property
+    def numKeys(self):
+        return len(self.curve.keys)
+
+    def input(self, index):
+        return MTime(sorted(self.curve.keys)[index])
+
+    def value(self, index):
+        return self.curve.keys[sorted(self.curve.keys)[index]]
+
+    def remove(self, index, change=None):
+        self._record(change)
+        scene.counters['keyWrites'] += 1
+        time = sorted(self.curve.keys)[index]
+        del self.curve.keys[time]
+        self.curve.tangents.pop(time, None)
+        scene.notifyDirty(self.curve.drivenNode)
+
+    @property
+    def isWeighted(self):
+        return False
+
+    def inTangentType(self, index):
+        return self.curve.tangent(sorted(self.curve.keys)[index])[0]
+
+    def outTangentType(self, index):
+        return self.curve.tangent(sorted(self.curve.keys)[index])[1]
+
+    def _setTangent(self, index, slot, value, change):
+        self._record(change)
+        time = sorted(self.curve.keys)[index]
+        self.curve.tangents[time] = self.curve.tangent(time)[:]
+        self.curve.tangents[time][slot] = value
+
+    def setInTangentType(self, index, tangentType, change=None):
+        self._setTangent(index, 0, tangentType, change)
+
+    def setOutTangentType(self, index, tangentType, change=None):
+        self._setTangent(index, 1, tangentType, change)
+
+    def getTangentAngleWeight(self, index, isInTangent):
+        return MAngle(self.curve.tangent(sorted(self.curve.keys)[index])[2 if isInTangent else 3], MAngle.kRadians), 1.0
+
+    def setAngle(self, index, angle, isInTangent, change=None):
+        #like Maya, setting an angle makes the tangent fixed
+        self._setTangent(index, 2 if isInTangent else 3, angle.asRadians(), change)
+        self._setTangent(index, 0 if isInTangent else 1, MFnAnimCurve.kTangentFixed, change)
+
+    def setWeight(self, index, weight, isInTangent, change=None):
+        self._record(change)
+
+class _Callbacks:
+
+    @staticmethod
+    def addNameChangedCallback(*args):
+        return 0
+
+    @staticmethod
+    def addNodeRemovedCallback(*args):
+        return 0
+
+    @staticmethod
+    def addNodeDirtyPlugCallback(node, func, *args):
+        return _addCallback(('dirty', node.name), func)
+
+    @staticmethod
+    def addEventCallback(event, func, *args):
+        return _addCallback(event, func)
+
+    @staticmethod
+    def addCallback(message, func, *args):
+        return _addCallback('scene', func)
+
+    @staticmethod
+    def removeCallbacks(ids):
+        for callbackId in ids:
+            _removeCallback(callbackId)
+
+    @staticmethod
+    def removeCallback(callbackId):
+        _removeCallback(callbackId)
+
+    kAfterOpen = 0
+    kAfterNew = 1
+    kAfterLoadReference = 2
+    kAfterUnloadReference = 3
+    kAfterCreateReference = 4
+    kAfterRemoveReference = 5
+
+def _module(name, attrs):
+    module = types.ModuleType(name)
+    for key, val in attrs.items():
+        setattr(module, key, val)
+    sys.modules[name] = module
+    return module
+
+def install():
+    '''
+        Puts the stand-in pymel and maya modules in sys.modules and returns the scene.
+    '''
+    cmdsFuncs = {'getAttr' : cmdsGetAttr, 'setAttr' : setAttr, 'xform' : xform, 'objectType' : objectType, 'objExists' : objExists,
+                 'delete' : delete, 'spaceLocator' : spaceLocator, 'group' : group, 'parent' : parent, 'keyframe' : keyframe,
+                 'cutKey' : cutKey, 'playbackOptions' : playbackOptions, 'currentTime' : currentTime, 'select' : select,
+                 'warning' : warning, 'parentConstraint' : parentConstraint, 'pointConstraint' : pointConstraint,
+                 'orientConstraint' : orientConstraint, 'checkBox' : checkBox, 'internalVar' : internalVar, 'undoInfo' : undoInfo,
+                 'undo' : undo, 'pluginInfo' : pluginInfo, 'loadPlugin' : loadPlugin}
+    for cmd in uiCommands:
+        cmdsFuncs[cmd] = _noOp
+    pymelFuncs = dict(cmdsFuncs)
+    pymelFuncs.update({'getAttr' : pmGetAttr, 'PyNode' : PyNode, 'selected' : selected, 'Callback' : Callback,
+                       'checkBox' : checkBox})
+    pymelFuncs['__all__'] = sorted(key for key in pymelFuncs if not key.startswith('_'))
+    messages = {'MNodeMessage' : _Callbacks, 'MDGMessage' : _Callbacks, 'MSceneMessage' : _Callbacks, 'MMessage' : _Callbacks,
+                'MEventMessage' : _Callbacks, 'MObject' : object}
+    om2Attrs = {'MTime' : MTime, 'MTimeArray' : list, 'MDoubleArray' : list, 'MAngle' : MAngle, 'MDistance' : MDistance,
+                'MSelectionList' : MSelectionList, 'MDGModifier' : MDGModifier, 'MPxCommand' : MPxCommand, 'MFnPlugin' : MFnPlugin}
+    om2Attrs.update(messages)
+
+    maya = _module('maya', {})
+    maya.cmds = _module('maya.cmds', cmdsFuncs)
+    maya.OpenMaya = _module('maya.OpenMaya', {'MVector' : MVector})
+    maya.api = _module('maya.api', {})
+    maya.api.OpenMaya = _module('maya.api.OpenMaya', om2Attrs)
+    maya.api.OpenMayaAnim = _module('maya.api.OpenMayaAnim', {'MFnAnimCurve' : MFnAnimCurve, 'MAnimUtil' : MAnimUtil,
+                                                                   'MAnimCurveChange' : MAnimCurveChange})
+    pymel = _module('pymel', {})
+    pymel.all = _module('pymel.all', pymelFuncs)
+    pymel.core = _module('pymel.core', pymelFuncs)
+    import sceneBackend
+    sceneBackend.setBackend(StandInBackend())
+    return scene
+
+def _chain(scene, names, nodeType, parentName, positions):
+    created = []
+    for name, position in zip(names, positions):
+        parentName = scene.createNode(name, nodeType, parentName)
+        scene.nodes[parentName].values['translate'] = list(position)
+        created.append(parentName)
+    return created
+
+def buildAvatarahRig(scene, namespace, rig='Astrea'):
+    '''
+        Builds the controls and joints the rig registry expects for one character, plus an ikFk switch control per limb.
+        Returns the switch control names.
+    '''
+    import rigRegistry
+    registry = rigRegistry.RigRegistry(nodeFactory=str)
+    root = scene.createNode(namespace+'COG_ctrl')
+    switches = []
+    for side in registry.sides:
+        sign = 1.0 if side == 'left' else -1.0
+        for limb in registry.limbs:
+            if limb not in registry.rigs[rig]['jnts'].get(side, {}):
+                continue
+            ctrlNames = registry.getCtrlNames(rig, side, limb)
+            jntNames = registry.rigs[rig]['jnts'][side][limb]
+            if limb == 'arm':
+                positions = [(sign*15.0, 140.0, 0.0), (sign*28.0, 0.0, -3.0), (sign*26.0, 0.0, 3.0)]
+            else:
+                positions = [(sign*10.0, 95.0, 0.0), (0.0, -45.0, 4.0), (0.0, -42.0, -4.0)]
+            _chain(scene, [namespace+name for name in jntNames['fk']], 'joint', root, positions)
+            _chain(scene, [namespace+name for name in jntNames['ik']], 'joint', root, positions)
+            fkParent = root
+            for name, position in zip(ctrlNames['fkCtl'], positions):
+                fkParent = scene.createNode(namespace+name+'_grp', 'transform', fkParent)
+                scene.nodes[fkParent].values['translate'] = list(position)
+                fkParent = scene.createNode(namespace+name, 'transform', fkParent)
+            ikGrp = scene.createNode(namespace+ctrlNames['ikCtl']+'_grp', 'transform', root)
+            scene.createNode(namespace+ctrlNames['ikCtl'], 'transform', ikGrp)
+            scene.createNode(namespace+ctrlNames['pvCtl'], 'transform', root)
+            switches.append(scene.createNode('%s%s_%s_ikfk_switch' %(namespace, side, limb), 'transform', root))
+    return switches
+
+def buildTargets(scene, count, namespace=''):
+    '''
+        Builds a pivot and count target controls spread around it, returns (pivot, targets).
+    '''
+    pivot = scene.createNode(namespace+'gpPivot')
+    targets = []
+    for i in range(count):
+        target = scene.createNode('%starget_%03d_ctrl' %(namespace, i))
+        scene.nodes[target].values['translate'] = [float(i % 10)*10.0, float(i//10)*5.0, float(i % 3)]
+        scene.nodes[target].values['rotate'] = [float(i % 7)*5.0, float(i % 11)*3.0, 0.0]
+        targets.append(target)
+    return pivot, targets
+
+def buildSpaces(scene, namespace, rig='Astrea'):
+    '''
+        Gives a rig built by buildAvatarahRig the space switches the rig registry expects: the ik controls switch between
+        their group, the world and the COG, the pole vectors between the COG, the world and their ik control,
+        and the COG between the world and a placement control. Every switch starts in its first space.
+    '''
+    import rigRegistry
+    registry = rigRegistry.RigRegistry(nodeFactory=str)
+    root = namespace+'COG_ctrl'
+    placement = scene.createNode(namespace+'placement_ctrl')
+    scene.nodes[placement].values['translate'] = [30.0, 0.0, -20.0]
+    scene.nodes[placement].values['rotate'] = [0.0, 35.0, 0.0]
+    scene.setSpaces(root, registry.spaceAttr, [None, placement], ['world', 'placement'])
+    for side in registry.sides:
+        for limb in registry.limbs:
+            if limb not in registry.rigs[rig]['jnts'].get(side, {}):
+                continue
+            ctrlNames = registry.getCtrlNames(rig, side, limb)
+            ikCtl = namespace+ctrlNames['ikCtl']
+            scene.nodes[ikCtl+'_grp'].values['translate'] = [5.0, 80.0, 10.0]
+            scene.nodes[ikCtl+'_grp'].values['rotate'] = [10.0, 0.0, 20.0]
+            scene.setSpaces(ikCtl, registry.spaceAttr, [ikCtl+'_grp', None, root], ['local', 'world', 'cog'])
+            scene.setSpaces(namespace+ctrlNames['pvCtl'], registry.spaceAttr, [root, None, ikCtl], ['cog', 'world', 'hand'])
+    return placement
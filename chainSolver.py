@@ -0,0 +1,232 @@
+'''
+    MODULE: chainSolver
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.1
+
+    USAGE: Node-free numeric solver for joint chains of any length, used by ikFkSolver to place the pole vector
+           of arms, four-bone legs, tails and spines, including chains whose joints don't lie on one plane.
+           Works on joint positions read once from the scene, can be run without Maya:
+               points, residual, iterations = fabrik(ikJntPositions, goal, pole, restPole)
+               pvPos, residual, evaluations = solveChainPole(fkJntPositions, ikJntPositions, restPole, pvOffset=2)
+
+    List of functions:
+        poleGuess(positions, pvOffset)
+        bendTwist(positions, pole)
+        fabrik(positions, goal, pole, restPole, tolerance, maxIterations)
+        chainResidual(positions, targetPositions)
+        solveChainPole(targetPositions, restPositions, restPole, pvOffset, tolerance, maxIterations)
+
+    NOTES: The pole is modelled like Maya's rotate plane solver: the chain's bend keeps the twist it had from the pole at rest,
+           so joints shifted off the plane stay shifted. The bend is turned about the start to goal axis, which keeps bone lengths.
+           Residuals are in scene units, the largest distance between a solved joint and its target.
+
+'''
+
+import math
+import matrixMath
+
+def _axisAngle(vec, ref, axis):
+    '''
+        Returns the signed angle from ref to vec around axis, in radians.
+    '''
+    return math.atan2(matrixMath.dotVector(matrixMath.crossVector(ref, vec), axis), matrixMath.dotVector(ref, vec))
+
+def _sumVectors(vectors):
+    total = [0.0, 0.0, 0.0]
+    for vec in vectors:
+        total = matrixMath.addVector(total, vec)
+    return total
+
+def _radial(point, origin, axis):
+    '''
+        Returns the part of point - origin that's perpendicular to axis.
+    '''
+    offset = matrixMath.subVector(point, origin)
+    return matrixMath.subVector(offset, matrixMath.scaleVector(axis, matrixMath.dotVector(offset, axis)))
+
+def _rotateAbout(point, origin, axis, angle):
+    '''
+        Rotates point around the axis through origin by angle, Rodrigues' formula.
+    '''
+    vec = matrixMath.subVector(point, origin)
+    cosA = math.cos(angle)
+    sinA = math.sin(angle)
+    rotated = matrixMath.addVector(matrixMath.scaleVector(vec, cosA), matrixMath.scaleVector(matrixMath.crossVector(axis, vec), sinA))
+    rotated = matrixMath.addVector(rotated, matrixMath.scaleVector(axis, matrixMath.dotVector(axis, vec)*(1.0 - cosA)))
+    return matrixMath.addVector(origin, rotated)
+
+def _bend(positions, axis):
+    '''
+        Returns the average offset of the inner joints from the start to end axis, or None for a straight chain.
+    '''
+    radials = [_radial(point, positions[0], axis) for point in positions[1:-1]]
+    if not radials:
+        return None
+    bend = matrixMath.scaleVector(_sumVectors(radials), 1.0/len(radials))
+    if matrixMath.vectorLength(bend) < 1e-9:
+        return None
+    return bend
+
+def poleGuess(positions, pvOffset=2):
+    '''
+        Returns the pole vector position for a chain of any length. The vector from the midpoint of start and end
+        to the average of the inner joints is extended by pvOffset, for three joints this is ikFkSolver.solvePoleVector.
+    '''
+    inner = positions[1:-1] or [positions[-1]]
+    midPos = matrixMath.scaleVector(_sumVectors(inner), 1.0/len(inner))
+    midpnt = matrixMath.scaleVector(matrixMath.addVector(positions[0], positions[-1]), 0.5)
+    return matrixMath.addVector(matrixMath.scaleVector(matrixMath.subVector(midPos, midpnt), pvOffset), midpnt)
+
+def bendTwist(positions, pole):
+    '''
+        Returns the angle, in radians, from the pole to the chain's bend around the start to end axis.
+        Zero for a planar chain bending towards its pole, None if the chain is straight or the pole is on the axis.
+    '''
+    axis = matrixMath.normalizeVector(matrixMath.subVector(positions[-1], positions[0]))
+    bend = _bend(positions, axis)
+    poleRadial = _radial(pole, positions[0], axis)
+    if bend is None or matrixMath.vectorLength(poleRadial) < 1e-9:
+        return None
+    return _axisAngle(bend, poleRadial, axis)
+
+def _aimBend(points, pole, twist):
+    axis = matrixMath.normalizeVector(matrixMath.subVector(points[-1], points[0]))
+    bend = _bend(points, axis)
+    poleRadial = _radial(pole, points[0], axis)
+    if bend is None or matrixMath.vectorLength(poleRadial) < 1e-9:
+        return points
+    angle = twist - _axisAngle(bend, poleRadial, axis)
+    return [points[0]] + [_rotateAbout(point, points[0], axis, angle) for point in points[1:-1]] + [points[-1]]
+
+def fabrik(positions, goal, pole=None, restPole=None, tolerance=1e-4, maxIterations=50):
+    '''
+        Solves the chain so its last joint reaches goal, keeping bone lengths. positions is the chain's current pose.
+        With a pole, the bend is turned to face it, keeping the twist the chain has from restPole in positions.
+        Returns (solved positions, distance left between the last joint and goal, iterations).
+    '''
+    points = [list(point) for point in positions]
+    lengths = [matrixMath.vectorLength(matrixMath.subVector(points[i+1], points[i])) for i in range(len(points)-1)]
+    root = points[0]
+    twist = 0.0
+    if pole is not None and restPole is not None:
+        twist = bendTwist(positions, restPole) or 0.0
+    reach = matrixMath.subVector(goal, root)
+    if matrixMath.vectorLength(reach) >= sum(lengths):
+        #out of reach, the chain straightens towards the goal
+        direction = matrixMath.normalizeVector(reach)
+        for i in range(1, len(points)):
+            points[i] = matrixMath.addVector(points[i-1], matrixMath.scaleVector(direction, lengths[i-1]))
+        return points, matrixMath.vectorLength(matrixMath.subVector(goal, points[-1])), 0
+    #starts from the rest pose swung onto the goal, so a chain that only needs to rotate keeps its shape
+    restAxis = matrixMath.normalizeVector(matrixMath.subVector(points[-1], root))
+    goalAxis = matrixMath.normalizeVector(reach)
+    swingAxis = matrixMath.crossVector(restAxis, goalAxis)
+    if matrixMath.vectorLength(swingAxis) > 1e-9:
+        swing = _axisAngle(goalAxis, restAxis, matrixMath.normalizeVector(swingAxis))
+        points = [_rotateAbout(point, root, matrixMath.normalizeVector(swingAxis), swing) for point in points]
+    if pole is not None:
+        points = _aimBend(points, pole, twist)
+    iterations = 0
+    residual = matrixMath.vectorLength(matrixMath.subVector(goal, points[-1]))
+    while iterations < maxIterations:
+        iterations += 1
+        #backward pass from the goal
+        points[-1] = list(goal)
+        for i in range(len(points)-2, -1, -1):
+            direction = matrixMath.normalizeVector(matrixMath.subVector(points[i], points[i+1]))
+            points[i] = matrixMath.addVector(points[i+1], matrixMath.scaleVector(direction, lengths[i]))
+        #forward pass from the root
+        points[0] = list(root)
+        for i in range(1, len(points)):
+            direction = matrixMath.normalizeVector(matrixMath.subVector(points[i], points[i-1]))
+            points[i] = matrixMath.addVector(points[i-1], matrixMath.scaleVector(direction, lengths[i-1]))
+        residual = matrixMath.vectorLength(matrixMath.subVector(goal, points[-1]))
+        if residual <= tolerance:
+            break
+    if pole is not None:
+        points = _aimBend(points, pole, twist)
+    return points, residual, iterations
+
+def chainResidual(positions, targetPositions):
+    '''
+        Returns the largest distance between matching joints of two chains.
+    '''
+    return max(matrixMath.vectorLength(matrixMath.subVector(point, target)) for point, target in zip(positions, targetPositions))
+
+def solveChainPole(targetPositions, restPositions=None, restPole=None, pvOffset=2, tolerance=1e-3, maxIterations=30):
+    '''
+        Returns (pole vector position, residual, evaluations) that make the ik chain in restPositions, posed by restPole,
+        land on targetPositions when its end is moved onto the target's end.
+        Starts from the pole that keeps the rest twist, then searches around the start to end axis,
+        until the residual is under tolerance or maxIterations solves, the first included, have been run.
+        Without restPositions the target chain is its own rest pose, which is exact for a planar chain.
+    '''
+    rest = restPositions or targetPositions
+    goal = targetPositions[-1]
+    root = targetPositions[0]
+    axis = matrixMath.normalizeVector(matrixMath.subVector(goal, root))
+    guess = poleGuess(targetPositions, pvOffset)
+    guessRadial = _radial(guess, root, axis)
+    radius = matrixMath.vectorLength(guessRadial)
+    if radius < 1e-9:
+        return guess, chainResidual(fabrik(rest, goal)[0], targetPositions), 1
+    foot = matrixMath.subVector(guess, guessRadial)
+    reference = matrixMath.scaleVector(guessRadial, 1.0/radius)
+
+    def poleAt(angle):
+        return matrixMath.addVector(foot, matrixMath.scaleVector(_rotateAbout(reference, (0.0, 0.0, 0.0), axis, angle), radius))
+
+    def residualAt(angle):
+        return chainResidual(fabrik(rest, goal, poleAt(angle), restPole)[0], targetPositions)
+
+    twist = bendTwist(rest, restPole) if restPole is not None else None
+    bestAngle = -(twist or 0.0)
+    best = residualAt(bestAngle)
+    evaluations = 1
+    if best <= tolerance:
+        return poleAt(bestAngle), best, evaluations
+
+    #coarse scan around the axis, then golden section search around the best sample
+    step = math.pi/4
+    startAngle = bestAngle
+    for i in range(1, 8):
+        if evaluations >= maxIterations:
+            break
+        angle = startAngle + step*i
+        value = residualAt(angle)
+        evaluations += 1
+        if value < best:
+            best = value
+            bestAngle = angle
+    if evaluations + 2 > maxIterations:
+        #no budget left for the golden section search
+        return poleAt(bestAngle), best, evaluations
+    low = bestAngle - step
+    high = bestAngle + step
+    ratio = (math.sqrt(5.0) - 1.0)/2.0
+    left = high - ratio*(high - low)
+    right = low + ratio*(high - low)
+    leftValue = residualAt(left)
+    rightValue = residualAt(right)
+    evaluations += 2
+    while True:
+        for angle, value in ((left, leftValue), (right, rightValue)):
+            if value < best:
+                best = value
+                bestAngle = angle
+        if evaluations >= maxIterations or best <= tolerance:
+            break
+        if leftValue < rightValue:
+            high, right, rightValue = right, left, leftValue
+            left = high - ratio*(high - low)
+            leftValue = residualAt(left)
+        else:
+            low, left, leftValue = left, right, rightValue
+            right = low + ratio*(high - low)
+            rightValue = residualAt(right)
+        evaluations += 1
+    return poleAt(bestAngle), best, evaluations
@@ -0,0 +1,173 @@
+'''
+    MODULE: chunkedTask
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.1
+
+    USAGE: Runs the long operations of ikFkMatching and GlobalPositioning, range matching, range repositioning and batch limb matching,
+           a chunk at a time from Maya's idle queue, so the UI stays responsive. A window shows the progress and has a Cancel button.
+           An operation is a generator that does one chunk of work per step and yields (done, total):
+               task = ChunkedTask('Baking IK to FK', steps)
+               task.start()
+           runSteps(steps) runs the same generator straight through, for scripts, batch runs and the benchmarks.
+
+    List of functions:
+        chunks(items, chunkSize)
+        runSteps(steps)
+    List of methods from class ChunkedTask:
+        __init__(title, steps, onDone, onCancel)
+        start()
+        step()
+        cancel()
+        finish()
+        showProgress()
+        updateProgress(done, total)
+        closeProgress()
+
+    NOTES: Each step is run by evalDeferred with lowestPriority, so the animator's input is handled between chunks.
+           Cancelling closes the generator, which raises GeneratorExit at its yield, the operation puts back anything it already wrote.
+           Operations read and solve in chunks and write at the end wherever they can, so there's nothing to put back.
+           Only one task runs at a time, starting another while one is running returns None.
+           A task, or runSteps, is one matrixCache operation from start to finish, including the idle time between its steps.
+
+'''
+
+import maya.cmds as cmds
+import matrixCache
+
+_running = []
+
+def chunks(items, chunkSize=None):
+    '''
+        Returns items split into lists of chunkSize. With no chunkSize the whole list is one chunk.
+    '''
+    items = list(items)
+    if not chunkSize or chunkSize >= len(items):
+        return [items]
+    return [items[i:i+chunkSize] for i in range(0, len(items), chunkSize)]
+
+def runSteps(steps):
+    '''
+        Runs every step of a generator right away. Returns the last (done, total) it yielded.
+    '''
+    progress = None
+    matrixCache.beginOperation()
+    try:
+        for progress in steps:
+            pass
+    finally:
+        matrixCache.endOperation()
+    return progress
+
+class ChunkedTask:
+
+    def __init__(self, title, steps, onDone=None, onCancel=None):
+        #instance variables
+        self.title = title
+        self.steps = steps
+        self.onDone = onDone
+        self.onCancel = onCancel
+        self.running = False
+        self.cancelled = False
+        self.done = 0
+        self.total = 0
+
+        #ui variables
+        self.windowName = 'chunkedTaskWin'
+        self.winWidth = 300
+        self.winHeight = 90
+        self.progressBar = 'chunkedTaskProgressBar'
+        self.statusText = 'chunkedTaskStatusText'
+        self.cancelBtnLbl = 'Cancel'
+
+    def start(self):
+        '''
+            Shows the progress window and queues the first step. Returns the task, or None if another task is still running.
+        '''
+        if _running:
+            cmds.warning('%s is still running, cancel it or wait for it to finish.' %(_running[0].title))
+            self.steps.close()
+            return None
+        _running.append(self)
+        self.running = True
+        matrixCache.beginOperation()
+        self.showProgress()
+        cmds.evalDeferred(self.step, lowestPriority=True)
+        return self
+
+    def step(self):
+        '''
+            Runs one step of the operation and queues the next one.
+        '''
+        if not self.running:
+            return
+        if self.cancelled:
+            #the operation rolls back what it wrote when its generator is closed
+            try:
+                self.steps.close()
+            finally:
+                self.finish()
+            cmds.warning('%s was cancelled.' %(self.title))
+            if self.onCancel:
+                self.onCancel()
+            return
+        try:
+            self.done, self.total = next(self.steps)
+        except StopIteration:
+            self.finish()
+            if self.onDone:
+                self.onDone()
+            return
+        except:
+            self.finish()
+            raise
+        self.updateProgress(self.done, self.total)
+        cmds.evalDeferred(self.step, lowestPriority=True)
+
+    def cancel(self, *args):
+        '''
+            Cancels the operation before its next step.
+        '''
+        if self.running:
+            self.cancelled = True
+
+    def finish(self):
+        '''
+            Marks the task as done and closes the progress window.
+        '''
+        if self.running:
+            matrixCache.endOperation()
+        self.running = False
+        if self in _running:
+            _running.remove(self)
+        self.closeProgress()
+
+    def showProgress(self):
+        '''
+            Opens the progress window. Closing the window cancels the task.
+        '''
+        self.closeProgress()
+        cmds.window(self.windowName, t=self.title, w=self.winWidth, h=self.winHeight, sizeable=False)
+        layout = cmds.columnLayout(p=self.windowName, adjustableColumn=True, rowSpacing=5)
+        self.statusText = cmds.text(p=layout, l='%s...' %(self.title), align='left')
+        self.progressBar = cmds.progressBar(p=layout, maxValue=100)
+        cmds.button(p=layout, l=self.cancelBtnLbl, c=self.cancel)
+        cmds.showWindow(self.windowName)
+        cmds.scriptJob(uiDeleted=[self.windowName, self.cancel], runOnce=True)
+
+    def updateProgress(self, done, total):
+        '''
+            Shows how much of the operation is done.
+        '''
+        if not cmds.window(self.windowName, exists=True):
+            return
+        percent = int(100.0*done/total) if total else 100
+        cmds.progressBar(self.progressBar, e=True, progress=percent)
+        cmds.text(self.statusText, e=True, l='%s... %d of %d' %(self.title, done, total))
+
+    def closeProgress(self):
+        if cmds.window(self.windowName, exists=True):
+            cmds.deleteUI(self.windowName)
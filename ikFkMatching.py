@@ -5,207 +5,148 @@
 
     DATE: 7/21/2017
 
-    VERSION: 1.3
+    VERSION: 3.5
 
     USAGE: ikFkMatching allows the animator to match ik and fk controls. 
-           Contains Project Avatarah game rig specific information. 
+           Project Avatarah game rig information is loaded from avatarahRigs.json by rigRegistry. 
+           the UI is opened with:
+               import ikFkMatching
+               ikFkMatching.showUI()
            if using other rigs, this can be run without a ui and with the appropriate information:
                MIF = MatchingIkFk(ik control, pole vector control, list of fk controls, list of ik joints, list of fk joints, ('arm' or 'leg'), ui=False, projAvatarah=False)
+           any number of avatarah limbs, across characters, can be matched in one operation and one undo:
+               MIF.batchMatch(list of ikFk switch controls, 'ikToFk', bake=False, allLimbs=False)
+           space switches are matched the same way, keeping the controls where they are while their space changes:
+               MIF.switchSpace(list of controls, 'world', bake=False, allCtrls=False)
                
     
     List of functions:
         avatarahCtrlCheck()
+        showUI()
+        spaceIndex(enums, space)
+        _joinRangeInputs(chunkInputs)
     List of methods from class MatchingIkFk:
         __init__()
         checkSelection()
+        setLimb(nodes)
+        limbMatcher(nodes)
         fkToIk()
+        readFkToIk(frames)
+        writeFkToIk(rotations, transaction)
         ikToFk()
+        readIkToFk()
+        writeIkToFk(ikMatrix, pvMatrix, transaction)
+        reportResidual(residuals)
+        keyTolerance(attr)
+        reportKeyReduction()
+        bakeFkToIk(startFrame, endFrame)
+        writeFkToIkRange(frames, rotations)
+        bakeIkToFk(startFrame, endFrame)
+        readIkToFkRange(frames)
+        writeIkToFkRange(frames, ikMatrices, pvMatrices, parentInvSamples)
+        collectLimbs(switchCtrls, allLimbs)
+        batchMatch(switchCtrls, matchType, bake, startFrame, endFrame, allLimbs, pvOffset, processes, deferred)
+        batchMatchSteps(limbs, matchType, frames, pvOffset, processes, chunkSize)
+        verifyMatch(switchCtrls, frames, allLimbs, positionTolerance, rotationTolerance)
+        matchCmd(matchType)
+        collectSpaceCtrls(ctrls, allCtrls)
+        switchSpace(ctrls, space, bake, startFrame, endFrame, allCtrls, deferred)
+        switchSpaceSteps(switches, frames, chunkSize)
+        spaceCmd()
+        switchMode(switchCtrl)
+        startAutoMatch(switchCtrls)
+        stopAutoMatch()
+        switchChanged(switchCtrl)
+        timeChanged()
+        flushAutoMatch()
+        autoMatchIkToFk(nodes, frame, transaction)
+        autoMatchCmd(state)
         matchAnkle()
-        bruteMatchingIk()
+        restAnkleOffset()
         returnMVector(obj)
+        getWorldMatrix(obj)
+        setWorldMatrix(obj, matrix, translate, rotate, transaction)
         constrainMoveKey(driver, driven, constraintType)
         UI()
       
         
-    NOTES: Still having issues with completely perfect matching on non-planar/shifted joints
+    NOTES: fk to ik solves each fk control's rotation from its ik joint's world matrix and the control's parent,
+           so it matches when the fk controls' orients or rotate orders differ from the ik joints'. Baked ranges are euler filtered.
+           The pole vector is solved by chainSolver against the ik chain's current pose, so chains of any length
+           and non-planar/shifted joints are matched. The largest residual of each limb's last match is kept in residuals
+           and a warning is shown when it's above residualTolerance.
+           Auto-match, startAutoMatch(switchCtrls), watches each switch control's switchAttr with a scriptJob
+           and matches the chain being switched to. Changes are collected and matched once Maya is idle, so dragging the switch
+           or scrubbing only matches once, and changes caused by a time change (a keyed switch) are ignored.
+           Auto-matched ik solves are cached per limb and frame, flipping back and forth only re-reads the chains.
+           verifyMatch measures a match afterwards by comparing the fk and ik joints, the mid joints and the end joint,
+           on the current frame or every frame of a range, and reports the max and mean positional and rotational error per limb.
+           Bakes started from the UI run chunkSize frames per limb at a time with a progress window and can be cancelled,
+           nothing is keyed until every limb is solved. Every match, bake and space switch writes in one sceneTransaction,
+           so it undoes in one step, keys included.
+           A bake's limbs are read and written through limbMatcher copies, so matching another limb while it runs doesn't disturb it.
+           With reduceKeys on, baked channels only keep the keys needed to stay within keyPositionTolerance and keyRotationTolerance,
+           see keyReducer, and the compression ratio of the last bake is printed and kept in keyReduction.
+           switchSpace sets a control's space enum, the rig registry's spaceAttr, and solves its local transform from its world matrix
+           under the new space's parentInverseMatrix, no constraint or locator is made. Controls with locked rotates only keep their position.
+           Over a range, the world matrices are sampled first, the space is keyed stepped over the range and the controls are keyed on every frame.
+           The frames either side of the range are keyed with the space and channel values they had, unless they're keyed already.
+           A control switched into the space of another control being switched is solved again once that control is written,
+           found by its parentInverseMatrix changing.
+           The matching methods are timed by profiler when it's enabled: profiler.enable(), match, then profiler.dump()
     
 '''
 
+import collections
+import copy
 import itertools
-from pymel.all import *
-import maya.OpenMaya as om
-
-#nested dictionary of rig joints for Tartarus, Proteus and Astrea. Separated by [rig][side][limb][joint]
-projAvatarahIkFkJnts = {
-                        'Tartarus' : 
-                            {
-                            'left' :
-                                {
-                                'arm' :
-                                    {
-                                    'fk' : [DependNodeName(u'fkj_left_arm_shldr_00_jnt'), DependNodeName(u'fkj_left_arm_elb_00_jnt'), DependNodeName(u'fkj_left_arm_wrist_00_jnt')],
-                                    'ik' : [DependNodeName(u'ikj_left_arm_shldr_00_jnt'), DependNodeName(u'ikj_left_arm_elb_00_jnt'), DependNodeName(u'ikj_left_arm_wrist_00_jnt')]
-                                    },
-                                'leg' :
-                                    {
-                                    'fk' : [DependNodeName(u'fk_left_leg_hip_00_jnt'), DependNodeName(u'fk_left_leg_knee_00_jnt'), DependNodeName(u'fk_left_leg_ankle_00_jnt')],
-                                    'ik' : [DependNodeName(u'ik_left_leg_hip_00_jnt'), DependNodeName(u'ik_left_leg_knee_00_jnt'), DependNodeName(u'ik_left_leg_ankle_00_jnt')]
-                                    }
-                                },
-                            'right' : 
-                                {
-                                'arm' :
-                                    {
-                                    'fk' : [DependNodeName(u'fkj_right_arm_shldr_00_jnt'), DependNodeName(u'fkj_right_arm_elb_00_jnt'), DependNodeName(u'fkj_right_arm_wrist_00_jnt')],
-                                    'ik' : [DependNodeName(u'ikj_right_arm_shldr_00_jnt'), DependNodeName(u'ikj_right_arm_elb_00_jnt'), DependNodeName(u'ikj_right_arm_wrist_00_jnt')]
-                                    },
-                                'leg' :
-                                    {
-                                    'fk' : [DependNodeName(u'fk_leg_hip_00_jnt'), DependNodeName(u'fk_leg_knee_00_jnt'), DependNodeName(u'fk_leg_ankle_00_jnt')],
-                                    'ik' : [DependNodeName(u'ik_right_leg_hip_00_jnt'), DependNodeName(u'ik_right_leg_knee_00_jnt'), DependNodeName(u'ik_right_leg_ankle_00_jnt')]
-                                    }
-                                }
-                            },                            
-                        'Proteus' : 
-                            {
-                            'left' :
-                                {
-                                'arm' :
-                                    {
-                                    'fk' : [DependNodeName(u'fkj_rig_jnt_left_shld'), DependNodeName(u'fkj_rig_jnt_left_elb'), DependNodeName(u'fkj_rig_jnt_left_wrist')],
-                                    'ik' : [DependNodeName(u'ikj_rig_jnt_left_shld'), DependNodeName(u'ikj_rig_jnt_left_elb'), DependNodeName(u'ikj_rig_jnt_left_wrist')]
-                                    },
-                                'leg' :
-                                    {
-                                    'fk' : [DependNodeName(u'fkj_jnt_left_leg_hipFk_jnt'), DependNodeName(u'fkj_jnt_left_leg_kneeFk_jnt'), DependNodeName(u'fkj_jnt_left_leg_ankleFk_jnt')],
-                                    'ik' : [DependNodeName(u'ikj_jnt_left_leg_hipIk_jnt'), DependNodeName(u'ikj_jnt_left_leg_kneeIk_jnt'), DependNodeName(u'ikj_jnt_left_leg_ankleIk_jnt')]
-                                    }
-                                },
-                            'right' : 
-                                {
-                                'arm' :
-                                    {
-                                    'fk' : [DependNodeName(u'fkj_rig_jnt_right_shld'), DependNodeName(u'fkj_rig_jnt_right_elb'), DependNodeName(u'fkj_rig_jnt_right_wrist')],
-                                    'ik' : [DependNodeName(u'ikj_rig_jnt_right_shld'), DependNodeName(u'ikj_rig_jnt_right_elb'), DependNodeName(u'ikj_rig_jnt_right_wrist')]
-                                    },
-                                'leg' :
-                                    {
-                                    'fk' : [DependNodeName(u'fkj_jnt_right_leg_hipFk_jnt'), DependNodeName(u'fkj_jnt_right_leg_kneeFk_jnt'), DependNodeName(u'fkj_jnt_right_leg_ankleFk_jnt')],
-                                    'ik' : [DependNodeName(u'ikj_jnt_right_leg_hipIk_jnt'), DependNodeName(u'ikj_jnt_right_leg_kneeIk_jnt'), DependNodeName(u'ikj_jnt_right_leg_ankleIk_jnt')]
-                                    }
-                                }
-                            },
-                        'Astrea' : 
-                            {
-                            'left' :
-                                {
-                                'arm' :
-                                    {
-                                    'fk' : [DependNodeName(u'fk_jnt_left_arm_shld_00'), DependNodeName(u'fk_jnt_left_arm_elb_00'), DependNodeName(u'fk_jnt_left_arm_wrist_00')],
-                                    'ik' : [DependNodeName(u'ik_jnt_left_arm_shld_00'), DependNodeName(u'ik_jnt_left_arm_elb_00'), DependNodeName(u'ik_jnt_left_arm_wrist_00')]
-                                    },
-                                'leg' :
-                                    {
-                                    'fk' : [DependNodeName(u'fk_jnt_left_leg_hip_01'), DependNodeName(u'fk_jnt_left_leg_knee_00'), DependNodeName(u'fk_jnt_left_leg_ankle_00')],
-                                    'ik' : [DependNodeName(u'ik_jnt_left_leg_hip_02'), DependNodeName(u'ik_jnt_left_leg_knee_00'), DependNodeName(u'ik_jnt_left_leg_ankle_00')]
-                                    }
-                                },
-                            'right' : 
-                                {
-                                'arm' :
-                                    {
-                                    'fk' : [DependNodeName(u'fk_jnt_right_arm_shld_00'), DependNodeName(u'fk_jnt_right_arm_elb_00'), DependNodeName(u'fk_jnt_right_arm_wrist_00')],
-                                    'ik' : [DependNodeName(u'ik_jnt_right_arm_shld_00'), DependNodeName(u'ik_jnt_right_arm_elb_00'), DependNodeName(u'ik_jnt_right_arm_wrist_00')]
-                                    },
-                                'leg' :
-                                    {
-                                    'fk' : [DependNodeName(u'fk_jnt_right_leg_hip_00'), DependNodeName(u'fk_jnt_right_leg_knee_00'), DependNodeName(u'fk_jnt_right_leg_ankle_00')],
-                                    'ik' : [DependNodeName(u'ik_jnt_right_leg_hip_00'), DependNodeName(u'ik_jnt_right_leg_knee_00'), DependNodeName(u'ik_jnt_right_leg_ankle_00')]
-                                    }
-                                }
-                            }
-                        }
-
-#nested dictionary of controls' naming convention, separated by [side][limb][control]
-projAvatarahRigCtrls = {
-                        'left' : 
-                            {
-                            'arm' :
-                                {
-                                'ikCtl' : DependNodeName(u'ik_left_arm'), 
-                                'pvCtl' : DependNodeName(u'left_arm_poleVec'),
-                                'fkCtl' : [DependNodeName(u'fk_left_shld'), 
-                                           DependNodeName(u'fk_left_elb'), 
-                                           DependNodeName(u'fk_left_wrist')]
-                                },
-                            'leg' :
-                                {
-                                'ikCtl' : DependNodeName(u'ik_left_leg'),
-                                'pvCtl' : DependNodeName(u'left_leg_poleVec'),
-                                'fkCtl' : [DependNodeName(u'fk_left_hip'), 
-                                           DependNodeName(u'fk_left_knee'),
-                                           DependNodeName(u'fk_left_ankle')]
-                                }
-                            }, 
-                        'right' :
-                            {
-                            'arm' :
-                                {
-                                'ikCtl' : DependNodeName(u'ik_right_arm'),
-                                'pvCtl' : DependNodeName(u'right_arm_poleVec'),
-                                'fkCtl' : [DependNodeName(u'fk_right_shld'), 
-                                           DependNodeName(u'fk_right_elb'), 
-                                           DependNodeName(u'fk_right_wrist')], 
-                                },
-                            'leg' :
-                                {
-                                'ikCtl' : DependNodeName(u'ik_right_leg'),     
-                                'pvCtl' : DependNodeName(u'right_leg_poleVec'),
-                                'fkCtl' : [DependNodeName(u'fk_right_hip'), 
-                                           DependNodeName(u'fk_right_knee'), 
-                                           DependNodeName(u'fk_right_ankle')]
-                                },  
-
-                            }
-                       }     
-
-#lists of rigs, sides, and limbs                     
-projAvatarahRigs = ['Astrea', 'Proteus', 'Tartarus']
-sideList = ['left', 'right']
-limbList = ['arm', 'leg']
+import maya.cmds as cmds
+import ikFkSolver
+import animIO
+import matrixSnap
+import rigRegistry
+import profiler
+import sceneTransaction
+import sceneBackend
+import matrixMath
+import chunkedTask
+import keyReducer
 
 def avatarahCtrlCheck(obj):
     '''
       Checks if obj from an avatarah game rig. 
-      If so, it returns ikCtl, pvCtl, fkCtls, ikJnts, fkJnts
+      If so, it returns ikCtl, pvCtl, fkCtls, ikJnts, fkJnts, limb
     ''' 
-    ikCtl = ''
-    pvCtl = ''
-    fkCtls = []
-    ikJnts = []
-    fkJnts = []
-    for rig in projAvatarahRigs:
-        if rig in str(obj):
-            print rig
-            rigNamespace = obj.namespace()
-            for i in sideList:
-                if i in str(obj):
-                    side = i
-            for i in limbList:
-                if i in str(obj):
-                    limb = i
-            if side and limb:
-                ikCtl = PyNode(projAvatarahRigCtrls[side][limb]['ikCtl'].addPrefix(rigNamespace))
-                pvCtl = PyNode(projAvatarahRigCtrls[side][limb]['pvCtl'].addPrefix(rigNamespace))
-                for fk in projAvatarahRigCtrls[side][limb]['fkCtl']:
-                    fkCtls.append(PyNode(fk.addPrefix(rigNamespace)))
-                for ik in projAvatarahIkFkJnts[rig][side][limb]['ik']:
-                    ikJnts.append(PyNode(ik.addPrefix(rigNamespace)))
-                for fk in projAvatarahIkFkJnts[rig][side][limb]['fk']:
-                    fkJnts.append(PyNode(fk.addPrefix(rigNamespace)))                        
-                return ikCtl, pvCtl, fkCtls, ikJnts, fkJnts, limb
+    nodes = rigRegistry.getRegistry().limbNodes(obj)
+    if nodes:
+        return nodes['ikCtl'], nodes['pvCtl'], nodes['fkCtls'], nodes['ikJnts'], nodes['fkJnts'], nodes['limb']
     return False
 
+def spaceIndex(enums, space):
+    '''
+        Returns the enum value of space, a name like 'world' or a value, from a control's enumNames, or None if it doesn't have it.
+    '''
+    if isinstance(space, basestring) and not space.isdigit():
+        for value, name in enums.items():
+            if name == space:
+                return value
+        return None
+    return int(space) if int(space) in enums else None
+
+def _joinRangeInputs(chunkInputs):
+    '''
+        Joins readIkToFkRange results read over consecutive chunks of frames into one.
+    '''
+    first = chunkInputs[0]
+    if len(chunkInputs) == 1:
+        return first
+    fkJntMatrixFrames = [sum((inputs[0][i] for inputs in chunkInputs), []) for i in range(len(first[0]))]
+    endMatrixFrames = None
+    if first[1] is not None:
+        endMatrixFrames = sum((inputs[1] for inputs in chunkInputs), [])
+    parentInvSamples = dict((key, sum((inputs[3][key] for inputs in chunkInputs), [])) for key in first[3])
+    return fkJntMatrixFrames, endMatrixFrames, first[2], parentInvSamples, first[4], first[5]
+
 class MatchingIkFk:
     
     def __init__(self, ikCtl='', pvCtl='', fkCtls='', ikJnts='', fkJnts='', limb='', projAvatarah=True, ui=True):
@@ -217,179 +158,881 @@ class MatchingIkFk:
         self.fkJnts = fkJnts
         self.limb = limb
         self.projAvatarah = projAvatarah
+        self.backend = sceneBackend.getBackend()
+        self.residualTolerance = 0.01
+        self.residuals = {}
+        self.chunkSize = 100
+        self.task = None
+        self.verification = {}
+        self.reduceKeys = False
+        self.keyPositionTolerance = 0.01
+        self.keyRotationTolerance = 0.05
+        self.keyReduction = keyReducer.newReport()
+        self.spaceTolerance = 1e-5
+        
+        #auto-match variables
+        self.switchAttr = 'ikFkSwitch'
+        self.ikValue = 1.0
+        self.fkValue = 0.0
+        self.autoMatchJobs = []
+        self.switchModes = {}
+        self.pendingSwitches = []
+        self.solveCache = collections.OrderedDict()
+        self.solveCacheSize = 500
+        self.cacheTolerance = 1e-5
         
         #ui variables
         self.windowName = 'ikFkMatchingWin'
         self.winWidth = 215
-        self.winHeight = 87
+        self.winHeight = 180
         self.winSizing = True
-        self.instructions = 'Select the IkFk Switch Control for the corresponding limb\nthen choose the matching style.'
+        self.instructions = 'Select the IkFk Switch Controls for the corresponding limbs\nthen choose the matching style.'
         self.uiLabel = 'IK/FK Matching'
         self.fkToIkBtnLbl = 'FK to IK'
         self.ikToFkBtnLbl = 'IK to FK'
+        self.bakeChkLbl = 'Bake playback range'
+        self.bakeChkBx = 'ikFkBakeChkBxWidget'
+        self.reduceChkLbl = 'Reduce baked keys'
+        self.reduceChkBx = 'ikFkReduceChkBxWidget'
+        self.spaceField = 'ikFkSpaceFieldWidget'
+        self.spaceBtnLbl = 'Switch Space'
+        self.spacePlaceholder = 'space, ex: world'
+        self.selectSpaceMessage = 'Please select controls with a space switch and enter the space to switch to.'
+        self.allLimbsChkLbl = 'All limbs of selected characters'
+        self.allLimbsChkBx = 'ikFkAllLimbsChkBxWidget'
+        self.autoMatchChkLbl = 'Auto-match on switch change'
+        self.autoMatchChkBx = 'ikFkAutoMatchChkBxWidget'
+        self.selectSwitchMessage = 'Please select the limb\'s corresponding ikFk switch control'
         if ui:
             self.UI()
             
     def checkSelection(self):
         '''
             Checks the selection and runs avatarahCtrlCheck function to get the corresponding information needed.
+            Returns False, after telling the user, if nothing is selected or the selection isn't a registered limb's control.
         '''
-        if self.projAvatarah:
-            try:
-                #print selected()[0]
-                self.ikCtl, self.pvCtl, self.fkCtls, self.ikJnts, self.fkJnts, self.limb = avatarahCtrlCheck(selected()[0])
-
-            except:
-                confirmDialog(m='Please select the limb\'s corresponding ikFk switch control')
-        else:
-            pass
+        if not self.projAvatarah:
+            return True
+        try:
+            limbNodes = avatarahCtrlCheck(self.backend.selection()[0])
+        except IndexError:
+            #nothing selected
+            limbNodes = False
+        if not limbNodes:
+            cmds.confirmDialog(m=self.selectSwitchMessage)
+            return False
+        self.ikCtl, self.pvCtl, self.fkCtls, self.ikJnts, self.fkJnts, self.limb = limbNodes
+        return True
+    
+    def setLimb(self, nodes):
+        '''
+            Sets the limb to be matched from a rig registry dictionary of nodes.
+        '''
+        self.ikCtl = nodes['ikCtl']
+        self.pvCtl = nodes['pvCtl']
+        self.fkCtls = nodes['fkCtls']
+        self.ikJnts = nodes['ikJnts']
+        self.fkJnts = nodes['fkJnts']
+        self.limb = nodes['limb']
     
+    def limbMatcher(self, nodes):
+        '''
+            Returns a copy of the matcher set to the limb in nodes. It shares the matcher's settings, residuals and key reduction report.
+            Batch matches and auto-match go through it instead of setLimb, so a match or auto-match run between
+            a deferred task's steps can't change the limb the task is on.
+        '''
+        matcher = copy.copy(self)
+        matcher.setLimb(nodes)
+        return matcher
+    
+    @profiler.profiled('ikFkMatching.fkToIk')
     def fkToIk(self):
         '''
             Matches the fk to the ik position. 
         '''
-        self.checkSelection()
-        for ikJ, fkC in itertools.izip(self.ikJnts, self.fkCtls):
-            rotIK = xform(ikJ, q=True, rotation=True)
-            #rotFK = xform(fkC, q=True, ws=True, a=True, rotation=True)            
-            xform(fkC, rotation=rotIK)
-            #fkC.setRotation(ikJ.getRotation('world'), 'world')
+        if not self.checkSelection():
+            return
+        #read inside the transaction, so matrixCache keeps what's read until the match is written
+        with sceneTransaction.SceneTransaction('fkToIk') as transaction:
+            rotations = ikFkSolver.solveFkToIkRange(*self.readFkToIk())
+            self.writeFkToIk(rotations, transaction)
+    
+    @profiler.profiled('ikFkMatching.readFkToIk')
+    def readFkToIk(self, frames=None):
+        '''
+            Reads what ikFkSolver.solveFkToIkRange needs for the current limb, returned in its argument order.
+            The ik joints and the first fk control's parent are sampled on every one of frames, or read on the current frame.
+            The fk chain's offsets and the fk controls' snap states are read on the current frame.
+        '''
+        states = [matrixSnap.getSnapState(fkC) for fkC in self.fkCtls]
+        parentMatrices = [matrixMath.inverseMatrix(state['parentInverseMatrix']) for state in states]
+        jointOffsets, parentOffsets = ikFkSolver.fkChainOffsets([self.getWorldMatrix(fkC) for fkC in self.fkCtls], parentMatrices, 
+                                                                [self.getWorldMatrix(jnt) for jnt in self.fkJnts])
+        if frames:
+            ikSamples = animIO.sampleMatrices(self.ikJnts, 'worldMatrix', frames)
+            ikJntMatrixFrames = [ikSamples[str(ikJ)] for ikJ in self.ikJnts]
+            rootParentFrames = animIO.sampleMatrices(self.fkCtls[:1], 'parentMatrix', frames)[str(self.fkCtls[0])]
+            rotSamples = animIO.sampleValues(self.fkCtls, 'rotate', frames[:1])
+            previousRotations = [rotSamples[str(fkC)][0] for fkC in self.fkCtls]
+        else:
+            ikJntMatrixFrames = [[self.getWorldMatrix(ikJ)] for ikJ in self.ikJnts]
+            rootParentFrames = parentMatrices[:1]
+            previousRotations = [self.backend.rotation(fkC) for fkC in self.fkCtls]
+        return ikJntMatrixFrames, rootParentFrames, jointOffsets, parentOffsets, states, previousRotations
+    
+    def writeFkToIk(self, rotations, transaction):
+        '''
+            Queues the first frame of the solved rotations onto the current limb's fk controls.
+        '''
+        for fkC, rots in itertools.izip(self.fkCtls, rotations):
+            transaction.queueChannels(fkC, 'rotate', rots[0])
             
+    @profiler.profiled('ikFkMatching.ikToFk')
     def ikToFk(self, orientObj=True, pvOffset=2):
         '''
             Matches the ik to the fk position.
+            The fk chain's world matrices are read once and solved by ikFkSolver, no temporary nodes are created.
+        '''
+        if not self.checkSelection():
+            return
+        with sceneTransaction.SceneTransaction('ikToFk') as transaction:
+            fkJntMatrices, endMatrix, endOffset, ikJntMatrices, pvPosition = self.readIkToFk()
+            ikMatrix, pvMatrix, residual = ikFkSolver.solveIkToFkChain(fkJntMatrices, ikJntMatrices, pvPosition, pvOffset, 
+                                                                       endMatrix, endOffset)
+            self.writeIkToFk(ikMatrix, pvMatrix, transaction)
+        self.reportResidual([residual])
+    
+    @profiler.profiled('ikFkMatching.readIkToFk')
+    def readIkToFk(self):
         '''
-        self.checkSelection()            
-        if self.limb == 'arm':
-            self.constrainMoveKey(self.fkJnts[-1], self.ikCtl, 'parentConstraint')
+            Reads what ikFkSolver.solveIkToFkChain needs for the current limb: the fk joint matrices, end matrix, end offset,
+            ik joint matrices and pole vector position.
+        '''
+        fkJntMatrices = [self.getWorldMatrix(jnt) for jnt in self.fkJnts]
+        endMatrix = None
+        endOffset = None
         if self.limb == 'leg':
-            self.matchAnkle()
-            
-        #vector math
-        fkWristVec = self.returnMVector(self.fkJnts[-1])
-        fkElbVec = self.returnMVector(self.fkJnts[-2])
-        fkShldrVec = self.returnMVector(self.fkJnts[0])
-        #gets the mid-point between the two vectors
-        midpnt = (fkWristVec + fkShldrVec)/2
-        #get vector from midpnt to elbow from origin
-        pvOrigin  = fkElbVec - midpnt
-        #extends vector by offset 
-        pvRaw = pvOrigin * pvOffset
-        pvLocation = pvRaw + midpnt
-        pvLoc = spaceLocator()
-        pvLoc.setTranslation(pvLocation, 'world')
-        self.constrainMoveKey(pvLoc, self.pvCtl, 'pointConstraint')
-        delete(pvLoc)
+            endMatrix = self.getWorldMatrix(self.fkCtls[-1])
+            endOffset = self.matchAnkle()
+        ikJntMatrices = [self.getWorldMatrix(jnt) for jnt in self.ikJnts]
+        return fkJntMatrices, endMatrix, endOffset, ikJntMatrices, self.backend.worldRotatePivot(self.pvCtl)
+    
+    @profiler.profiled('ikFkMatching.writeIkToFk')
+    def writeIkToFk(self, ikMatrix, pvMatrix, transaction=None):
+        '''
+            Moves the current limb's ik and pole vector controls to the solved matrices.
+            The writes are queued on transaction if one is given.
+        '''
+        self.setWorldMatrix(self.ikCtl, ikMatrix, transaction=transaction)
+        self.setWorldMatrix(self.pvCtl, pvMatrix, rotate=False, transaction=transaction)
+    
+    def reportResidual(self, residuals):
+        '''
+            Keeps the largest of the current limb's solve residuals and warns if it's above residualTolerance.
+        '''
+        residuals = [residual for residual in residuals if residual is not None]
+        if not residuals:
+            return None
+        residual = max(residuals)
+        self.residuals[str(self.ikCtl)] = residual
+        if residual > self.residualTolerance:
+            cmds.warning('%s matched with a residual of %.4f, above the %.4f tolerance' %(self.ikCtl, residual, self.residualTolerance))
+        return residual
+    
+    def keyTolerance(self, attr):
+        '''
+            Returns the tolerance baked keys of attr, ex: 'rotate', are reduced to, or None if reduceKeys is off.
+        '''
+        if not self.reduceKeys:
+            return None
+        return keyReducer.channelTolerance(attr, self.keyPositionTolerance, self.keyRotationTolerance)
+    
+    def reportKeyReduction(self):
+        '''
+            Prints how far the last bake's keys were reduced if reduceKeys is on. Returns the compression ratio.
+        '''
+        if self.reduceKeys and self.keyReduction['sampled']:
+            print(keyReducer.describe(self.keyReduction))
+        return keyReducer.compressionRatio(self.keyReduction)
+    
+    @profiler.profiled('ikFkMatching.bakeFkToIk')
+    def bakeFkToIk(self, startFrame=None, endFrame=None):
+        '''
+            Matches the fk to the ik position on every frame from startFrame to endFrame, the playback range by default.
+            The ik joint matrices are sampled in one pass, solved and euler filtered together, then keyed onto the fk controls
+            one curve per channel, in one undo chunk.
+        '''
+        if not self.checkSelection():
+            return []
+        frames = animIO.frameRange(startFrame, endFrame)
+        self.keyReduction = keyReducer.newReport()
+        with sceneTransaction.SceneTransaction('bakeFkToIk'):
+            rotations = ikFkSolver.solveFkToIkRange(*self.readFkToIk(frames))
+            self.writeFkToIkRange(frames, rotations)
+        self.reportKeyReduction()
+        return frames
+    
+    def writeFkToIkRange(self, frames, rotations):
+        '''
+            Keys the solved rotations onto the current limb's fk controls, one curve per channel.
+        '''
+        for fkC, rots in itertools.izip(self.fkCtls, rotations):
+            animIO.writeVectorKeys(fkC, 'rotate', frames, rots, self.keyTolerance('rotate'), self.keyReduction)
+    
+    @profiler.profiled('ikFkMatching.bakeIkToFk')
+    def bakeIkToFk(self, startFrame=None, endFrame=None, pvOffset=2):
+        '''
+            Matches the ik to the fk position on every frame from startFrame to endFrame, the playback range by default.
+            All matrices are sampled in one pass, every frame is solved by ikFkSolver, 
+            then the ik and pole vector controls are keyed one curve per channel, in one undo chunk.
+        '''
+        if not self.checkSelection():
+            return []
+        frames = animIO.frameRange(startFrame, endFrame)
+        self.keyReduction = keyReducer.newReport()
+        with sceneTransaction.SceneTransaction('bakeIkToFk'):
+            fkJntMatrixFrames, endMatrixFrames, endOffset, parentInvSamples, ikJntMatrices, pvPosition = self.readIkToFkRange(frames)
+            ikMatrices, pvMatrices, residuals = ikFkSolver.solveIkToFkRange(fkJntMatrixFrames, pvOffset, endMatrixFrames, endOffset, 
+                                                                            ikJntMatrices, pvPosition)
+            self.writeIkToFkRange(frames, ikMatrices, pvMatrices, parentInvSamples)
+        self.reportResidual(residuals)
+        self.reportKeyReduction()
+        return frames
+    
+    def readIkToFkRange(self, frames):
+        '''
+            Samples what ikFkSolver.solveIkToFkRange needs for the current limb over frames,
+            plus the ik and pole vector controls' parentInverseMatrix samples for writing the keys.
+            The ik chain and pole vector are read on the current frame only, they're the rest pose the pole vector is solved against.
+        '''
+        fkJntSamples = animIO.sampleMatrices(self.fkJnts, 'worldMatrix', frames)
+        parentInvSamples = animIO.sampleMatrices([self.ikCtl, self.pvCtl], 'parentInverseMatrix', frames)
+        endMatrixFrames = None
+        endOffset = None
+        if self.limb == 'leg':
+            endMatrixFrames = animIO.sampleMatrices([self.fkCtls[-1]], 'worldMatrix', frames)[str(self.fkCtls[-1])]
+            endOffset = self.matchAnkle()
+        ikJntMatrices = [self.getWorldMatrix(jnt) for jnt in self.ikJnts]
+        return ([fkJntSamples[str(jnt)] for jnt in self.fkJnts], endMatrixFrames, endOffset, parentInvSamples, 
+                ikJntMatrices, self.backend.worldRotatePivot(self.pvCtl))
+    
+    def writeIkToFkRange(self, frames, ikMatrices, pvMatrices, parentInvSamples):
+        '''
+            Keys the current limb's ik and pole vector controls to the solved matrices, one curve per channel.
+            The ik control's rotations are euler filtered, starting from its rotate on the first frame.
+        '''
+        #converts the world matrices to the controls' local channels
+        previousRotate = animIO.sampleValues([self.ikCtl], 'rotate', frames[:1])[str(self.ikCtl)][0]
+        ikState = matrixSnap.getSnapState(self.ikCtl)
+        pvState = matrixSnap.getSnapState(self.pvCtl)
+        ikLocal = []
+        pvLocal = []
+        for ikMtx, pvMtx, ikParentInv, pvParentInv in itertools.izip(ikMatrices, pvMatrices, 
+                                                                    parentInvSamples[str(self.ikCtl)], 
+                                                                    parentInvSamples[str(self.pvCtl)]):
+            ikState['parentInverseMatrix'] = ikParentInv
+            pvState['parentInverseMatrix'] = pvParentInv
+            ikLocal.append(matrixSnap.solveSnap(ikMtx, matrixMath.getTranslation(ikMtx), mode='parent', **ikState))
+            pvLocal.append(matrixSnap.solveSnap(pvMtx, matrixMath.getTranslation(pvMtx), mode='point', **pvState))
+        animIO.writeVectorKeys(self.ikCtl, 'translate', frames, [trans for trans, rot in ikLocal], self.keyTolerance('translate'), self.keyReduction)
+        ikRotates = matrixMath.filterEulerList([rot for trans, rot in ikLocal], ikState['rotateOrder'], previousRotate)
+        animIO.writeVectorKeys(self.ikCtl, 'rotate', frames, ikRotates, self.keyTolerance('rotate'), self.keyReduction)
+        animIO.writeVectorKeys(self.pvCtl, 'translate', frames, [trans for trans, rot in pvLocal], self.keyTolerance('translate'), self.keyReduction)
+    
+    def collectLimbs(self, switchCtrls, allLimbs=False):
+        '''
+            Returns the rig registry nodes of every limb the switch controls belong to, without duplicates.
+            With allLimbs, every limb of each switch control's character is returned.
+        '''
+        registry = rigRegistry.getRegistry()
+        limbs = []
+        found = set()
+        for ctrl in switchCtrls:
+            if allLimbs:
+                ctrlLimbs = registry.rigLimbNodes(ctrl) or []
+            else:
+                nodes = registry.limbNodes(ctrl)
+                ctrlLimbs = [nodes] if nodes else []
+            for nodes in ctrlLimbs:
+                if str(nodes['ikCtl']) not in found:
+                    found.add(str(nodes['ikCtl']))
+                    limbs.append(nodes)
+        return limbs
+    
+    @profiler.profiled('ikFkMatching.batchMatch')
+    def batchMatch(self, switchCtrls, matchType, bake=False, startFrame=None, endFrame=None, allLimbs=False, pvOffset=2, processes=0,
+                   deferred=False):
+        '''
+            Matches every limb of switchCtrls in one operation. matchType is 'fkToIk' or 'ikToFk'.
+            All limbs are read first, solved together, then written in one sceneTransaction flush and undo chunk.
+            processes spreads the solve of a long ikToFk bake across a process pool, see ikFkSolver.solveLimbs.
+            With deferred, the limbs are read and solved chunkSize frames at a time from Maya's idle queue, see chunkedTask,
+            and this returns before the match is done.
+        '''
+        limbs = self.collectLimbs(switchCtrls, allLimbs)
+        if not limbs:
+            return []
+        frames = animIO.frameRange(startFrame, endFrame) if bake else []
+        steps = self.batchMatchSteps(limbs, matchType, frames, pvOffset, processes, self.chunkSize if deferred else None)
+        if deferred:
+            title = '%s %s' %('Baking' if bake else 'Matching', 'FK to IK' if matchType == 'fkToIk' else 'IK to FK')
+            self.task = chunkedTask.ChunkedTask(title, steps).start()
+        else:
+            chunkedTask.runSteps(steps)
+        return limbs
+    
+    def batchMatchSteps(self, limbs, matchType, frames, pvOffset=2, processes=0, chunkSize=None):
+        '''
+            Generator behind batchMatch, each step reads and solves one limb or chunkSize of its frames and yields (done, total).
+            Nothing is written until the last step, so stopping it part way leaves the scene untouched.
+            Bakes over frames if any are given.
+        '''
+        total = len(limbs)*max(len(frames), 1)
+        done = 0
+        limbInputs = []
+        solved = []
+        #read pass, solved as it goes
+        for nodes in limbs:
+            limb = self.limbMatcher(nodes)
+            if not frames:
+                if matchType == 'fkToIk':
+                    inputs = limb.readFkToIk()
+                    solved.append(ikFkSolver.solveFkToIkRange(*inputs))
+                else:
+                    inputs = limb.readIkToFk()
+                    solved.append(ikFkSolver.solveIkToFkChain(inputs[0], inputs[3], inputs[4], pvOffset, inputs[1], inputs[2]))
+                limbInputs.append(inputs)
+                done += 1
+                yield done, total
+                continue
+            chunkInputs = []
+            results = None
+            for chunk in chunkedTask.chunks(frames, chunkSize):
+                if matchType == 'fkToIk':
+                    inputs = list(limb.readFkToIk(chunk))
+                    if results:
+                        #euler filtered against the end of the previous chunk
+                        inputs[5] = [rots[-1] for rots in results]
+                    chunkResults = ikFkSolver.solveFkToIkRange(*inputs)
+                else:
+                    inputs = limb.readIkToFkRange(chunk)
+                    chunkInputs.append(inputs)
+                    chunkResults = None
+                    if processes <= 1:
+                        chunkResults = ikFkSolver.solveIkToFkRange(inputs[0], pvOffset, inputs[1], inputs[2], inputs[4], inputs[5])
+                if chunkResults is not None:
+                    results = [values + chunkValues for values, chunkValues in itertools.izip(results or [[] for values in chunkResults], 
+                                                                                              chunkResults)]
+                done += len(chunk)
+                yield done, total
+            limbInputs.append(_joinRangeInputs(chunkInputs) if chunkInputs else None)
+            solved.append(results)
+        if frames and matchType == 'ikToFk' and processes > 1:
+            solved = ikFkSolver.solveLimbs([(inputs[0], pvOffset, inputs[1], inputs[2], inputs[4], inputs[5]) for inputs in limbInputs], 
+                                           processes)
         
-        #self.bruteMatchingIk()
+        #write pass
+        self.keyReduction = keyReducer.newReport()
+        with sceneTransaction.SceneTransaction('ikFkBatchMatch') as transaction:
+            for nodes, inputs, result in itertools.izip(limbs, limbInputs, solved):
+                limb = self.limbMatcher(nodes)
+                if matchType == 'fkToIk':
+                    if frames:
+                        limb.writeFkToIkRange(frames, result)
+                    else:
+                        limb.writeFkToIk(result, transaction)
+                elif frames:
+                    limb.writeIkToFkRange(frames, result[0], result[1], inputs[3])
+                    limb.reportResidual(result[2])
+                else:
+                    limb.writeIkToFk(result[0], result[1], transaction)
+                    limb.reportResidual([result[2]])
+        self.reportKeyReduction()
     
-    def matchAnkle(self):
+    @profiler.profiled('ikFkMatching.verifyMatch')
+    def verifyMatch(self, switchCtrls, frames=None, allLimbs=False, positionTolerance=None, rotationTolerance=None):
         '''
-            Matches the ankle correctly when doing ik to fk position
-            since the ik ankle control is oriented to the world and the fk ankle control is oriented to self.
+            Compares the fk and ik chains of every limb of switchCtrls on frames, ex: animIO.frameRange(1, 3000), the current frame if not given.
+            Returns a dictionary of ik control name to ikFkSolver.errorSummary, positional errors are in scene units and rotational errors in degrees.
+            Frames above positionTolerance or rotationTolerance are listed under flagged and warned about.
         '''
-        #gets the fk ankle's parent and ik ankle's parent
-        fkAnkleParent = self.fkCtls[-1].getParent()
-        ikAnkleParent = self.ikCtl.getParent()
+        limbs = self.collectLimbs(switchCtrls, allLimbs)
+        if not frames:
+            frames = [cmds.currentTime(q=True)]
+        #every joint of every limb is sampled in one pass
+        samples = animIO.sampleMatrices([jnt for nodes in limbs for jnt in list(nodes['fkJnts']) + list(nodes['ikJnts'])], 'worldMatrix', frames)
+        report = {}
+        for nodes in limbs:
+            positionErrors, rotationErrors = ikFkSolver.chainErrors([samples[str(jnt)] for jnt in nodes['fkJnts']], 
+                                                                    [samples[str(jnt)] for jnt in nodes['ikJnts']])
+            summary = ikFkSolver.errorSummary(positionErrors, rotationErrors, frames, positionTolerance, rotationTolerance)
+            report[str(nodes['ikCtl'])] = summary
+            if summary['flagged']:
+                cmds.warning('%s is off on %d of %d frames, up to %.4f units and %.2f degrees' %(nodes['ikCtl'], len(summary['flagged']), 
+                                                                                                len(frames), summary['maxPosition'], 
+                                                                                                summary['maxRotation']))
+        self.verification = report
+        return report
+    
+    def matchCmd(self, matchType):
+        '''
+            Runs the matching from the UI on every selected switch control. matchType is 'fkToIk' or 'ikToFk'.
+            Bakes over the playback range if the bake checkbox is on, a chunk at a time with a progress window.
+        '''
+        bake = cmds.checkBox(self.bakeChkBx, q=True, value=True)
+        allLimbs = cmds.checkBox(self.allLimbsChkBx, q=True, value=True)
+        self.reduceKeys = cmds.checkBox(self.reduceChkBx, q=True, value=True)
+        if not self.batchMatch(self.backend.selection(), matchType, bake=bake, allLimbs=allLimbs, deferred=bake):
+            cmds.confirmDialog(m=self.selectSwitchMessage)
+    
+    def collectSpaceCtrls(self, ctrls, allCtrls=False):
+        '''
+            Returns (ctrl, spaceAttr, enumNames) for every control of ctrls with a space switch, without duplicates.
+            With allCtrls, every space switching control of each control's character is returned.
+        '''
+        registry = rigRegistry.getRegistry()
+        switches = []
+        found = set()
+        for ctrl in ctrls:
+            candidates = (registry.spaceCtrlNodes(ctrl) or []) if allCtrls else [ctrl]
+            for candidate in candidates:
+                if str(candidate) in found or not self.backend.exists(candidate):
+                    continue
+                found.add(str(candidate))
+                attr = registry.getSpaceAttr(candidate)
+                enums = self.backend.enumNames(candidate, attr)
+                if enums:
+                    switches.append((str(candidate), attr, enums))
+        return switches
+    
+    @profiler.profiled('ikFkMatching.switchSpace')
+    def switchSpace(self, ctrls, space, bake=False, startFrame=None, endFrame=None, allCtrls=False, deferred=False):
+        '''
+            Switches every space switching control of ctrls to space, a name like 'world' or an enum value, without the controls moving.
+            With bake, the switch is keyed from startFrame to endFrame, the playback range by default, and the controls are keyed
+            on every frame of it. With deferred, the bake runs chunkSize frames at a time from Maya's idle queue, see chunkedTask.
+            Returns the (ctrl, spaceAttr, value) switched.
+        '''
+        switches = []
+        for ctrl, attr, enums in self.collectSpaceCtrls(ctrls, allCtrls):
+            value = spaceIndex(enums, space)
+            if value is None:
+                cmds.warning('%s has no %s space' %(ctrl, space))
+                continue
+            switches.append((ctrl, attr, value))
+        if not switches:
+            return []
+        frames = animIO.frameRange(startFrame, endFrame) if bake else []
+        steps = self.switchSpaceSteps(switches, frames, self.chunkSize if deferred else None)
+        if deferred:
+            self.task = chunkedTask.ChunkedTask('Switching to %s space' %(space), steps).start()
+        else:
+            chunkedTask.runSteps(steps)
+        return switches
+    
+    def switchSpaceSteps(self, switches, frames, chunkSize=None):
+        '''
+            Generator behind switchSpace, each step samples up to chunkSize frames of the controls' world matrices and yields (done, total).
+            The last step solves and keys every control in one sceneTransaction, so stopping it part way leaves the scene untouched
+            and the switch undoes in one step. The keys already written are put back if the last step fails.
+            On a single frame, controls already in their space are left alone.
+        '''
+        #pole vectors and other controls with locked rotates only keep their position
+        modes = []
+        for ctrl, attr, value in switches:
+            rotatable = [axis for axis in 'XYZ' if self.backend.getAttr('%s.rotate%s' %(ctrl, axis), settable=True)]
+            modes.append('parent' if rotatable else 'point')
         
-        #saves the rotations of the fk controls
-        hipRot = getAttr(self.fkCtls[0]+'.r')
-        kneeRot = getAttr(self.fkCtls[1]+'.r')
-        ankleRot = getAttr(self.fkCtls[2]+'.r')
+        if not frames:
+            pending = [i for i, (ctrl, attr, value) in enumerate(switches) if self.backend.getAttr('%s.%s' %(ctrl, attr)) != value]
+            worlds = dict((i, self.backend.worldMatrix(switches[i][0])) for i in pending)
+            pivots = dict((i, self.backend.worldRotatePivot(switches[i][0])) for i in pending)
+            with sceneTransaction.SceneTransaction('spaceSwitch') as transaction:
+                for i in pending:
+                    ctrl, attr, value = switches[i]
+                    transaction.queueAttr('%s.%s' %(ctrl, attr), value)
+                transaction.flush()
+                for attempt in range(len(pending)):
+                    parentInvs = dict((i, self.backend.parentInverseMatrix(switches[i][0])) for i in pending)
+                    for i in pending:
+                        matrixSnap.snapToMatrix(switches[i][0], worlds[i], modes[i], pivots[i], transaction=transaction)
+                    transaction.flush()
+                    #a control switched into the space of another one has moved again if that one was written after it was solved
+                    pending = [i for i in pending if not matrixMath.isEquivalent(parentInvs[i], self.backend.parentInverseMatrix(switches[i][0]), 
+                                                                                 self.spaceTolerance)]
+                    if not pending:
+                        break
+            yield 1, 1
+            return
         
-        #sets the rotation of the fk controls to zero 
-        #so the original location and orientation of fkAnkle parent can be found
-        setAttr(self.fkCtls[0]+'.r', 0, 0, 0)
-        setAttr(self.fkCtls[1]+'.r', 0, 0, 0)
-        setAttr(self.fkCtls[2]+'.r', 0, 0, 0)
+        ctrls = [ctrl for ctrl, attr, value in switches]
+        total = len(switches)*len(frames) + 1
+        done = 0
+        worlds = [[] for ctrl in ctrls]
+        for chunk in chunkedTask.chunks(frames, chunkSize):
+            samples = animIO.sampleMatrices(ctrls, 'worldMatrix', chunk)
+            for i, ctrl in enumerate(ctrls):
+                worlds[i].extend(samples[ctrl])
+            done += len(chunk)*len(ctrls)
+            yield done, total
+        rotatePivots = [self.backend.getAttr(ctrl+'.rotatePivot')[0] for ctrl in ctrls]
+        pivots = [[matrixMath.getTranslation(matrixSnap.multPoint(rp, mtx)) for mtx in ctrlWorlds] 
+                  for rp, ctrlWorlds in itertools.izip(rotatePivots, worlds)]
         
-        #creates locators and snaps them to the position of the fkAnkle parent and ikAnkle parent
-        fkTempLoc = spaceLocator(n='fkTempLoc')
-        ikTempLoc = spaceLocator(n='ikTempLoc')
-        delete(parentConstraint(fkAnkleParent, fkTempLoc, mo=False))
-        delete(parentConstraint(ikAnkleParent, ikTempLoc, mo=False))
+        #solved and keyed in one step, the switch's keys are one undo chunk
+        self.keyReduction = keyReducer.newReport()
+        with sceneTransaction.SceneTransaction('spaceSwitch'):
+            snapshots = []
+            try:
+                #the space is keyed over the range, the frames either side keep the space they had
+                edges = [frames[0] - 1, frames[-1] + 1]
+                channelLists = []
+                edgeKeys = []
+                for (ctrl, attr, value), mode in itertools.izip(switches, modes):
+                    attrs = ['translate', 'rotate'] if mode == 'parent' else ['translate']
+                    channels = [channel for attrName in attrs for channel in animIO.vectorChannels[attrName] 
+                                if self.backend.getAttr(ctrl+'.'+channel, settable=True)]
+                    channelLists.append(channels)
+                    snapshots.append((ctrl, animIO.snapshotKeys(ctrl, channels + [attr])))
+                    #and so do the channels, keyed with their old values where they have no key, or a control without keys would pop
+                    ctrlEdgeKeys = {}
+                    for attrName in attrs:
+                        samples = animIO.sampleValues([ctrl], attrName, edges)[ctrl]
+                        for axis, channel in enumerate(animIO.vectorChannels[attrName]):
+                            if channel in channels:
+                                keyed = animIO.keyTimes(ctrl, [channel])
+                                ctrlEdgeKeys[channel] = dict((frame, sample[axis]) for frame, sample in itertools.izip(edges, samples) 
+                                                             if frame not in keyed)
+                    edgeKeys.append(ctrlEdgeKeys)
+                    before, after = animIO.sampleValues([ctrl], attr, edges)[ctrl]
+                    keys = [(frames[0] - 1, before)] if before != value else []
+                    keys += [(frame, value) for frame in sorted(set([frames[0], frames[-1]]))]
+                    if after != value:
+                        keys.append((frames[-1] + 1, after))
+                    animIO.writeStepKeys(ctrl, attr, [frame for frame, val in keys], [val for frame, val in keys])
+                
+                pending = range(len(switches))
+                for attempt in range(len(switches)):
+                    usedParentInvs = {}
+                    for i in pending:
+                        ctrl = ctrls[i]
+                        state = matrixSnap.getSnapState(ctrl)
+                        translates = []
+                        rotates = []
+                        usedParentInvs[i] = animIO.sampleMatrices([ctrl], 'parentInverseMatrix', frames)[ctrl]
+                        for mtx, pivot, parentInv in itertools.izip(worlds[i], pivots[i], usedParentInvs[i]):
+                            state['parentInverseMatrix'] = parentInv
+                            translate, rotate = matrixSnap.solveSnap(mtx, pivot, mode=modes[i], **state)
+                            translates.append(translate)
+                            rotates.append(rotate)
+                        if modes[i] == 'parent':
+                            rotates = matrixMath.filterEulerList(rotates, state['rotateOrder'])
+                        for channel in channelLists[i]:
+                            axis = 'XYZ'.index(channel[-1])
+                            values = translates if channel.startswith('translate') else rotates
+                            keyFrames = list(frames)
+                            keyValues = [val[axis] for val in values]
+                            edgeValues = edgeKeys[i][channel]
+                            if edges[0] in edgeValues:
+                                keyFrames.insert(0, edges[0])
+                                keyValues.insert(0, edgeValues[edges[0]])
+                            if edges[1] in edgeValues:
+                                keyFrames.append(edges[1])
+                                keyValues.append(edgeValues[edges[1]])
+                            animIO.writeKeys(ctrl, channel, keyFrames, keyValues, self.keyTolerance(channel), self.keyReduction)
+                    
+                    #a control switched into the space of another one is solved again if that one was written after it
+                    pending = [i for i in pending if [a for a, b in itertools.izip(usedParentInvs[i], 
+                                                                                   animIO.sampleMatrices([ctrls[i]], 'parentInverseMatrix', frames)[ctrls[i]])
+                                                      if not matrixMath.isEquivalent(a, b, self.spaceTolerance)]]
+                    if not pending:
+                        break
+            except:
+                for ctrl, snapshot in reversed(snapshots):
+                    animIO.restoreKeys(ctrl, snapshot)
+                raise
+        #reported before the last yield, a bake run before the task's next step would replace keyReduction
+        self.reportKeyReduction()
+        yield total, total
+    
+    def spaceCmd(self):
+        '''
+            Switches the space of every selected control from the UI to the space typed in the space field.
+            Bakes over the playback range if the bake checkbox is on, and switches every space control of the selected characters
+            if the all limbs checkbox is on.
+        '''
+        space = cmds.textField(self.spaceField, q=True, text=True)
+        bake = cmds.checkBox(self.bakeChkBx, q=True, value=True)
+        allCtrls = cmds.checkBox(self.allLimbsChkBx, q=True, value=True)
+        self.reduceKeys = cmds.checkBox(self.reduceChkBx, q=True, value=True)
+        if not space or not self.switchSpace(self.backend.selection(), space, bake=bake, allCtrls=allCtrls, deferred=bake):
+            cmds.confirmDialog(m=self.selectSpaceMessage)
+    
+    def switchMode(self, switchCtrl):
+        '''
+            Returns 'ik' or 'fk', whichever of ikValue and fkValue the switch control's switchAttr is closest to.
+        '''
+        value = self.backend.getAttr('%s.%s' %(switchCtrl, self.switchAttr))
+        if abs(value - self.ikValue) <= abs(value - self.fkValue):
+            return 'ik'
+        return 'fk'
+    
+    def startAutoMatch(self, switchCtrls=None):
+        '''
+            Watches the switchAttr of switchCtrls, the selection by default, and matches a limb whenever its switch changes.
+            The scriptJobs are parented to the window if it's open, so they're killed with it.
+            Returns the switch controls being watched.
+        '''
+        self.stopAutoMatch()
+        if switchCtrls is None:
+            switchCtrls = self.backend.selection()
+        registry = rigRegistry.getRegistry()
+        jobFlags = {'killWithScene' : True}
+        if cmds.window(self.windowName, exists=True):
+            jobFlags['parent'] = self.windowName
+        frame = cmds.currentTime(q=True)
+        for ctrl in switchCtrls:
+            ctrl = str(ctrl)
+            if not registry.limbNodes(ctrl) or not cmds.objExists('%s.%s' %(ctrl, self.switchAttr)):
+                continue
+            self.switchModes[ctrl] = (self.switchMode(ctrl), frame)
+            self.autoMatchJobs.append(cmds.scriptJob(attributeChange=['%s.%s' %(ctrl, self.switchAttr), 
+                                                                      lambda ctrl=ctrl: self.switchChanged(ctrl)], **jobFlags))
+        if self.switchModes:
+            self.autoMatchJobs.append(cmds.scriptJob(event=['timeChanged', self.timeChanged], **jobFlags))
+        return sorted(self.switchModes)
+    
+    def stopAutoMatch(self):
+        '''
+            Kills the auto-match scriptJobs and clears the solve cache.
+        '''
+        for job in self.autoMatchJobs:
+            if cmds.scriptJob(exists=job):
+                cmds.scriptJob(kill=job, force=True)
+        self.autoMatchJobs = []
+        self.switchModes = {}
+        self.pendingSwitches = []
+        self.solveCache.clear()
+    
+    def switchChanged(self, switchCtrl):
+        '''
+            scriptJob callback, queues switchCtrl to be matched once Maya is idle.
+            Any number of changes before then are matched once.
+        '''
+        if switchCtrl in self.pendingSwitches:
+            return
+        self.pendingSwitches.append(switchCtrl)
+        if len(self.pendingSwitches) == 1:
+            cmds.evalDeferred(self.flushAutoMatch, lowestPriority=True)
+    
+    def timeChanged(self):
+        '''
+            scriptJob callback, records the switch modes on the new frame so a keyed switch changing with time isn't matched.
+        '''
+        frame = cmds.currentTime(q=True)
+        for ctrl in self.switchModes:
+            if self.backend.exists(ctrl):
+                self.switchModes[ctrl] = (self.switchMode(ctrl), frame)
+    
+    @profiler.profiled('ikFkMatching.flushAutoMatch')
+    def flushAutoMatch(self):
+        '''
+            Matches every queued switch control whose mode flipped on the current frame, in one sceneTransaction.
+        '''
+        pending = self.pendingSwitches
+        self.pendingSwitches = []
+        frame = cmds.currentTime(q=True)
+        registry = rigRegistry.getRegistry()
+        with sceneTransaction.SceneTransaction('ikFkAutoMatch') as transaction:
+            for ctrl in pending:
+                if ctrl not in self.switchModes or not self.backend.exists(ctrl):
+                    continue
+                mode = self.switchMode(ctrl)
+                lastMode, lastFrame = self.switchModes[ctrl]
+                self.switchModes[ctrl] = (mode, frame)
+                if mode == lastMode or frame != lastFrame:
+                    continue
+                nodes = registry.limbNodes(ctrl)
+                if not nodes:
+                    continue
+                if mode == 'ik':
+                    self.autoMatchIkToFk(nodes, frame, transaction)
+                else:
+                    limb = self.limbMatcher(nodes)
+                    limb.writeFkToIk(ikFkSolver.solveFkToIkRange(*limb.readFkToIk()), transaction)
+    
+    def autoMatchIkToFk(self, nodes, frame, transaction, pvOffset=2):
+        '''
+            Matches the limb's ik to its fk position, reusing the solve cached for the limb and frame
+            if the fk chain, the ik chain's bone lengths and pvOffset haven't changed since.
+        '''
+        limb = self.limbMatcher(nodes)
+        fkJntMatrices, endMatrix, endOffset, ikJntMatrices, pvPosition = limb.readIkToFk()
+        #the match itself moves the ik chain, so only what the solve depends on is compared, not the ik pose
+        solveInputs = (fkJntMatrices, endMatrix, endOffset, ikFkSolver.boneLengths(ikJntMatrices), pvOffset)
+        key = (str(limb.ikCtl), frame)
+        cached = self.solveCache.pop(key, None)
+        if cached and ikFkSolver.sameInputs(cached[0], solveInputs, self.cacheTolerance):
+            result = cached[1]
+        else:
+            result = ikFkSolver.solveIkToFkChain(fkJntMatrices, ikJntMatrices, pvPosition, pvOffset, endMatrix, endOffset)
+        self.solveCache[key] = (solveInputs, result)
+        while len(self.solveCache) > self.solveCacheSize:
+            self.solveCache.popitem(last=False)
+        limb.writeIkToFk(result[0], result[1], transaction)
+        limb.reportResidual([result[2]])
+        return result
+    
+    def autoMatchCmd(self, state):
+        '''
+            Turns auto-match on for the selected switch controls, or off, from the UI checkbox.
+        '''
+        if not state:
+            self.stopAutoMatch()
+        elif not self.startAutoMatch():
+            cmds.checkBox(self.autoMatchChkBx, e=True, value=False)
+            cmds.confirmDialog(m=self.selectSwitchMessage)
+    
+    @profiler.profiled('ikFkMatching.matchAnkle')
+    def matchAnkle(self):
+        '''
+            Returns the offset needed to match the ankle correctly when doing ik to fk position
+            since the ik ankle control is oriented to the world and the fk ankle control is oriented to self.
+            The offset only depends on the rig, so it's worked out once per limb and kept by the rig registry
+            until the rig's reference changes.
+        '''
+        return rigRegistry.getRegistry().restOffset(self.ikCtl, self.restAnkleOffset)
+    
+    def restAnkleOffset(self):
+        '''
+            Works out the ankle offset from the fk ankle parent and ik ankle parent at rest, without setting anything.
+            Both parents' orientations are rebuilt from the local rotations below their common parent,
+            with the fk controls' rotations left out, the same as zeroing the fk controls and reading the parents' world matrices.
+        '''
+        #gets the fk ankle's parent and ik ankle's parent
+        fkAnkleParent = self.backend.parent(self.fkCtls[-1])
+        ikAnkleParent = self.backend.parent(self.ikCtl)
         
-        #parents fkLoc to ikLoc, and reapplies original rotations to fk controls
-        parent(ikTempLoc, fkTempLoc)
-        setAttr(ikTempLoc+'.t', 0, 0, 0)
-        setAttr(self.fkCtls[0]+'.r', hipRot)
-        setAttr(self.fkCtls[1]+'.r', kneeRot)
-        setAttr(self.fkCtls[2]+'.r', ankleRot)
+        #walks up from both parents until their paths meet, whatever is above is shared and cancels out
+        ikPath = []
+        node = ikAnkleParent
+        while node:
+            ikPath.append(str(node))
+            node = self.backend.parent(node)
+        fkPath = []
+        node = fkAnkleParent
+        while node and str(node) not in ikPath:
+            fkPath.append(str(node))
+            node = self.backend.parent(node)
+        top = node
+        if top:
+            ikPath = ikPath[:ikPath.index(str(top))]
         
-        #snaps the fkLoc to the ankle control, which will move the ikLoc into the correct position and orientation, 
-        #then the ik control can be then snapped to the locator position.
-        delete(parentConstraint(self.fkCtls[-1], fkTempLoc))
-        self.constrainMoveKey(ikTempLoc, self.ikCtl, 'parentConstraint')
+        #each local rotation comes from the world matrices of the node and the next one up the path,
+        #the fk controls' rest rotation is their rotateAxis and jointOrient with a zero rotate
+        fkCtls = set(str(fkC) for fkC in self.fkCtls)
+        rests = []
+        for path in (fkPath, ikPath):
+            worlds = [matrixMath.getRotation(self.getWorldMatrix(parent)) for parent in path[1:]]
+            worlds.append(matrixMath.getRotation(self.getWorldMatrix(top)) if top else matrixMath.identityMatrix())
+            rest = matrixMath.identityMatrix()
+            for i, pathNode in enumerate(path):
+                if pathNode in fkCtls:
+                    local = matrixMath.eulerToMatrix(self.backend.getAttr(pathNode+'.rotateAxis')[0])
+                    if self.backend.isJoint(pathNode):
+                        local = matrixMath.multMatrix(local, matrixMath.eulerToMatrix(self.backend.getAttr(pathNode+'.jointOrient')[0]))
+                else:
+                    local = matrixMath.multMatrix(matrixMath.getRotation(self.getWorldMatrix(pathNode)), matrixMath.transposeMatrix(worlds[i]))
+                rest = matrixMath.multMatrix(rest, local)
+            rests.append(rest)
         
-        #clean up
-        delete(ikTempLoc, fkTempLoc)
+        return ikFkSolver.ankleRestOffset(rests[0], rests[1])
         
-    def bruteMatchingIk(self):
-        '''
-            Brute matching of non-planar joints, ik to fk. The results aren't quite as hoped.
-        '''
-        tmpFkJnts = duplicate(self.fkJnts, po=True)
-        tmpIk = ikHandle(n='tmpIk', solver='ikRPsolver', startJoint=tmpFkJnts[0], endEffector=tmpFkJnts[-1])[0]
-        pvX = tmpIk.getAttr('poleVectorX')
-        pvY = tmpIk.getAttr('poleVectorY')
-        pvZ = tmpIk.getAttr('poleVectorZ')
-        rawVec = dt.Vector(pvX, pvY, pvZ)
-        elbLoc = self.fkJnts[1].getTranslation('world')
-        loc = spaceLocator()     
-        newVec = rawVec + elbLoc       
-        loc.setTranslation(newVec, 'world')
-                
     def returnMVector(self, obj):
         '''
             Gets the absolute, world space coordinates of the obj and returns the vector of obj.
         ''' 
-        loc = xform(obj, q=True, ws=True, a=True, rp=True)
-        vecLoc = om.MVector(loc[0], loc[1], loc[2])
+        import maya.api.OpenMaya as om2
+        loc = self.backend.worldRotatePivot(obj)
+        vecLoc = om2.MVector(loc[0], loc[1], loc[2])
         return vecLoc
 
+    def getWorldMatrix(self, obj):
+        '''
+            Returns the world matrix of obj as a flat list of 16 floats.
+        '''
+        return self.backend.worldMatrix(obj)
+
+    def setWorldMatrix(self, obj, matrix, translate=True, rotate=True, transaction=None):
+        '''
+            Moves obj to the world translation and/or orientation of matrix.
+            The writes are queued on transaction if one is given.
+        '''
+        if translate and rotate:
+            return matrixSnap.snapToMatrix(obj, matrix, 'parent', transaction=transaction)
+        if translate:
+            return matrixSnap.snapToMatrix(obj, matrix, 'point', transaction=transaction)
+        if rotate:
+            return matrixSnap.snapToMatrix(obj, matrix, 'orient', transaction=transaction)
+
     def constrainMoveKey(self, driver, driven, constraintType):
         '''
-            Constrain moves driven to driver's position and/or orientation depending on type of constraint used.
+            Moves driven to driver's position and/or orientation depending on type of constraint used.
+            Solved by matrixSnap, so no constraint is created.
         '''    
-        execStr = 'con = %s(driver, driven, mo=False)' %(constraintType)
-        exec(execStr)
-        location = driven.getTranslation('world')
-        rotation = driven.getRotation('world')
-        delete(con.name())
-        driven.setTranslation(location, 'world')
-        driven.setRotation(rotation, 'world')
+        location, rotation = matrixSnap.snap(driver, driven, matrixSnap.constraintModes[constraintType])
         return driver, driven, constraintType, location
         
     def UI(self):
         '''
             Generates the UI.
         '''    
-        if window(self.windowName, exists = True):
-            deleteUI(self.windowName)
-        window(self.windowName, w = self.winWidth, h = self.winHeight, sizeable = self.winSizing)
+        if cmds.window(self.windowName, exists = True):
+            cmds.deleteUI(self.windowName)
+        cmds.window(self.windowName, w = self.winWidth, h = self.winHeight, sizeable = self.winSizing)
         #main layout
-        mainFormLayout = formLayout(p=self.windowName)
-        uiTitle = text(l=self.uiLabel, p=mainFormLayout, ww=True)
-        instructText = text(l=self.instructions, p=mainFormLayout, ww=True)
-        ikToFkBtn = button(p=mainFormLayout, l=self.ikToFkBtnLbl, w=100, c=Callback(self.ikToFk))
-        fkToIkBtn = button(p=mainFormLayout, l=self.fkToIkBtnLbl, w=100, c=Callback(self.fkToIk))
-        formLayout(mainFormLayout, e=True, attachForm=[(uiTitle, 'top', 5),
-                                                       (uiTitle, 'left', 5),
-                                                       (uiTitle, 'right', 5),
-                                                       (instructText, 'left', 5),
-                                                       (instructText, 'right', 5),
-                                                       (ikToFkBtn, 'right', 5),
-                                                       (fkToIkBtn, 'left', 5),
-                                                       (fkToIkBtn, 'bottom', 5),
-                                                       (ikToFkBtn, 'bottom', 5),
-                                                       ], 
-                                           attachControl=[(instructText, 'top', 5, uiTitle),
-                                                          (ikToFkBtn, 'top', 10, instructText),
-                                                          (fkToIkBtn, 'top', 10, instructText),
-                                                          (fkToIkBtn, 'right', 5, ikToFkBtn),
-                                                           ])       
-        showWindow(self.windowName)
+        mainFormLayout = cmds.formLayout(p=self.windowName)
+        uiTitle = cmds.text(l=self.uiLabel, p=mainFormLayout, ww=True)
+        instructText = cmds.text(l=self.instructions, p=mainFormLayout, ww=True)
+        self.bakeChkBx = cmds.checkBox(p=mainFormLayout, l=self.bakeChkLbl, value=False)
+        self.reduceChkBx = cmds.checkBox(p=mainFormLayout, l=self.reduceChkLbl, value=False)
+        self.allLimbsChkBx = cmds.checkBox(p=mainFormLayout, l=self.allLimbsChkLbl, value=False)
+        self.autoMatchChkBx = cmds.checkBox(p=mainFormLayout, l=self.autoMatchChkLbl, value=False, 
+                                            cc=lambda state: self.autoMatchCmd(state))
+        ikToFkBtn = cmds.button(p=mainFormLayout, l=self.ikToFkBtnLbl, w=100, c=lambda *args: self.matchCmd('ikToFk'))
+        fkToIkBtn = cmds.button(p=mainFormLayout, l=self.fkToIkBtnLbl, w=100, c=lambda *args: self.matchCmd('fkToIk'))
+        spaceRow = cmds.rowLayout(p=mainFormLayout, numberOfColumns=2, adjustableColumn=1)
+        self.spaceField = cmds.textField(p=spaceRow, placeholderText=self.spacePlaceholder)
+        cmds.button(p=spaceRow, l=self.spaceBtnLbl, c=lambda *args: self.spaceCmd())
+        cmds.formLayout(mainFormLayout, e=True, attachForm=[(uiTitle, 'top', 5),
+                                                            (uiTitle, 'left', 5),
+                                                            (uiTitle, 'right', 5),
+                                                            (instructText, 'left', 5),
+                                                            (instructText, 'right', 5),
+                                                            (self.bakeChkBx, 'left', 5),
+                                                            (self.reduceChkBx, 'left', 5),
+                                                            (self.allLimbsChkBx, 'left', 5),
+                                                            (self.autoMatchChkBx, 'left', 5),
+                                                            (ikToFkBtn, 'right', 5),
+                                                            (fkToIkBtn, 'left', 5),
+                                                            (spaceRow, 'left', 5),
+                                                            (spaceRow, 'right', 5),
+                                                            (spaceRow, 'bottom', 5),
+                                                            ], 
+                                                attachControl=[(instructText, 'top', 5, uiTitle),
+                                                               (self.bakeChkBx, 'top', 5, instructText),
+                                                               (self.reduceChkBx, 'top', 5, self.bakeChkBx),
+                                                               (self.allLimbsChkBx, 'top', 5, self.reduceChkBx),
+                                                               (self.autoMatchChkBx, 'top', 5, self.allLimbsChkBx),
+                                                               (ikToFkBtn, 'top', 10, self.autoMatchChkBx),
+                                                               (fkToIkBtn, 'top', 10, self.autoMatchChkBx),
+                                                               (fkToIkBtn, 'right', 5, ikToFkBtn),
+                                                               (spaceRow, 'top', 10, ikToFkBtn),
+                                                                ])       
+        cmds.showWindow(self.windowName)
 
-MIF = MatchingIkFk()            
-              
-    
+def showUI():
+    '''
+        Opens the IK/FK Matching window and returns the tool.
+    '''
+    return MatchingIkFk()
@@ -0,0 +1,261 @@
+'''
+    MODULE: ikFkSolver
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.5
+
+    USAGE: Node-free solve layer for ikFkMatching. Takes world matrices read from the scene
+           and returns the world matrices the controls need to be moved to, so no locators or constraints are created.
+           Can be run without Maya:
+               ikMatrix, pvMatrix = solveIkToFk([shldrMatrix, elbMatrix, wristMatrix], pvOffset=2)
+           Chains of any length, including non-planar ones, are matched against the ik chain with chainSolver:
+               ikMatrix, pvMatrix, residual = solveIkToFkChain(fkJntMatrices, ikJntMatrices, pvPosition)
+           fk controls are matched to the ik chain through the joints' world matrices, on one frame or a whole range:
+               jointOffsets, parentOffsets = fkChainOffsets(fkCtlMatrices, fkCtlParentMatrices, fkJntMatrices)
+               rotations = solveFkToIkRange(ikJntMatrixFrames, rootParentFrames, jointOffsets, parentOffsets, ctrlStates)
+           How well a match landed is measured by comparing the two chains' joints, on one frame or a whole range:
+               positionErrors, rotationErrors = chainErrors(fkJntMatrixFrames, ikJntMatrixFrames)
+
+    List of functions:
+        solvePoleVector(startPos, midPos, endPos, pvOffset)
+        ankleRestOffset(fkAnkleParentRest, ikAnkleParentRest)
+        solveIkToFk(fkJntMatrices, pvOffset, endMatrix, endOffset)
+        solveIkToFkChain(fkJntMatrices, ikJntMatrices, restPvPosition, pvOffset, endMatrix, endOffset, tolerance, maxIterations)
+        solveIkToFkRange(fkJntMatrixFrames, pvOffset, endMatrixFrames, endOffset, ikJntMatrices, restPvPosition, tolerance, maxIterations)
+        solveLimbs(limbArgs, processes)
+        fkChainOffsets(fkCtlMatrices, fkCtlParentMatrices, fkJntMatrices)
+        solveFkToIkRange(ikJntMatrixFrames, rootParentFrames, jointOffsets, parentOffsets, ctrlStates, previousRotations)
+        boneLengths(jntMatrices)
+        sameInputs(inputs, otherInputs, tolerance)
+        chainErrors(jntMatrixFrames, otherJntMatrixFrames)
+        errorSummary(positionErrors, rotationErrors, frames, positionTolerance, rotationTolerance)
+
+    NOTES: Matrices use the flat 16 float layout from matrixMath.
+           fk to ik doesn't copy rotate values, so it holds when the fk controls' orients, rotate orders or parents
+           differ from the ik joints'. It assumes the fk controls drive their fk joints rigidly and the groups between
+           the controls aren't animated, both are read once from the current pose.
+           Residuals are the largest distance, in scene units, between the fk joints and where the ik chain is expected to land.
+           chainErrors measures where the chains actually are. It assumes matching joints of the two chains share their orientation,
+           like the duplicated ik and fk chains of the Avatarah rigs.
+
+'''
+
+import matrixMath
+import chainSolver
+
+def solvePoleVector(startPos, midPos, endPos, pvOffset=2):
+    '''
+        Returns the pole vector position. The vector from the midpoint of start and end to the mid joint
+        is extended by pvOffset, the same placement ikToFk used with its temporary locator.
+    '''
+    midpnt = matrixMath.scaleVector(matrixMath.addVector(startPos, endPos), 0.5)
+    pvOrigin = matrixMath.subVector(midPos, midpnt)
+    return matrixMath.addVector(matrixMath.scaleVector(pvOrigin, pvOffset), midpnt)
+
+def ankleRestOffset(fkAnkleParentRest, ikAnkleParentRest):
+    '''
+        Returns the rotation offset from the fk ankle parent to the ik ankle parent at rest.
+        Translation is zeroed so the ik control lands on the fk ankle control's position.
+    '''
+    offset = matrixMath.multMatrix(matrixMath.normalizeMatrix(ikAnkleParentRest),
+                                   matrixMath.inverseMatrix(matrixMath.normalizeMatrix(fkAnkleParentRest)))
+    return matrixMath.setTranslation(offset, (0.0, 0.0, 0.0))
+
+def _endMatrix(fkJntMatrices, endMatrix, endOffset):
+    if endMatrix is None:
+        endMatrix = fkJntMatrices[-1]
+    ikMatrix = matrixMath.normalizeMatrix(endMatrix)
+    if endOffset is not None:
+        ikMatrix = matrixMath.multMatrix(endOffset, ikMatrix)
+    return ikMatrix
+
+def solveIkToFk(fkJntMatrices, pvOffset=2, endMatrix=None, endOffset=None):
+    '''
+        Returns the world matrices of the ik control and pole vector control that match the fk chain.
+        endMatrix is what the ik control follows, the last fk joint if not given.
+        endOffset is multiplied in front of endMatrix, ex: the leg's ankleRestOffset.
+        Only the translation of the pole vector matrix is meaningful.
+        Chains longer than three joints use the average of their inner joints, see chainSolver.poleGuess.
+    '''
+    ikMatrix = _endMatrix(fkJntMatrices, endMatrix, endOffset)
+    pvPos = chainSolver.poleGuess([matrixMath.getTranslation(m) for m in fkJntMatrices], pvOffset)
+    pvMatrix = matrixMath.setTranslation(matrixMath.identityMatrix(), pvPos)
+    return ikMatrix, pvMatrix
+
+def solveIkToFkChain(fkJntMatrices, ikJntMatrices, restPvPosition, pvOffset=2, endMatrix=None, endOffset=None, tolerance=1e-3, maxIterations=30):
+    '''
+        Like solveIkToFk, but the pole vector is solved against the ik chain's current pose (ikJntMatrices)
+        and pole vector position, so chains of any length and joints off the bend plane are matched.
+        Returns the ik control matrix, pole vector matrix and the residual of the solve.
+    '''
+    ikMatrix = _endMatrix(fkJntMatrices, endMatrix, endOffset)
+    pvPos, residual, evaluations = chainSolver.solveChainPole([matrixMath.getTranslation(m) for m in fkJntMatrices],
+                                                              [matrixMath.getTranslation(m) for m in ikJntMatrices],
+                                                              restPvPosition, pvOffset, tolerance, maxIterations)
+    pvMatrix = matrixMath.setTranslation(matrixMath.identityMatrix(), pvPos)
+    return ikMatrix, pvMatrix, residual
+
+def solveIkToFkRange(fkJntMatrixFrames, pvOffset=2, endMatrixFrames=None, endOffset=None, ikJntMatrices=None, restPvPosition=None,
+                     tolerance=1e-3, maxIterations=30):
+    '''
+        Solves every frame of a bake in one pass.
+        fkJntMatrixFrames is a list, per joint, of the joint's world matrix on each frame.
+        With ikJntMatrices and restPvPosition, the ik chain's pose on the current frame, every frame is solved by solveIkToFkChain.
+        Returns a list of ik control matrices, a list of pole vector matrices and a list of residuals, one per frame.
+        Residuals are None for frames solved without the ik chain.
+    '''
+    numFrames = len(fkJntMatrixFrames[0])
+    if endMatrixFrames is None:
+        endMatrixFrames = [None]*numFrames
+    ikMatrices = []
+    pvMatrices = []
+    residuals = []
+    for frame in range(numFrames):
+        fkJntMatrices = [jntFrames[frame] for jntFrames in fkJntMatrixFrames]
+        if ikJntMatrices is not None:
+            ikMatrix, pvMatrix, residual = solveIkToFkChain(fkJntMatrices, ikJntMatrices, restPvPosition, pvOffset, 
+                                                            endMatrixFrames[frame], endOffset, tolerance, maxIterations)
+        else:
+            ikMatrix, pvMatrix = solveIkToFk(fkJntMatrices, pvOffset, endMatrixFrames[frame], endOffset)
+            residual = None
+        ikMatrices.append(ikMatrix)
+        pvMatrices.append(pvMatrix)
+        residuals.append(residual)
+    return ikMatrices, pvMatrices, residuals
+
+def _solveIkToFkRangeArgs(args):
+    return solveIkToFkRange(*args)
+
+def solveLimbs(limbArgs, processes=0):
+    '''
+        Solves several limbs' frame ranges together. limbArgs is a list of solveIkToFkRange argument tuples.
+        With processes above 1 the limbs are spread across a process pool,
+        only worth it for long bakes and only from mayapy, since the workers re-launch the python executable.
+    '''
+    if processes > 1 and len(limbArgs) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(min(processes, len(limbArgs)))
+        try:
+            return pool.map(_solveIkToFkRangeArgs, limbArgs)
+        finally:
+            pool.close()
+            pool.join()
+    return [solveIkToFkRange(*args) for args in limbArgs]
+
+def _rotation(matrix):
+    return matrixMath.normalizeMatrix(matrixMath.setTranslation(matrix, (0.0, 0.0, 0.0)))
+
+def fkChainOffsets(fkCtlMatrices, fkCtlParentMatrices, fkJntMatrices):
+    '''
+        Returns the fk chain's fixed relationships as rotation matrices, from world matrices read on one frame:
+        jointOffsets, each fk joint's orientation relative to its control,
+        and parentOffsets, each control's parent orientation relative to the control above it, None for the first control.
+    '''
+    ctlRotations = [_rotation(matrix) for matrix in fkCtlMatrices]
+    jointOffsets = [matrixMath.multMatrix(_rotation(jnt), matrixMath.transposeMatrix(ctl)) for jnt, ctl in zip(fkJntMatrices, ctlRotations)]
+    parentOffsets = [None] + [matrixMath.multMatrix(_rotation(parent), matrixMath.transposeMatrix(ctl)) 
+                              for parent, ctl in zip(fkCtlParentMatrices[1:], ctlRotations[:-1])]
+    return jointOffsets, parentOffsets
+
+def solveFkToIkRange(ikJntMatrixFrames, rootParentFrames, jointOffsets, parentOffsets, ctrlStates, previousRotations=None):
+    '''
+        Returns, per fk control, its rotate values on every frame that line each fk joint up with its ik joint.
+        ikJntMatrixFrames is a list, per joint, of the ik joint's world matrix on each frame and
+        rootParentFrames the first fk control's parent world matrix on each frame.
+        ctrlStates are the fk controls' matrixSnap.getSnapState dictionaries, for their rotate order, rotateAxis and jointOrient.
+        Controls are solved down the chain, each parent follows the orientation solved for the control above it,
+        then each control's rotations are euler filtered in rotate order, the first frame against previousRotations if given.
+    '''
+    numFrames = len(ikJntMatrixFrames[0])
+    #everything that doesn't change per frame is worked out once, the rotations are orthonormal so they're inverted by transposing
+    ctlOffsets = [matrixMath.transposeMatrix(offset) for offset in jointOffsets]
+    axisInverses = [matrixMath.transposeMatrix(matrixMath.eulerToMatrix(state.get('rotateAxis', (0.0, 0.0, 0.0)))) for state in ctrlStates]
+    orientInverses = [matrixMath.transposeMatrix(matrixMath.eulerToMatrix(state.get('jointOrient', (0.0, 0.0, 0.0)))) for state in ctrlStates]
+    rotateOrders = [state.get('rotateOrder', 0) for state in ctrlStates]
+    rotations = [[] for state in ctrlStates]
+    for frame in range(numFrames):
+        parentMatrix = _rotation(rootParentFrames[frame])
+        for i in range(len(ctrlStates)):
+            if i:
+                parentMatrix = matrixMath.multMatrix(parentOffsets[i], ctlMatrix)
+            ctlMatrix = matrixMath.multMatrix(ctlOffsets[i], _rotation(ikJntMatrixFrames[i][frame]))
+            #local rotation is rotateAxis * rotate * jointOrient, like matrixMath.localRotation
+            localRot = matrixMath.multMatrix(ctlMatrix, matrixMath.transposeMatrix(parentMatrix))
+            localRot = matrixMath.multMatrix(matrixMath.multMatrix(axisInverses[i], localRot), orientInverses[i])
+            rotations[i].append(matrixMath.matrixToEuler(localRot, rotateOrders[i]))
+    if previousRotations is None:
+        previousRotations = [None]*len(ctrlStates)
+    return [matrixMath.filterEulerList(rots, state.get('rotateOrder', 0), previous) 
+            for rots, state, previous in zip(rotations, ctrlStates, previousRotations)]
+
+def _flatten(inputs):
+    if inputs is None:
+        return [None]
+    if isinstance(inputs, (list, tuple)):
+        values = []
+        for item in inputs:
+            values.extend(_flatten(item))
+        return values
+    return [inputs]
+
+def boneLengths(jntMatrices):
+    '''
+        Returns the distances between consecutive joints of a chain, from their world matrices.
+    '''
+    points = [matrixMath.getTranslation(matrix) for matrix in jntMatrices]
+    return [matrixMath.vectorLength(matrixMath.subVector(point, nextPoint)) for point, nextPoint in zip(points, points[1:])]
+
+def sameInputs(inputs, otherInputs, tolerance=1e-5):
+    '''
+        Returns True if two sets of solve inputs, nested lists of matrices and positions, match within tolerance.
+        Used to tell if a cached solve can be reused.
+    '''
+    values = _flatten(inputs)
+    otherValues = _flatten(otherInputs)
+    if len(values) != len(otherValues):
+        return False
+    for value, otherValue in zip(values, otherValues):
+        if value is None or otherValue is None:
+            if value is not otherValue:
+                return False
+        elif abs(value - otherValue) > tolerance:
+            return False
+    return True
+
+def chainErrors(jntMatrixFrames, otherJntMatrixFrames):
+    '''
+        Returns the positional and rotational error between two chains on each frame.
+        Both are lists, per joint, of the joint's world matrix on each frame, ex: the fk joints and the ik joints.
+        The root joint is skipped, the mid joints and the end joint are compared. A frame's positional error is the largest distance
+        between matching joints in scene units, its rotational error the largest angle between their orientations in degrees.
+    '''
+    #every joint of every frame in one flat pass, then the largest per frame
+    pairs = [(mtx, otherMtx) for jntFrames, otherFrames in zip(jntMatrixFrames[1:], otherJntMatrixFrames[1:]) 
+                             for mtx, otherMtx in zip(jntFrames, otherFrames)]
+    positions = [matrixMath.vectorLength(matrixMath.subVector(matrixMath.getTranslation(mtx), matrixMath.getTranslation(otherMtx))) 
+                 for mtx, otherMtx in pairs]
+    angles = [matrixMath.rotationAngle(mtx, otherMtx) for mtx, otherMtx in pairs]
+    numFrames = len(jntMatrixFrames[0])
+    positionErrors = [max(positions[frame::numFrames] or [0.0]) for frame in range(numFrames)]
+    rotationErrors = [max(angles[frame::numFrames] or [0.0]) for frame in range(numFrames)]
+    return positionErrors, rotationErrors
+
+def errorSummary(positionErrors, rotationErrors, frames, positionTolerance=None, rotationTolerance=None):
+    '''
+        Returns a dictionary of the max and mean of chainErrors' results, the per frame errors,
+        and the frames whose errors are above either tolerance under flagged. Tolerances that aren't given aren't checked.
+    '''
+    flagged = [frame for frame, position, rotation in zip(frames, positionErrors, rotationErrors)
+               if (positionTolerance is not None and position > positionTolerance) or 
+                  (rotationTolerance is not None and rotation > rotationTolerance)]
+    return {'frames' : list(frames),
+            'position' : list(positionErrors),
+            'rotation' : list(rotationErrors),
+            'maxPosition' : max(positionErrors) if positionErrors else 0.0,
+            'meanPosition' : sum(positionErrors)/len(positionErrors) if positionErrors else 0.0,
+            'maxRotation' : max(rotationErrors) if rotationErrors else 0.0,
+            'meanRotation' : sum(rotationErrors)/len(rotationErrors) if rotationErrors else 0.0,
+            'flagged' : flagged}
@@ -0,0 +1,91 @@
+'''
+    MODULE: keyReducer
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.0
+
+    USAGE: Error bounded key reduction for the baked animation of ikFkMatching and GlobalPositioning.
+           A bake samples every frame, the reduction keeps the fewest of those samples that linear interpolation
+           can rebuild every frame from within a tolerance. Can be run without Maya:
+               frames, values = reduceKeys(frames, values, 0.01)
+           animIO.writeKeys reduces with it when given a tolerance and keys what's left with linear tangents.
+
+    List of functions:
+        simplify(frames, values, tolerance)
+        reduceKeys(frames, values, tolerance)
+        channelTolerance(channel, positionTolerance, rotationTolerance)
+        newReport()
+        compressionRatio(report)
+        describe(report)
+
+    NOTES: The samples are split where they're furthest from the line between the ends of a span, until every sample
+           is within tolerance of its span's line, the same as Douglas-Peucker with the error measured on the value.
+           The reduced keys need linear tangents for the tolerance to hold between them, spline tangents overshoot.
+           Tolerances are per channel in ui units, scene units for translate channels and degrees for rotate channels.
+           A report counts the frames sampled and the keys written, their ratio is the bake's compression ratio.
+
+'''
+
+def simplify(frames, values, tolerance):
+    '''
+        Returns the indices of the samples to keep so straight lines between them stay within tolerance of every sample.
+        The first and last samples are always kept.
+    '''
+    count = len(values)
+    if count < 3:
+        return list(range(count))
+    keep = [0, count - 1]
+    spans = [(0, count - 1)]
+    while spans:
+        first, last = spans.pop()
+        if last - first < 2:
+            continue
+        startFrame = frames[first]
+        startValue = values[first]
+        slope = (values[last] - startValue)/(frames[last] - startFrame)
+        #every sample of the span is measured against its line in one pass
+        errors = [abs(startValue + slope*(frame - startFrame) - value)
+                  for frame, value in zip(frames[first+1:last], values[first+1:last])]
+        worst = max(errors)
+        if worst > tolerance:
+            split = first + 1 + errors.index(worst)
+            keep.append(split)
+            spans.append((first, split))
+            spans.append((split, last))
+    return sorted(keep)
+
+def reduceKeys(frames, values, tolerance):
+    '''
+        Returns the frames and values left after simplify.
+    '''
+    keep = simplify(frames, values, tolerance)
+    return [frames[i] for i in keep], [values[i] for i in keep]
+
+def channelTolerance(channel, positionTolerance, rotationTolerance):
+    '''
+        Returns rotationTolerance for rotate channels, ex: 'rotateX', and positionTolerance for every other channel.
+    '''
+    return rotationTolerance if channel.startswith('rotate') else positionTolerance
+
+def newReport():
+    '''
+        Returns an empty report for animIO.writeKeys to count the frames sampled and the keys written in.
+    '''
+    return {'sampled' : 0, 'written' : 0}
+
+def compressionRatio(report):
+    '''
+        Returns how many times fewer keys were written than frames were sampled.
+    '''
+    if not report['written']:
+        return 1.0
+    return float(report['sampled'])/report['written']
+
+def describe(report):
+    '''
+        Returns a line for the script editor, ex: 'Reduced 3600 baked keys to 240, 15.0x smaller'.
+    '''
+    return 'Reduced %d baked keys to %d, %.1fx smaller' %(report['sampled'], report['written'], compressionRatio(report))
@@ -0,0 +1,208 @@
+'''
+    MODULE: matrixCache
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.1
+
+    USAGE: World matrix cache shared by ikFkMatching and GlobalPositioning. The sceneBackend and animIO read matrices through it,
+           so a joint read several times in one operation is only evaluated once.
+           Matrices are only kept between beginOperation and endOperation, sceneTransaction and chunkedTask run them:
+               beginOperation()
+               matrix = getCache().get('worldMatrix', 'ik_left_arm', None, backend.readWorldMatrix)
+               endOperation()
+
+    List of functions:
+        getCache()
+        invalidate()
+        invalidateNode(node)
+        beginOperation()
+        endOperation()
+    List of methods from class MatrixCache:
+        __init__(maxSize)
+        get(kind, node, frame, read)
+        invalidate()
+        invalidateNode(node)
+        beginOperation()
+        endOperation()
+        watch(node)
+        installCallbacks()
+        removeCallbacks(nodesOnly)
+
+    NOTES: Entries are keyed by (kind, node, frame, generation), frame None is the current time.
+           A node's entries are dropped when it gets dirty, every node read through the cache during an operation is watched
+           with a dirty callback, so a write also drops the children and ik chains it moves. The tools also drop the nodes they write themselves.
+           The dirty callbacks are removed and every entry dropped when the outermost operation ends, so playback isn't slowed down
+           by them and nothing read before the animator's next edit is served afterwards. Outside an operation reads aren't kept.
+           The generation goes up, dropping everything, on a time change or when a scene is opened.
+           Once there are more than maxSize entries the least recently used ones are dropped.
+
+'''
+
+import collections
+
+_cache = None
+
+def getCache():
+    '''
+        Returns the cache shared by the tools, creating it the first time it's needed.
+        Dirty, time change and scene callbacks are installed when running inside Maya.
+    '''
+    global _cache
+    if _cache is None:
+        _cache = MatrixCache()
+        try:
+            _cache.installCallbacks()
+        except ImportError:
+            pass
+    return _cache
+
+def invalidate(*args):
+    '''
+        Invalidates the shared cache if it's been made.
+    '''
+    if _cache is not None:
+        _cache.invalidate()
+
+def invalidateNode(node):
+    '''
+        Drops node's entries from the shared cache if it's been made. Called by the tools after they write to node.
+    '''
+    if _cache is not None:
+        _cache.invalidateNode(node)
+
+def beginOperation():
+    '''
+        Starts keeping the matrices read through the shared cache, until the matching endOperation.
+    '''
+    getCache().beginOperation()
+
+def endOperation():
+    '''
+        Ends an operation started by beginOperation, the outermost one drops the shared cache's entries and dirty callbacks.
+    '''
+    if _cache is not None:
+        _cache.endOperation()
+
+class MatrixCache:
+
+    def __init__(self, maxSize=20000):
+        #instance variables
+        self.maxSize = maxSize
+        self.entries = collections.OrderedDict()
+        self.nodeKeys = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.callbackIds = []
+        self.watched = {}
+        self.om2 = None
+        self.operations = 0
+
+    def get(self, kind, node, frame, read):
+        '''
+            Returns the cached value of kind, ex: 'worldMatrix', for node on frame.
+            On a miss read(node) is called and its result kept. The value is returned as a new list.
+        '''
+        node = str(node)
+        if not self.operations:
+            #nothing is watched outside an operation, a kept value could be stale by the next read
+            self.misses += 1
+            return list(read(node))
+        key = (kind, node, frame, self.generation)
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+            value = tuple(read(node))
+            self.watch(node)
+            while len(self.entries) >= self.maxSize:
+                oldKey, oldValue = self.entries.popitem(last=False)
+                self.nodeKeys[oldKey[1]].discard(oldKey)
+            self.nodeKeys.setdefault(node, set()).add(key)
+        else:
+            self.hits += 1
+        #reinserted so the most recently used entries are at the end
+        self.entries[key] = value
+        return list(value)
+
+    def invalidate(self, *args):
+        '''
+            Starts a new generation, every cached entry is dropped. Accepts and ignores the arguments Maya passes to callbacks.
+        '''
+        self.generation += 1
+        self.entries.clear()
+        self.nodeKeys.clear()
+
+    def invalidateNode(self, node):
+        '''
+            Drops every entry of node.
+        '''
+        for key in self.nodeKeys.pop(str(node), ()):
+            self.entries.pop(key, None)
+
+    def beginOperation(self):
+        '''
+            Starts keeping what's read, operations can be nested.
+        '''
+        self.operations += 1
+
+    def endOperation(self):
+        '''
+            Ends an operation. When the outermost one ends the dirty callbacks are removed and every entry is dropped.
+        '''
+        self.operations = max(0, self.operations - 1)
+        if not self.operations:
+            self.removeCallbacks(nodesOnly=True)
+            self.invalidate()
+
+    def watch(self, node):
+        '''
+            Invalidates the cache whenever node gets dirty, until the operation ends. Does nothing until installCallbacks has been run.
+        '''
+        if self.om2 is None or node in self.watched:
+            return
+        sel = self.om2.MSelectionList()
+        sel.add(node)
+        self.watched[node] = self.om2.MNodeMessage.addNodeDirtyPlugCallback(sel.getDependNode(0), 
+                                                                             lambda *args: self.invalidateNode(node))
+
+    def _sceneChanged(self, *args):
+        #the watched nodes are gone with the old scene
+        self.removeCallbacks(nodesOnly=True)
+        self.invalidate()
+
+    def installCallbacks(self):
+        '''
+            Invalidates the cache on time changes and when a scene is opened, and watches the nodes read during operations from then on.
+        '''
+        import maya.api.OpenMaya as om2
+        self.removeCallbacks()
+        self.om2 = om2
+        self.callbackIds = [om2.MEventMessage.addEventCallback('timeChanged', self.invalidate),
+                            om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterOpen, self._sceneChanged),
+                            om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterNew, self._sceneChanged)]
+        return self.callbackIds
+
+    def removeCallbacks(self, nodesOnly=False):
+        '''
+            Removes the callbacks added by installCallbacks and watch, or only the ones added by watch.
+        '''
+        if self.om2 is None:
+            return
+        ids = list(self.watched.values())
+        self.watched = {}
+        if not nodesOnly:
+            ids += self.callbackIds
+            self.callbackIds = []
+        if ids:
+            try:
+                self.om2.MMessage.removeCallbacks(ids)
+            except RuntimeError:
+                #callbacks of deleted nodes are already gone
+                for callbackId in ids:
+                    try:
+                        self.om2.MMessage.removeCallback(callbackId)
+                    except RuntimeError:
+                        pass
@@ -0,0 +1,316 @@
+'''
+    MODULE: matrixMath
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.4
+
+    USAGE: Pure python matrix and vector math shared by the animation tools.
+           Does not need Maya, so the solvers built on it can run headless.
+           Matrices are flat lists of 16 floats in Maya's row-major order,
+           the same layout returned by xform(obj, q=True, ws=True, matrix=True).
+           Points are row vectors, so a child's world matrix is local * parentWorld.
+           Rotations are in degrees, rotate orders use Maya's rotateOrder enum (0=xyz ... 5=zyx).
+
+    List of functions:
+        identityMatrix()
+        multMatrix(a, b)
+        multMatrices(matrices, m)
+        inverseMatrix(m)
+        transposeMatrix(m)
+        getTranslation(m)
+        getRotation(m)
+        setTranslation(m, translation)
+        normalizeMatrix(m)
+        isEquivalent(a, b, tolerance)
+        rotationAngle(a, b)
+        addVector(a, b)
+        subVector(a, b)
+        scaleVector(v, scalar)
+        dotVector(a, b)
+        crossVector(a, b)
+        vectorLength(v)
+        normalizeVector(v)
+        eulerToMatrix(rotation, rotateOrder)
+        matrixToEuler(m, rotateOrder)
+        matrixToQuaternion(m)
+        quaternionToMatrix(q)
+        composeMatrix(translation, rotation, rotateOrder)
+        localTransform(worldMatrix, parentInverseMatrix, rotateOrder)
+        localRotation(worldMatrix, parentInverseMatrix, rotateOrder, rotateAxis, jointOrient)
+        filterEuler(rotation, previous, rotateOrder)
+        filterEulerList(rotations, rotateOrder, previous)
+
+    NOTES: Scale and shear are ignored when converting to rotations, normalizeMatrix them out first if needed.
+
+'''
+
+import math
+
+#axis order for each value of the rotateOrder attribute
+rotateOrderAxes = [(0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0)]
+
+def identityMatrix():
+    '''
+        Returns a new identity matrix.
+    '''
+    return [1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0]
+
+def multMatrix(a, b):
+    '''
+        Returns a * b. With row vectors this applies a first, then b.
+    '''
+    result = [0.0]*16
+    for row in range(4):
+        a0, a1, a2, a3 = a[row*4:row*4+4]
+        for col in range(4):
+            result[row*4+col] = a0*b[col] + a1*b[4+col] + a2*b[8+col] + a3*b[12+col]
+    return result
+
+def multMatrices(matrices, m):
+    '''
+        Returns every matrix in matrices multiplied by m.
+    '''
+    return [multMatrix(a, m) for a in matrices]
+
+def inverseMatrix(m):
+    '''
+        Returns the inverse of a 4x4 matrix using Gauss-Jordan elimination.
+    '''
+    work = [list(m[row*4:row*4+4]) + [1.0 if row == col else 0.0 for col in range(4)] for row in range(4)]
+    for col in range(4):
+        pivot = max(range(col, 4), key=lambda row: abs(work[row][col]))
+        if abs(work[pivot][col]) < 1e-12:
+            raise ValueError('matrix is singular and cannot be inverted')
+        work[col], work[pivot] = work[pivot], work[col]
+        pivotVal = work[col][col]
+        work[col] = [val/pivotVal for val in work[col]]
+        for row in range(4):
+            if row != col:
+                factor = work[row][col]
+                if factor:
+                    work[row] = [val - factor*pivotRowVal for val, pivotRowVal in zip(work[row], work[col])]
+    return [work[row][4+col] for row in range(4) for col in range(4)]
+
+def transposeMatrix(m):
+    '''
+        Returns the transpose of the matrix, the inverse of a pure rotation matrix.
+    '''
+    return [m[col*4 + row] for row in range(4) for col in range(4)]
+
+def getTranslation(m):
+    '''
+        Returns the translation row of the matrix.
+    '''
+    return [m[12], m[13], m[14]]
+
+def getRotation(m):
+    '''
+        Returns a copy of the matrix with scale and translation removed.
+    '''
+    return normalizeMatrix(setTranslation(m, (0.0, 0.0, 0.0)))
+
+def setTranslation(m, translation):
+    '''
+        Returns a copy of the matrix with the translation row replaced.
+    '''
+    result = list(m)
+    result[12:15] = [float(val) for val in translation]
+    return result
+
+def normalizeMatrix(m):
+    '''
+        Returns a copy of the matrix with scale removed from the three axis rows.
+        Translation is left as is.
+    '''
+    result = list(m)
+    for row in range(3):
+        axis = normalizeVector(m[row*4:row*4+3])
+        result[row*4:row*4+3] = axis
+    return result
+
+def isEquivalent(a, b, tolerance=1e-4):
+    '''
+        Returns True if every value of the two matrices is within tolerance, like MMatrix.isEquivalent.
+    '''
+    if a is None or b is None:
+        return False
+    for valA, valB in zip(a, b):
+        if abs(valA - valB) > tolerance:
+            return False
+    return True
+
+def rotationAngle(a, b):
+    '''
+        Returns the angle, in degrees, of the rotation between the orientations of two matrices. Scale is ignored.
+    '''
+    a = normalizeMatrix(a)
+    b = normalizeMatrix(b)
+    #the trace of a * b^T is the sum of the products of their matching rotation values
+    trace = sum(a[i]*b[i] for i in (0, 1, 2, 4, 5, 6, 8, 9, 10))
+    return math.degrees(math.acos(max(-1.0, min(1.0, (trace - 1.0)*0.5))))
+
+def addVector(a, b):
+    return [a[0]+b[0], a[1]+b[1], a[2]+b[2]]
+
+def subVector(a, b):
+    return [a[0]-b[0], a[1]-b[1], a[2]-b[2]]
+
+def scaleVector(v, scalar):
+    return [v[0]*scalar, v[1]*scalar, v[2]*scalar]
+
+def dotVector(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+def crossVector(a, b):
+    return [a[1]*b[2] - a[2]*b[1],
+            a[2]*b[0] - a[0]*b[2],
+            a[0]*b[1] - a[1]*b[0]]
+
+def vectorLength(v):
+    return math.sqrt(dotVector(v, v))
+
+def normalizeVector(v):
+    '''
+        Returns the unit vector of v, or v unchanged if it has no length.
+    '''
+    length = vectorLength(v)
+    if length < 1e-12:
+        return list(v)
+    return scaleVector(v, 1.0/length)
+
+def _axisRotation(axis, angle):
+    '''
+        Returns the 3x3 row-vector rotation for a single axis, as a list of rows.
+    '''
+    c = math.cos(angle)
+    s = math.sin(angle)
+    if axis == 0:
+        return [[1.0, 0.0, 0.0], [0.0, c, s], [0.0, -s, c]]
+    if axis == 1:
+        return [[c, 0.0, -s], [0.0, 1.0, 0.0], [s, 0.0, c]]
+    return [[c, s, 0.0], [-s, c, 0.0], [0.0, 0.0, 1.0]]
+
+def _mult3(a, b):
+    return [[sum(a[row][i]*b[i][col] for i in range(3)) for col in range(3)] for row in range(3)]
+
+def eulerToMatrix(rotation, rotateOrder=0):
+    '''
+        Returns the rotation matrix for euler angles in degrees, applied in the given rotate order.
+    '''
+    first, second, third = rotateOrderAxes[rotateOrder]
+    rot = _mult3(_axisRotation(first, math.radians(rotation[first])), _axisRotation(second, math.radians(rotation[second])))
+    rot = _mult3(rot, _axisRotation(third, math.radians(rotation[third])))
+    return [rot[0][0], rot[0][1], rot[0][2], 0.0,
+            rot[1][0], rot[1][1], rot[1][2], 0.0,
+            rot[2][0], rot[2][1], rot[2][2], 0.0,
+            0.0, 0.0, 0.0, 1.0]
+
+def matrixToEuler(m, rotateOrder=0):
+    '''
+        Returns the euler angles in degrees of the matrix's rotation for the given rotate order.
+    '''
+    i, j, k = rotateOrderAxes[rotateOrder]
+    #even permutations of xyz have positive parity
+    parity = 1.0 if rotateOrder in (0, 1, 2) else -1.0
+    rows = [normalizeVector(m[row*4:row*4+3]) for row in range(3)]
+    sinJ = -parity*rows[i][k]
+    cosJ = math.sqrt(rows[i][i]*rows[i][i] + rows[i][j]*rows[i][j])
+    angles = [0.0, 0.0, 0.0]
+    angles[j] = math.atan2(sinJ, cosJ)
+    if cosJ > 1e-9:
+        angles[i] = math.atan2(parity*rows[j][k], rows[k][k])
+        angles[k] = math.atan2(parity*rows[i][j], rows[i][i])
+    else:
+        #gimbal lock, all of the remaining rotation is put on the first axis
+        angles[i] = math.atan2(-parity*rows[k][j], rows[j][j])
+        angles[k] = 0.0
+    return [math.degrees(angle) for angle in angles]
+
+def matrixToQuaternion(m):
+    '''
+        Returns the rotation of the matrix as a quaternion [x, y, z, w].
+    '''
+    rows = [normalizeVector(m[row*4:row*4+3]) for row in range(3)]
+    trace = rows[0][0] + rows[1][1] + rows[2][2]
+    if trace > 0.0:
+        s = math.sqrt(trace + 1.0)*2.0
+        quat = [(rows[1][2] - rows[2][1])/s, (rows[2][0] - rows[0][2])/s, (rows[0][1] - rows[1][0])/s, 0.25*s]
+    elif rows[0][0] > rows[1][1] and rows[0][0] > rows[2][2]:
+        s = math.sqrt(1.0 + rows[0][0] - rows[1][1] - rows[2][2])*2.0
+        quat = [0.25*s, (rows[0][1] + rows[1][0])/s, (rows[2][0] + rows[0][2])/s, (rows[1][2] - rows[2][1])/s]
+    elif rows[1][1] > rows[2][2]:
+        s = math.sqrt(1.0 + rows[1][1] - rows[0][0] - rows[2][2])*2.0
+        quat = [(rows[0][1] + rows[1][0])/s, 0.25*s, (rows[1][2] + rows[2][1])/s, (rows[2][0] - rows[0][2])/s]
+    else:
+        s = math.sqrt(1.0 + rows[2][2] - rows[0][0] - rows[1][1])*2.0
+        quat = [(rows[2][0] + rows[0][2])/s, (rows[1][2] + rows[2][1])/s, 0.25*s, (rows[0][1] - rows[1][0])/s]
+    return quat
+
+def quaternionToMatrix(q):
+    '''
+        Returns the rotation matrix of the quaternion [x, y, z, w].
+    '''
+    x, y, z, w = q
+    return [1.0 - 2.0*(y*y + z*z), 2.0*(x*y + z*w), 2.0*(x*z - y*w), 0.0,
+            2.0*(x*y - z*w), 1.0 - 2.0*(x*x + z*z), 2.0*(y*z + x*w), 0.0,
+            2.0*(x*z + y*w), 2.0*(y*z - x*w), 1.0 - 2.0*(x*x + y*y), 0.0,
+            0.0, 0.0, 0.0, 1.0]
+
+def composeMatrix(translation=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), rotateOrder=0):
+    '''
+        Returns a matrix from a translation and euler rotation in degrees.
+    '''
+    return setTranslation(eulerToMatrix(rotation, rotateOrder), translation)
+
+def localTransform(worldMatrix, parentInverseMatrix, rotateOrder=0):
+    '''
+        Returns the local translation and euler rotation that put a node at worldMatrix under its parent.
+    '''
+    local = multMatrix(worldMatrix, parentInverseMatrix)
+    return getTranslation(local), matrixToEuler(local, rotateOrder)
+
+def localRotation(worldMatrix, parentInverseMatrix, rotateOrder=0, rotateAxis=(0.0, 0.0, 0.0), jointOrient=(0.0, 0.0, 0.0)):
+    '''
+        Returns the rotate values that give a node worldMatrix's orientation under its parent,
+        taking the node's rotateAxis and jointOrient into account. Translation and scale are ignored.
+    '''
+    localRot = normalizeMatrix(multMatrix(setTranslation(worldMatrix, (0.0, 0.0, 0.0)), parentInverseMatrix))
+    #local rotation is rotateAxis * rotate * jointOrient, so both are taken back out
+    rotMatrix = multMatrix(inverseMatrix(eulerToMatrix(rotateAxis)), localRot)
+    rotMatrix = multMatrix(rotMatrix, inverseMatrix(eulerToMatrix(jointOrient)))
+    return matrixToEuler(rotMatrix, rotateOrder)
+
+def _wrapAngles(rotation, previous):
+    return [angle + 360.0*round((prev - angle)/360.0) for angle, prev in zip(rotation, previous)]
+
+def filterEuler(rotation, previous, rotateOrder=0):
+    '''
+        Returns the euler rotation equal to rotation that is closest to previous.
+        Both the wrapped angles and the flipped solution for the rotate order are tried.
+    '''
+    i, j, k = rotateOrderAxes[rotateOrder]
+    flipped = list(rotation)
+    flipped[i] += 180.0
+    flipped[j] = 180.0 - flipped[j]
+    flipped[k] += 180.0
+    candidates = [_wrapAngles(rotation, previous), _wrapAngles(flipped, previous)]
+    return min(candidates, key=lambda rot: sum(abs(angle - prev) for angle, prev in zip(rot, previous)))
+
+def filterEulerList(rotations, rotateOrder=0, previous=None):
+    '''
+        Returns a list of euler rotations, ex: one per frame, with flips and 360 degree jumps removed.
+        The first rotation is filtered against previous if given.
+    '''
+    filtered = []
+    for rotation in rotations:
+        if previous is not None:
+            rotation = filterEuler(rotation, previous, rotateOrder)
+        filtered.append(rotation)
+        previous = rotation
+    return filtered
@@ -0,0 +1,123 @@
+'''
+    MODULE: matrixSnap
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.3
+
+    USAGE: Shared snapping for ikFkMatching and GlobalPositioning. Replaces the create/read/delete constraint round trip
+           by computing the driven node's local translate and rotate straight from the driver's world matrix
+           and the driven node's parentInverseMatrix.
+               snap('fk_left_wrist', 'ik_left_arm', 'parent')
+               snapToMatrix('left_arm_poleVec', matrix, 'point')
+
+    List of functions:
+        solveSnap(driverMatrix, driverPivot, parentInverseMatrix, mode, rotateOrder, rotatePivot, rotatePivotTranslate, rotateAxis, jointOrient)
+        multPoint(point, m)
+        getSnapState(driven)
+        snapToMatrix(driven, driverMatrix, mode, driverPivot, state, transaction)
+        snap(driver, driven, mode)
+        setChannels(driven, attr, values)
+
+    NOTES: Modes match the constraints they replace: 'point' (pointConstraint), 'orient' (orientConstraint) and 'parent' (parentConstraint).
+           Like the constraints, the driven node's rotate pivot is placed on the driver's rotate pivot.
+           Assumes the scale pivot sits on the rotate pivot, which is Maya's default.
+
+'''
+
+import maya.cmds as cmds
+import matrixMath
+import matrixCache
+import sceneBackend
+
+#constraint command names mapped to snap modes
+constraintModes = {'pointConstraint' : 'point',
+                   'orientConstraint' : 'orient',
+                   'parentConstraint' : 'parent'}
+
+def solveSnap(driverMatrix, driverPivot, parentInverseMatrix, mode='parent', rotateOrder=0,
+              rotatePivot=(0.0, 0.0, 0.0), rotatePivotTranslate=(0.0, 0.0, 0.0), rotateAxis=(0.0, 0.0, 0.0), jointOrient=(0.0, 0.0, 0.0)):
+    '''
+        Returns the local translate and rotate that snap the driven node onto the driver.
+        driverPivot is the driver's rotate pivot in world space.
+        Values that the mode doesn't change are returned as None.
+    '''
+    translate = None
+    rotate = None
+    if mode in ('point', 'parent'):
+        #the rotate pivot sits at rotatePivot + rotatePivotTranslate + translate in parent space
+        pivotLocal = matrixMath.getTranslation(multPoint(driverPivot, parentInverseMatrix))
+        translate = matrixMath.subVector(matrixMath.subVector(pivotLocal, rotatePivot), rotatePivotTranslate)
+    if mode in ('orient', 'parent'):
+        rotate = matrixMath.localRotation(driverMatrix, parentInverseMatrix, rotateOrder, rotateAxis, jointOrient)
+    return translate, rotate
+
+def multPoint(point, m):
+    '''
+        Returns a translation matrix of point transformed by m.
+    '''
+    return matrixMath.multMatrix(matrixMath.setTranslation(matrixMath.identityMatrix(), point), m)
+
+def getSnapState(driven):
+    '''
+        Reads everything solveSnap needs to know about the driven node, returned as keyword arguments.
+    '''
+    driven = str(driven)
+    backend = sceneBackend.getBackend()
+    state = {'parentInverseMatrix' : backend.getAttr(driven+'.parentInverseMatrix'),
+             'rotateOrder' : backend.getAttr(driven+'.rotateOrder'),
+             'rotatePivot' : backend.getAttr(driven+'.rotatePivot')[0],
+             'rotatePivotTranslate' : backend.getAttr(driven+'.rotatePivotTranslate')[0],
+             'rotateAxis' : backend.getAttr(driven+'.rotateAxis')[0]}
+    if backend.isJoint(driven):
+        state['jointOrient'] = backend.getAttr(driven+'.jointOrient')[0]
+    return state
+
+def setChannels(driven, attr, values):
+    '''
+        Sets the x, y, z channels of attr, skipping any that are locked or connected.
+        Returns the channels that couldn't be set.
+    '''
+    skipped = []
+    backend = sceneBackend.getBackend()
+    for axis, val in zip('XYZ', values):
+        plug = '%s.%s%s' %(driven, attr, axis)
+        if backend.isSettable(plug):
+            cmds.setAttr(plug, val)
+        else:
+            skipped.append(plug)
+    matrixCache.invalidateNode(driven)
+    return skipped
+
+def snapToMatrix(driven, driverMatrix, mode='parent', driverPivot=None, state=None, transaction=None):
+    '''
+        Snaps driven to a world matrix. driverPivot defaults to the matrix's translation.
+        state can be passed in from getSnapState when the same node is snapped several times.
+        With a sceneTransaction.SceneTransaction, the channels are queued on it instead of set right away.
+        Returns the local translate and rotate that were set.
+    '''
+    driven = str(driven)
+    if driverPivot is None:
+        driverPivot = matrixMath.getTranslation(driverMatrix)
+    if state is None:
+        state = getSnapState(driven)
+    translate, rotate = solveSnap(driverMatrix, driverPivot, mode=mode, **state)
+    setter = transaction.queueChannels if transaction else setChannels
+    skipped = []
+    if translate is not None:
+        skipped += setter(driven, 'translate', translate)
+    if rotate is not None:
+        skipped += setter(driven, 'rotate', rotate)
+    if skipped:
+        cmds.warning('Could not snap locked or connected channels: %s' %(', '.join(skipped)))
+    return translate, rotate
+
+def snap(driver, driven, mode='parent'):
+    '''
+        Snaps driven to driver's position and/or orientation.
+    '''
+    driverMatrix = cmds.xform(str(driver), q=True, ws=True, matrix=True)
+    driverPivot = cmds.xform(str(driver), q=True, ws=True, rotatePivot=True)
+    return snapToMatrix(driven, driverMatrix, mode, driverPivot)
@@ -0,0 +1,210 @@
+'''
+    MODULE: poseLibrary
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.1
+
+    USAGE: Compact binary store for GlobalPositioning captures. Poses, or captured frame ranges of poses,
+           are appended to one binary data file and indexed by name, rig namespace and control name.
+           The data file is memory-mapped and only the frames that are asked for are read.
+               lib = PoseLibrary('/path/to/library')
+               lib.savePose('idle_01', 'Astrea01:', ctrlNames, [matrices])
+               matrices = lib.readMatrices('idle_01', frameIndex=0)
+
+    List of methods from class PoseLibrary:
+        __init__(libraryDir)
+        poseNames(namespace)
+        getPose(name)
+        savePose(name, namespace, ctrlNames, matrixFrames, frames, pivotMatrix)
+        readMatrices(name, frameIndex, ctrlNames)
+        readFrames(name, ctrlNames)
+        deletePose(name)
+        wastedBytes()
+        compact()
+        close()
+
+    NOTES: Library layout: index.json holds one small entry per pose, poses.bin holds the matrices.
+           Each matrix is stored as its first three columns in little-endian float32 (12 values, 48 bytes),
+           the last column of a transform matrix is always 0, 0, 0, 1.
+           Saving over or deleting a pose leaves its old bytes in poses.bin, once they're more than compactRatio of the file
+           the library is compacted, poses.bin is rewritten with only the indexed poses. compact() can also be run at any time.
+
+'''
+
+import json
+import mmap
+import os
+import struct
+
+valuesPerMatrix = 12
+bytesPerMatrix = valuesPerMatrix*4
+
+def _packMatrix(m):
+    return struct.pack('<12f', m[0], m[1], m[2], m[4], m[5], m[6], m[8], m[9], m[10], m[12], m[13], m[14])
+
+def _unpackMatrices(data, offset, count):
+    values = struct.unpack_from('<%df' %(count*valuesPerMatrix), data, offset)
+    matrices = []
+    for i in range(0, len(values), valuesPerMatrix):
+        v = values[i:i+valuesPerMatrix]
+        matrices.append([v[0], v[1], v[2], 0.0,
+                         v[3], v[4], v[5], 0.0,
+                         v[6], v[7], v[8], 0.0,
+                         v[9], v[10], v[11], 1.0])
+    return matrices
+
+class PoseLibrary:
+
+    def __init__(self, libraryDir):
+        #instance variables
+        self.libraryDir = libraryDir
+        self.indexFile = os.path.join(libraryDir, 'index.json')
+        self.dataFile = os.path.join(libraryDir, 'poses.bin')
+        self.index = {}
+        self.compactRatio = 0.5
+        self._data = None
+        self._dataHandle = None
+        if os.path.exists(self.indexFile):
+            with open(self.indexFile) as f:
+                self.index = json.load(f)
+
+    def poseNames(self, namespace=None):
+        '''
+            Returns the sorted pose names, only the ones captured on namespace if it's given.
+        '''
+        return sorted(name for name, entry in self.index.items() if namespace is None or entry['namespace'] == namespace)
+
+    def getPose(self, name):
+        '''
+            Returns the index entry of the pose: namespace, ctrls, frames, offset and pivotMatrix.
+            No matrices are read.
+        '''
+        return self.index[name]
+
+    def savePose(self, name, namespace, ctrlNames, matrixFrames, frames=None, pivotMatrix=None):
+        '''
+            Appends a pose to the library. matrixFrames is a list, per frame, of one matrix per control.
+            ctrlNames are stored without their namespace so the pose can be applied to another copy of the rig.
+            frames are the scene frames of a captured range, pivotMatrix is the pivot's world matrix at capture.
+        '''
+        if not os.path.isdir(self.libraryDir):
+            os.makedirs(self.libraryDir)
+        replaced = name in self.index
+        self.close()
+        with open(self.dataFile, 'ab') as f:
+            f.seek(0, 2)
+            offset = f.tell()
+            for matrices in matrixFrames:
+                if len(matrices) != len(ctrlNames):
+                    raise ValueError('every frame needs one matrix per control')
+                f.write(b''.join(_packMatrix(m) for m in matrices))
+        self.index[name] = {'namespace' : namespace,
+                            'ctrls' : [ctrl.split(':')[-1] for ctrl in ctrlNames],
+                            'frames' : list(frames) if frames is not None else [None]*len(matrixFrames),
+                            'offset' : offset,
+                            'pivotMatrix' : list(pivotMatrix) if pivotMatrix is not None else None}
+        self._writeIndex()
+        if replaced:
+            self._compactIfWasteful()
+        return self.index[name]
+
+    def _writeIndex(self):
+        tmpFile = self.indexFile + '.tmp'
+        with open(tmpFile, 'w') as f:
+            json.dump(self.index, f)
+        if os.path.exists(self.indexFile):
+            os.remove(self.indexFile)
+        os.rename(tmpFile, self.indexFile)
+
+    def _getData(self):
+        '''
+            Memory-maps the data file the first time it's read.
+        '''
+        if self._data is None:
+            #mmap can't map an empty file, there's nothing to read from one
+            if not os.path.exists(self.dataFile) or not os.path.getsize(self.dataFile):
+                return b''
+            self._dataHandle = open(self.dataFile, 'rb')
+            self._data = mmap.mmap(self._dataHandle.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data
+
+    def readMatrices(self, name, frameIndex=0, ctrlNames=None):
+        '''
+            Returns the matrices of one frame of the pose, in the pose's control order.
+            With ctrlNames, only those controls are read, in the given order. Names may include a namespace.
+        '''
+        entry = self.index[name]
+        numCtrls = len(entry['ctrls'])
+        frameOffset = entry['offset'] + frameIndex*numCtrls*bytesPerMatrix
+        data = self._getData()
+        if ctrlNames is None:
+            return _unpackMatrices(data, frameOffset, numCtrls)
+        ctrlIndex = dict((ctrl, i) for i, ctrl in enumerate(entry['ctrls']))
+        return [_unpackMatrices(data, frameOffset + ctrlIndex[ctrl.split(':')[-1]]*bytesPerMatrix, 1)[0] for ctrl in ctrlNames]
+
+    def readFrames(self, name, ctrlNames=None):
+        '''
+            Yields (frame, matrices) for every frame of the pose, reading each frame only when it's reached.
+        '''
+        for frameIndex, frame in enumerate(self.index[name]['frames']):
+            yield frame, self.readMatrices(name, frameIndex, ctrlNames)
+
+    def deletePose(self, name):
+        '''
+            Removes the pose from the index.
+        '''
+        del self.index[name]
+        self._writeIndex()
+        self._compactIfWasteful()
+
+    def _poseBytes(self, entry):
+        return len(entry['ctrls'])*len(entry['frames'])*bytesPerMatrix
+
+    def wastedBytes(self):
+        '''
+            Returns the bytes of poses.bin no pose in the index uses, left by saving over or deleting poses.
+        '''
+        if not os.path.exists(self.dataFile):
+            return 0
+        return os.path.getsize(self.dataFile) - sum(self._poseBytes(entry) for entry in self.index.values())
+
+    def _compactIfWasteful(self):
+        if os.path.exists(self.dataFile) and self.wastedBytes() > self.compactRatio*os.path.getsize(self.dataFile):
+            self.compact()
+
+    def compact(self):
+        '''
+            Rewrites poses.bin with only the bytes of the poses in the index and updates their offsets.
+            Returns the number of bytes freed.
+        '''
+        if not os.path.exists(self.dataFile):
+            return 0
+        self.close()
+        oldSize = os.path.getsize(self.dataFile)
+        tmpFile = self.dataFile + '.tmp'
+        offsets = {}
+        with open(self.dataFile, 'rb') as src:
+            with open(tmpFile, 'wb') as dst:
+                for name, entry in sorted(self.index.items(), key=lambda item: item[1]['offset']):
+                    src.seek(entry['offset'])
+                    offsets[name] = dst.tell()
+                    dst.write(src.read(self._poseBytes(entry)))
+        os.remove(self.dataFile)
+        os.rename(tmpFile, self.dataFile)
+        for name, offset in offsets.items():
+            self.index[name]['offset'] = offset
+        self._writeIndex()
+        return oldSize - os.path.getsize(self.dataFile)
+
+    def close(self):
+        '''
+            Releases the memory-mapped data file.
+        '''
+        if self._data is not None:
+            self._data.close()
+            self._dataHandle.close()
+        self._data = None
+        self._dataHandle = None
@@ -0,0 +1,63 @@
+'''
+    MODULE: poseSolver
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.1
+
+    USAGE: Node-free solve layer for GlobalPositioning. A pose is stored as the target controls' matrices
+           relative to the pivot, so snapping is one batched multiply by the pivot's new world matrix.
+           Can be run without Maya:
+               relMatrices = capturePose(targetMatrices, pivotMatrix)
+               newMatrices = solvePose(relMatrices, movedPivotMatrix)
+               matrixFrames = solvePoseFrames(relMatrices, pivotMatrixFrames)
+
+    List of functions:
+        targetMatrix(worldMatrix, pivotPosition)
+        capturePose(targetMatrices, pivotMatrix)
+        solvePose(relativeMatrices, pivotMatrix)
+        solvePoseFrames(relativeMatrices, pivotMatrices)
+        pivotDelta(capturedPivotMatrix, pivotMatrix)
+
+    NOTES: Matrices use the flat 16 float layout from matrixMath. Scale on the pivot is ignored, only its position and orientation are followed.
+
+'''
+
+import matrixMath
+
+def targetMatrix(worldMatrix, pivotPosition):
+    '''
+        Returns the matrix a control is snapped with: its world orientation placed at its world rotate pivot.
+    '''
+    return matrixMath.setTranslation(matrixMath.normalizeMatrix(worldMatrix), pivotPosition)
+
+def capturePose(targetMatrices, pivotMatrix):
+    '''
+        Returns the target matrices relative to the pivot.
+    '''
+    pivotInverse = matrixMath.inverseMatrix(matrixMath.normalizeMatrix(pivotMatrix))
+    return matrixMath.multMatrices(targetMatrices, pivotInverse)
+
+def solvePose(relativeMatrices, pivotMatrix):
+    '''
+        Returns the world matrices of the captured targets for the pivot's current world matrix.
+    '''
+    return matrixMath.multMatrices(relativeMatrices, matrixMath.normalizeMatrix(pivotMatrix))
+
+def solvePoseFrames(relativeMatrices, pivotMatrices):
+    '''
+        Returns the world matrices of the captured targets for every frame of an animated pivot,
+        a list per target with a matrix per pivot matrix. Each pivot matrix is normalized once for all of the targets.
+    '''
+    pivots = [matrixMath.normalizeMatrix(pivotMatrix) for pivotMatrix in pivotMatrices]
+    return [[matrixMath.multMatrix(relativeMatrix, pivot) for pivot in pivots] for relativeMatrix in relativeMatrices]
+
+def pivotDelta(capturedPivotMatrix, pivotMatrix):
+    '''
+        Returns the rigid transform that takes the captured pivot to its current world matrix.
+        Any world matrix multiplied by it follows the pivot's move.
+    '''
+    return matrixMath.multMatrix(matrixMath.inverseMatrix(matrixMath.normalizeMatrix(capturedPivotMatrix)),
+                                 matrixMath.normalizeMatrix(pivotMatrix))
@@ -0,0 +1,262 @@
+'''
+    MODULE: profiler
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.3
+
+    USAGE: Opt-in profiling for ikFkMatching and GlobalPositioning. Records nested timing spans around the tools' entry points
+           and counts the scene commands run inside each span. Off by default, a profiled method only checks one flag when it's off.
+               import profiler
+               profiler.enable()
+               MIF.ikToFk()
+               profiler.dump()                      # summary in the Script Editor
+               profiler.dump('/tmp/ikToFk.json')    # or as JSON
+               profiler.disable()
+
+    List of functions:
+        enable()
+        disable()
+        reset()
+        span(name)
+        profiled(name)
+        countCommand(command, category)
+        summary()
+        dump(path)
+
+    NOTES: Command categories: nodeCreates, nodeDeletes, constraintBuilds, attrReads, attrWrites.
+           While enabled, the commands of maya.cmds, animIO's key writes and the sceneBackend's API reads
+           are wrapped with counters, disable() puts the originals back.
+           A command is counted on the innermost open span, span totals include their children.
+           Commands run by a wrapped command aren't counted again, writeKeys counts as one write and not its cutKey too.
+
+'''
+
+import contextlib
+import functools
+import json
+import sys
+import timeit
+
+#scene commands mapped to the category they're counted in, xform is sorted by its query flag
+commandCategories = {'spaceLocator' : 'nodeCreates',
+                     'group' : 'nodeCreates',
+                     'createNode' : 'nodeCreates',
+                     'duplicate' : 'nodeCreates',
+                     'ikHandle' : 'nodeCreates',
+                     'delete' : 'nodeDeletes',
+                     'parentConstraint' : 'constraintBuilds',
+                     'pointConstraint' : 'constraintBuilds',
+                     'orientConstraint' : 'constraintBuilds',
+                     'getAttr' : 'attrReads',
+                     'keyframe' : 'attrReads',
+                     'xform' : 'attrReads',
+                     'setAttr' : 'attrWrites',
+                     'cutKey' : 'attrWrites',
+                     'setKeyframe' : 'attrWrites',
+                     'writeKeys' : 'attrWrites',
+                     'writeStepKeys' : 'attrWrites',
+                     'setKeyValues' : 'attrWrites',
+                     'restoreKeys' : 'attrWrites'}
+#backend reads that go through the API instead of maya.cmds, its other methods call maya.cmds and are counted there
+#the matrix reads are counted where they're evaluated, reads served by matrixCache aren't counted
+backendCategories = {'readWorldMatrix' : 'attrReads',
+                     'readParentInverseMatrix' : 'attrReads',
+                     'readWorldRotatePivot' : 'attrReads',
+                     'rotation' : 'attrReads',
+                     'fullPath' : 'attrReads'}
+categories = ['nodeCreates', 'nodeDeletes', 'constraintBuilds', 'attrReads', 'attrWrites']
+
+#modules whose commands are wrapped while profiling
+profiledModules = ['ikFkMatching', 'GlobalPositioningTool', 'matrixSnap', 'animIO']
+
+enabled = False
+_stack = []
+_spans = []
+_patched = []
+#how many wrapped commands are running, only the outermost one is counted
+_commandDepth = [0]
+
+class Span:
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.counts = dict((category, 0) for category in categories)
+        self.commands = {}
+        self.children = []
+
+    def totals(self):
+        '''
+            Returns the counts of this span and all of its children.
+        '''
+        counts = dict(self.counts)
+        for child in self.children:
+            for category, count in child.totals().items():
+                counts[category] += count
+        return counts
+
+    def asDict(self):
+        return {'name' : self.name,
+                'seconds' : round(self.seconds, 6),
+                'counts' : self.totals(),
+                'commands' : dict(self.commands),
+                'children' : [child.asDict() for child in self.children]}
+
+@contextlib.contextmanager
+def span(name):
+    '''
+        Times the block inside it as a span called name. Does nothing while profiling is off.
+            with profiler.span('readFkChain'):
+                ...
+    '''
+    if not enabled:
+        yield None
+        return
+    current = Span(name)
+    if _stack:
+        _stack[-1].children.append(current)
+    else:
+        _spans.append(current)
+    _stack.append(current)
+    start = timeit.default_timer()
+    try:
+        yield current
+    finally:
+        current.seconds = timeit.default_timer() - start
+        if current in _stack:
+            _stack.remove(current)
+
+def profiled(name):
+    '''
+        Decorator that records every call of a function or method as a span called name.
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def countCommand(command, category):
+    '''
+        Counts one scene command on the innermost open span.
+    '''
+    if not _stack:
+        return
+    current = _stack[-1]
+    current.counts[category] += 1
+    current.commands[command] = current.commands.get(command, 0) + 1
+
+def _wrapCommand(func, command, category):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _commandDepth[0]:
+            if command == 'xform':
+                countCommand(command, 'attrReads' if kwargs.get('q') or kwargs.get('query') else 'attrWrites')
+            else:
+                countCommand(command, category)
+        _commandDepth[0] += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _commandDepth[0] -= 1
+    wrapper._profilerOriginal = func
+    return wrapper
+
+def _patchModule(module, commands=commandCategories):
+    for command, category in commands.items():
+        func = getattr(module, command, None)
+        if func is not None and not hasattr(func, '_profilerOriginal'):
+            _patched.append((module, command, func, command in vars(module)))
+            setattr(module, command, _wrapCommand(func, command, category))
+
+def enable():
+    '''
+        Turns profiling on and starts counting scene commands.
+    '''
+    global enabled
+    if enabled:
+        return
+    enabled = True
+    try:
+        import maya.cmds
+        _patchModule(maya.cmds)
+    except ImportError:
+        pass
+    for moduleName in profiledModules:
+        if moduleName in sys.modules:
+            _patchModule(sys.modules[moduleName])
+    if 'sceneBackend' in sys.modules:
+        _patchModule(sys.modules['sceneBackend'].getBackend(), backendCategories)
+
+def disable():
+    '''
+        Turns profiling off and puts the original commands back. Recorded spans are kept until reset().
+    '''
+    global enabled
+    enabled = False
+    while _patched:
+        module, command, func, owned = _patched.pop()
+        if owned:
+            setattr(module, command, func)
+        else:
+            #methods wrapped on an instance go back to the class's
+            delattr(module, command)
+    del _stack[:]
+    _commandDepth[0] = 0
+
+def reset():
+    '''
+        Clears the recorded spans.
+    '''
+    del _spans[:]
+    del _stack[:]
+
+def summary():
+    '''
+        Returns the recorded spans as a tree of dictionaries, plus totals per span name:
+        calls, seconds and counts.
+    '''
+    totals = {}
+    def addTotals(spanDict):
+        total = totals.setdefault(spanDict['name'], {'calls' : 0, 'seconds' : 0.0, 'counts' : dict((category, 0) for category in categories)})
+        total['calls'] += 1
+        total['seconds'] = round(total['seconds'] + spanDict['seconds'], 6)
+        for category, count in spanDict['counts'].items():
+            total['counts'][category] += count
+        for child in spanDict['children']:
+            addTotals(child)
+    spans = [recorded.asDict() for recorded in _spans]
+    for spanDict in spans:
+        addTotals(spanDict)
+    return {'spans' : spans, 'totals' : totals}
+
+def _printSpan(spanDict, depth):
+    counts = spanDict['counts']
+    print('%-40s %9.2fms  creates %4d  deletes %4d  constraints %4d  reads %6d  writes %6d' %('  '*depth + spanDict['name'],
+          spanDict['seconds']*1000.0, counts['nodeCreates'], counts['nodeDeletes'], counts['constraintBuilds'],
+          counts['attrReads'], counts['attrWrites']))
+    for child in spanDict['children']:
+        _printSpan(child, depth+1)
+
+def dump(path=None):
+    '''
+        Writes the summary to path as JSON, or prints it to the Script Editor if no path is given.
+    '''
+    result = summary()
+    if path:
+        with open(path, 'w') as f:
+            json.dump(result, f, indent=1, sort_keys=True)
+        return result
+    for spanDict in result['spans']:
+        _printSpan(spanDict, 0)
+    for name in sorted(result['totals'], key=lambda key: -result['totals'][key]['seconds']):
+        total = result['totals'][name]
+        print('%-40s %4d calls %9.2fms' %(name, total['calls'], total['seconds']*1000.0))
+    return result
@@ -0,0 +1,351 @@
+'''
+    MODULE: rigRegistry
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.5
+
+    USAGE: Rig registry shared by ikFkMatching and GlobalPositioning. Rig, control and joint names are loaded from a JSON file
+           (avatarahRigs.json by default), so a new rig is onboarded by adding it to the data file.
+               registry = getRegistry()
+               registry.lookup('Astrea01:ik_left_arm')         # ('Astrea', 'left', 'arm')
+               nodes = registry.limbNodes(selected()[0])      # ikCtl, pvCtl, fkCtls, ikJnts, fkJnts, limb
+               crowd = registry.crowdGlobalCtrlNodes('Crowd*')  # [('Crowd01:', [...]), ('Crowd02:', [...])]
+
+    List of functions:
+        splitName(obj)
+        getRegistry()
+    List of methods from class RigRegistry:
+        __init__(dataFile, nodeFactory)
+        load(dataFile)
+        getRig(obj)
+        getSideLimb(obj)
+        lookup(obj)
+        getCtrlNames(rig, side, limb)
+        limbNodes(obj)
+        rigLimbNodes(obj)
+        globalCtrlNodes(obj)
+        rigNamespaces(pattern)
+        crowdGlobalCtrlNodes(pattern)
+        getSpaceAttr(obj)
+        spaceCtrlNodes(obj)
+        restOffset(obj, compute)
+        invalidate()
+        invalidateRestOffsets()
+        installCallbacks()
+        removeCallbacks()
+
+    NOTES: Data file layout:
+               sides, limbs : lists of the side and limb names found in control names
+               ctrls : [side][limb] -> ikCtl, pvCtl, fkCtl names shared by every rig
+               globalCtrls : target controls for GlobalPositioning
+               spaceAttr, spaceCtrls : the space switch enum attribute and the controls that have it, globalCtrls if not given
+               rigs : [rig] -> jnts [side][limb] -> fk, ik joint names. A rig can also have its own ctrls, globalCtrls,
+                      spaceAttr and spaceCtrls.
+           The rig is found by its name appearing in the node's name or namespace, the same as the old substring checks,
+           but every name is only scanned once. Resolved nodes are cached per namespace until a node is renamed or deleted.
+           Nodes are resolved to names by the sceneBackend unless a nodeFactory is given.
+           A limb with a node missing from the scene is treated as unregistered.
+           crowdGlobalCtrlNodes resolves many rigs at once, the scene's namespaces are listed once
+           and every rig's controls are checked in one call, so it isn't cached.
+           Rest offsets, ex: ikFkMatching's ankle offset, only depend on the rig, so they're kept per namespace and limb
+           until a reference is loaded, unloaded, created or removed, or a scene is opened.
+
+'''
+
+import fnmatch
+import json
+import os
+
+defaultDataFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'avatarahRigs.json')
+
+_registry = None
+
+def splitName(obj):
+    '''
+        Returns the namespace (with its trailing colon, like pymel's namespace()) and short name of obj.
+    '''
+    name = str(obj).split('|')[-1]
+    namespace, sep, shortName = name.rpartition(':')
+    return namespace + sep, shortName
+
+def getRegistry():
+    '''
+        Returns the registry shared by the tools, loading it the first time it's needed.
+        Rename and delete callbacks are installed when running inside Maya.
+    '''
+    global _registry
+    if _registry is None:
+        _registry = RigRegistry()
+        try:
+            _registry.installCallbacks()
+        except ImportError:
+            pass
+    return _registry
+
+class RigRegistry:
+
+    def __init__(self, dataFile=defaultDataFile, nodeFactory=None):
+        #instance variables
+        self.dataFile = dataFile
+        self.nodeFactory = nodeFactory
+        self.callbackIds = []
+        self.load(dataFile)
+
+    def load(self, dataFile):
+        '''
+            Loads the data file and builds the lookup maps.
+        '''
+        with open(dataFile) as f:
+            data = json.load(f)
+        self.sides = data['sides']
+        self.limbs = data['limbs']
+        self.ctrls = data['ctrls']
+        self.globalCtrls = data['globalCtrls']
+        self.spaceAttr = data.get('spaceAttr', 'space')
+        self.spaceCtrls = data.get('spaceCtrls', self.globalCtrls)
+        self.rigs = data['rigs']
+        self.rigNames = sorted(self.rigs)
+
+        #short name -> (side, limb) for every control and joint the registry knows about
+        self.nameLookup = {}
+        ctrlSets = [self.ctrls] + [self.rigs[rig]['ctrls'] for rig in self.rigNames if 'ctrls' in self.rigs[rig]]
+        for ctrls in ctrlSets:
+            for side in ctrls:
+                for limb in ctrls[side]:
+                    names = [ctrls[side][limb]['ikCtl'], ctrls[side][limb]['pvCtl']] + ctrls[side][limb]['fkCtl']
+                    for name in names:
+                        self.nameLookup[name] = (side, limb)
+        for rig in self.rigNames:
+            jnts = self.rigs[rig]['jnts']
+            for side in jnts:
+                for limb in jnts[side]:
+                    for name in jnts[side][limb]['fk'] + jnts[side][limb]['ik']:
+                        self.nameLookup[name] = (side, limb)
+        self.rigLookup = {}
+        self.nodeCache = {}
+        self.restOffsets = {}
+        return data
+
+    def _findRig(self, name):
+        if name not in self.rigLookup:
+            rigFound = None
+            for rig in self.rigNames:
+                if rig in name:
+                    rigFound = rig
+                    break
+            self.rigLookup[name] = rigFound
+        return self.rigLookup[name]
+
+    def getRig(self, obj):
+        '''
+            Returns the rig obj belongs to, or None if it isn't part of a registered rig.
+            The namespace is checked first, then the short name.
+        '''
+        namespace, shortName = splitName(obj)
+        return (namespace and self._findRig(namespace)) or self._findRig(shortName)
+
+    def getSideLimb(self, obj):
+        '''
+            Returns (side, limb) for obj. Names that aren't in the data file, like the ikFk switch controls,
+            are scanned for a side and limb once and remembered.
+        '''
+        namespace, shortName = splitName(obj)
+        if shortName not in self.nameLookup:
+            side = None
+            limb = None
+            for i in self.sides:
+                if i in shortName:
+                    side = i
+            for i in self.limbs:
+                if i in shortName:
+                    limb = i
+            self.nameLookup[shortName] = (side, limb)
+        return self.nameLookup[shortName]
+
+    def lookup(self, obj):
+        '''
+            Returns (rig, side, limb) for obj, or None if any of them can't be found.
+        '''
+        rig = self.getRig(obj)
+        side, limb = self.getSideLimb(obj)
+        if rig and side and limb:
+            return rig, side, limb
+        return None
+
+    def getCtrlNames(self, rig, side, limb):
+        '''
+            Returns the ikCtl, pvCtl and fkCtl names of the rig's limb.
+        '''
+        return self.rigs[rig].get('ctrls', self.ctrls)[side][limb]
+
+    def _makeNodes(self, names, namespace):
+        if self.nodeFactory is None:
+            import sceneBackend
+            self.nodeFactory = sceneBackend.getBackend().node
+        return [self.nodeFactory(namespace + name) for name in names]
+
+    def _limbNodes(self, namespace, rig, side, limb):
+        key = (namespace, rig, side, limb)
+        if key not in self.nodeCache:
+            ctrlNames = self.getCtrlNames(rig, side, limb)
+            jntNames = self.rigs[rig]['jnts'][side][limb]
+            ikCtl, pvCtl = self._makeNodes([ctrlNames['ikCtl'], ctrlNames['pvCtl']], namespace)
+            self.nodeCache[key] = {'ikCtl' : ikCtl,
+                                   'pvCtl' : pvCtl,
+                                   'fkCtls' : self._makeNodes(ctrlNames['fkCtl'], namespace),
+                                   'ikJnts' : self._makeNodes(jntNames['ik'], namespace),
+                                   'fkJnts' : self._makeNodes(jntNames['fk'], namespace),
+                                   'limb' : limb}
+        return self.nodeCache[key]
+
+    def limbNodes(self, obj):
+        '''
+            Returns a dictionary of the limb's nodes: ikCtl, pvCtl, fkCtls, ikJnts, fkJnts and limb.
+            Returns None if obj isn't part of a registered rig's limb, or one of the limb's nodes isn't in the scene.
+        '''
+        found = self.lookup(obj)
+        if not found:
+            return None
+        rig, side, limb = found
+        namespace, shortName = splitName(obj)
+        try:
+            return self._limbNodes(namespace, rig, side, limb)
+        except ValueError:
+            #ex: a renamed or partially loaded reference
+            return None
+
+    def rigLimbNodes(self, obj):
+        '''
+            Returns the limbNodes dictionaries of every limb of the rig obj belongs to, or None if it isn't part of a registered rig.
+            Limbs with a node missing from the scene are left out.
+        '''
+        rig = self.getRig(obj)
+        if not rig:
+            return None
+        namespace, shortName = splitName(obj)
+        jnts = self.rigs[rig]['jnts']
+        limbNodes = []
+        for side in self.sides:
+            for limb in self.limbs:
+                if side in jnts and limb in jnts[side]:
+                    try:
+                        limbNodes.append(self._limbNodes(namespace, rig, side, limb))
+                    except ValueError:
+                        pass
+        return limbNodes
+
+    def globalCtrlNodes(self, obj):
+        '''
+            Returns the GlobalPositioning target controls of the rig obj belongs to, or None if it isn't part of a registered rig.
+        '''
+        rig = self.getRig(obj)
+        if not rig:
+            return None
+        namespace, shortName = splitName(obj)
+        key = (namespace, rig, 'globalCtrls')
+        if key not in self.nodeCache:
+            self.nodeCache[key] = self._makeNodes(self.rigs[rig].get('globalCtrls', self.globalCtrls), namespace)
+        return self.nodeCache[key]
+
+    def getSpaceAttr(self, obj):
+        '''
+            Returns the name of the space switch attribute of the rig obj belongs to, the data file's default if it isn't part of a registered rig.
+        '''
+        rig = self.getRig(obj)
+        if not rig:
+            return self.spaceAttr
+        return self.rigs[rig].get('spaceAttr', self.spaceAttr)
+
+    def spaceCtrlNodes(self, obj):
+        '''
+            Returns the space switching controls of the rig obj belongs to, or None if it isn't part of a registered rig.
+        '''
+        rig = self.getRig(obj)
+        if not rig:
+            return None
+        namespace, shortName = splitName(obj)
+        key = (namespace, rig, 'spaceCtrls')
+        if key not in self.nodeCache:
+            self.nodeCache[key] = self._makeNodes(self.rigs[rig].get('spaceCtrls', self.spaceCtrls), namespace)
+        return self.nodeCache[key]
+
+    def rigNamespaces(self, pattern='*'):
+        '''
+            Returns the scene's namespaces that match pattern, ex: 'Crowd*', and belong to a registered rig, with their trailing colons.
+        '''
+        import sceneBackend
+        pattern = pattern.rstrip(':') or '*'
+        return [namespace for namespace in sceneBackend.getBackend().namespaces()
+                if fnmatch.fnmatchcase(namespace.rstrip(':'), pattern) and self._findRig(namespace)]
+
+    def crowdGlobalCtrlNodes(self, pattern='*'):
+        '''
+            Returns the GlobalPositioning target controls of every registered rig whose namespace matches pattern,
+            as a list of (namespace, ctrls). Controls missing from a rig are left out, as are rigs without any.
+        '''
+        import sceneBackend
+        names = []
+        for namespace in self.rigNamespaces(pattern):
+            rig = self._findRig(namespace)
+            names += [(namespace, namespace + name) for name in self.rigs[rig].get('globalCtrls', self.globalCtrls)]
+        #one existence check for the whole crowd instead of one per control
+        found = set(sceneBackend.getBackend().existing([name for namespace, name in names]))
+        crowd = []
+        for namespace, name in names:
+            if name in found:
+                if not crowd or crowd[-1][0] != namespace:
+                    crowd.append((namespace, []))
+                crowd[-1][1].append(name)
+        return crowd
+
+    def restOffset(self, obj, compute):
+        '''
+            Returns the rest offset of the limb obj belongs to, worked out by calling compute() the first time it's asked for.
+            obj's name is the key if it isn't part of a registered rig.
+        '''
+        found = self.lookup(obj)
+        key = (splitName(obj)[0],) + found if found else (str(obj),)
+        if key not in self.restOffsets:
+            self.restOffsets[key] = compute()
+        return self.restOffsets[key]
+
+    def invalidate(self, *args):
+        '''
+            Clears the resolved nodes. Accepts and ignores the arguments Maya passes to callbacks.
+        '''
+        self.nodeCache.clear()
+
+    def invalidateRestOffsets(self, *args):
+        '''
+            Clears the rest offsets. Accepts and ignores the arguments Maya passes to callbacks.
+        '''
+        self.restOffsets.clear()
+
+    def installCallbacks(self):
+        '''
+            Clears the node cache whenever a node is renamed or deleted, or a scene is opened,
+            and the rest offsets whenever a reference changes or a scene is opened.
+        '''
+        import maya.api.OpenMaya as om2
+        self.removeCallbacks()
+        self.callbackIds = [om2.MNodeMessage.addNameChangedCallback(om2.MObject(), self.invalidate),
+                            om2.MDGMessage.addNodeRemovedCallback(self.invalidate, 'dependNode')]
+        for message in (om2.MSceneMessage.kAfterOpen, om2.MSceneMessage.kAfterNew):
+            self.callbackIds.append(om2.MSceneMessage.addCallback(message, self.invalidate))
+            self.callbackIds.append(om2.MSceneMessage.addCallback(message, self.invalidateRestOffsets))
+        for message in (om2.MSceneMessage.kAfterLoadReference, om2.MSceneMessage.kAfterUnloadReference,
+                        om2.MSceneMessage.kAfterCreateReference, om2.MSceneMessage.kAfterRemoveReference):
+            self.callbackIds.append(om2.MSceneMessage.addCallback(message, self.invalidateRestOffsets))
+        return self.callbackIds
+
+    def removeCallbacks(self):
+        '''
+            Removes the callbacks added by installCallbacks.
+        '''
+        if self.callbackIds:
+            import maya.api.OpenMaya as om2
+            om2.MMessage.removeCallbacks(self.callbackIds)
+        self.callbackIds = []
@@ -0,0 +1,199 @@
+'''
+    MODULE: sceneBackend
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.4
+
+    USAGE: Thin scene access layer for ikFkMatching and GlobalPositioning, so neither needs pymel.
+           MayaBackend reads transforms with maya.api.OpenMaya (API 2.0) and writes with maya.cmds so edits stay undoable.
+           Nodes are passed around as name strings.
+               backend = getBackend()
+               matrix = backend.worldMatrix('Astrea01:ik_left_arm')
+           Another backend, ex: a stand-in scene for tests, is swapped in with setBackend(backend).
+
+    List of functions:
+        getBackend()
+        setBackend(backend)
+    List of methods from class MayaBackend:
+        __init__()
+        node(name)
+        exists(node)
+        existing(nodes)
+        namespaces()
+        enumNames(node, attr)
+        selection()
+        parent(node)
+        fullPath(node)
+        isJoint(node)
+        worldMatrix(node)
+        parentInverseMatrix(node)
+        worldRotatePivot(node)
+        readWorldMatrix(node)
+        readParentInverseMatrix(node)
+        readWorldRotatePivot(node)
+        rotation(node)
+        getAttr(plug)
+        isSettable(plug)
+        setAttr(plug, values)
+        createLocator(name, scale)
+        delete(node)
+
+    NOTES: Maya modules are imported the first time a MayaBackend is made, not when this module is imported.
+           worldMatrix, parentInverseMatrix and worldRotatePivot are served from matrixCache, the read methods always evaluate.
+           Matrices are flat lists of 16 floats, like matrixMath. Rotations are in degrees in the node's rotate order.
+
+'''
+
+import math
+import matrixCache
+
+_backend = None
+
+def getBackend():
+    '''
+        Returns the backend the tools use, a MayaBackend unless another one was set.
+    '''
+    global _backend
+    if _backend is None:
+        _backend = MayaBackend()
+    return _backend
+
+def setBackend(backend):
+    '''
+        Makes the tools use backend. Returns the backend that was replaced.
+    '''
+    global _backend
+    oldBackend = _backend
+    _backend = backend
+    return oldBackend
+
+class MayaBackend:
+
+    def __init__(self):
+        import maya.cmds as cmds
+        import maya.api.OpenMaya as om2
+        #instance variables
+        self.cmds = cmds
+        self.om2 = om2
+        self.cache = matrixCache.getCache()
+
+    def _dagPath(self, node):
+        sel = self.om2.MSelectionList()
+        sel.add(str(node))
+        return sel.getDagPath(0)
+
+    def node(self, name):
+        '''
+            Returns name if it names exactly one node, raises ValueError otherwise.
+        '''
+        if not self.cmds.objExists(str(name)):
+            raise ValueError('No object matches name: %s' %(name))
+        return str(name)
+
+    def exists(self, node):
+        return bool(node) and self.cmds.objExists(str(node))
+
+    def existing(self, nodes):
+        '''
+            Returns the nodes that exist, in the order given, checked with one ls call.
+        '''
+        names = [str(node) for node in nodes]
+        found = set(self.cmds.ls(names) or []) if names else set()
+        return [name for name in names if name in found]
+
+    def namespaces(self):
+        '''
+            Returns every namespace in the scene with its trailing colon, nested ones included, ex: 'Crowd:Astrea01:'.
+        '''
+        namespaces = self.cmds.namespaceInfo(':', listOnlyNamespaces=True, recurse=True) or []
+        return [namespace + ':' for namespace in namespaces if namespace not in ('UI', 'shared')]
+
+    def enumNames(self, node, attr):
+        '''
+            Returns a dictionary of node.attr's enum values to their names, or None if it isn't an enum attribute.
+        '''
+        node = str(node)
+        if not self.cmds.attributeQuery(attr, node=node, exists=True):
+            return None
+        enums = self.cmds.attributeQuery(attr, node=node, listEnum=True)
+        if not enums:
+            return None
+        names = {}
+        value = 0
+        #listed as 'world:cog:hand', or 'world=0:cog=2' when values are skipped
+        for entry in enums[0].split(':'):
+            name, sep, explicit = entry.partition('=')
+            if sep:
+                value = int(explicit)
+            names[value] = name
+            value += 1
+        return names
+
+    def selection(self):
+        '''
+            Returns the names of the selected nodes.
+        '''
+        return self.cmds.ls(selection=True) or []
+
+    def parent(self, node):
+        '''
+            Returns the name of node's parent, or None if it's under the world.
+        '''
+        parents = self.cmds.listRelatives(str(node), parent=True)
+        return parents[0] if parents else None
+
+    def fullPath(self, node):
+        return self._dagPath(node).fullPathName()
+
+    def isJoint(self, node):
+        return self.cmds.objectType(str(node), isAType='joint')
+
+    def worldMatrix(self, node):
+        return self.cache.get('worldMatrix', node, None, self.readWorldMatrix)
+
+    def parentInverseMatrix(self, node):
+        return self.cache.get('parentInverseMatrix', node, None, self.readParentInverseMatrix)
+
+    def worldRotatePivot(self, node):
+        return self.cache.get('worldRotatePivot', node, None, self.readWorldRotatePivot)
+
+    def readWorldMatrix(self, node):
+        return list(self._dagPath(node).inclusiveMatrix())
+
+    def readParentInverseMatrix(self, node):
+        return list(self._dagPath(node).exclusiveMatrixInverse())
+
+    def readWorldRotatePivot(self, node):
+        pivot = self.om2.MFnTransform(self._dagPath(node)).rotatePivot(self.om2.MSpace.kWorld)
+        return [pivot.x, pivot.y, pivot.z]
+
+    def rotation(self, node):
+        '''
+            Returns node's local rotate values.
+        '''
+        rotation = self.om2.MFnTransform(self._dagPath(node)).rotation()
+        return [math.degrees(rotation.x), math.degrees(rotation.y), math.degrees(rotation.z)]
+
+    def getAttr(self, plug, **kwargs):
+        return self.cmds.getAttr(str(plug), **kwargs)
+
+    def isSettable(self, plug):
+        '''
+            Returns whether plug can be set, False if it's locked or connected.
+        '''
+        return self.cmds.getAttr(str(plug), settable=True)
+
+    def setAttr(self, plug, *values):
+        self.cmds.setAttr(str(plug), *values)
+        matrixCache.invalidateNode(str(plug).split('.')[0])
+
+    def createLocator(self, name, scale=(1, 1, 1)):
+        locator = self.cmds.spaceLocator(n=name)[0]
+        self.cmds.setAttr(locator+'.scale', *scale)
+        return locator
+
+    def delete(self, node):
+        self.cmds.delete(str(node))
@@ -0,0 +1,142 @@
+'''
+    MODULE: sceneTransaction
+
+    AUTHOR: Veronica Tello
+
+    DATE: 10/18/2026
+
+    VERSION: 1.4
+
+    USAGE: Deferred scene writes for the animation tools. Writes are queued while an operation solves
+           and applied together in one flush, inside one undo chunk with the viewport refresh suspended.
+           If anything fails, every write that was already applied is put back.
+               with SceneTransaction('snapPose') as transaction:
+                   transaction.queueChannels('ik_left_arm', 'translate', (0, 10, 0))
+                   transaction.queueAttr('ik_left_arm.visibility', 1)
+
+    List of methods from class SceneTransaction:
+        __init__(name, suspendRefresh)
+        queueAttr(plug, value)
+        queueChannels(node, attr, values)
+        flush()
+        rollback()
+
+    NOTES: A flush sets each fully queued compound attribute (ex: all of translate) with one setAttr call.
+           Reads made while writes are queued still see the old values, flush() before reading anything the queued writes change,
+           ex: the parentInverseMatrix of a child of a queued control.
+           flush() and rollback() drop the nodes they write from matrixCache. A transaction is a matrixCache operation,
+           matrices read inside it are kept until it, or the outermost one around it, ends.
+           Only writes made through the transaction are rolled back. Keys written by animIO inside it are part of its undo chunk,
+           but an operation has to put them back itself on failure, with animIO.snapshotKeys and restoreKeys.
+
+'''
+
+import maya.cmds as cmds
+import matrixCache
+import sceneBackend
+
+_suspended = [0]
+
+class SceneTransaction:
+
+    def __init__(self, name='sceneTransaction', suspendRefresh=True):
+        #instance variables
+        self.name = name
+        self.suspendRefresh = suspendRefresh
+        self.queue = []
+        self.queued = {}
+        self.applied = []
+
+    def __enter__(self):
+        cmds.undoInfo(openChunk=True, chunkName=self.name)
+        matrixCache.beginOperation()
+        if self.suspendRefresh:
+            if not _suspended[0]:
+                cmds.refresh(suspend=True)
+            _suspended[0] += 1
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        try:
+            if excType is None:
+                self.flush()
+            else:
+                self.rollback()
+        except:
+            self.rollback()
+            raise
+        finally:
+            if self.suspendRefresh:
+                _suspended[0] -= 1
+                if not _suspended[0]:
+                    cmds.refresh(suspend=False)
+            matrixCache.endOperation()
+            cmds.undoInfo(closeChunk=True)
+        return False
+
+    def _queue(self, key, axis, value):
+        if key not in self.queued:
+            self.queued[key] = {}
+            self.queue.append(key)
+        self.queued[key][axis] = value
+
+    def queueAttr(self, plug, value):
+        '''
+            Queues a scalar attribute write, ex: queueAttr('ik_left_arm.visibility', 0). A later write to the same plug replaces it.
+        '''
+        node, attr = str(plug).split('.', 1)
+        self._queue((node, attr), None, value)
+
+    def queueChannels(self, node, attr, values):
+        '''
+            Queues the x, y, z channels of attr, skipping any that are locked or connected, like matrixSnap.setChannels.
+            Returns the channels that couldn't be set.
+        '''
+        skipped = []
+        backend = sceneBackend.getBackend()
+        for axis, val in zip('XYZ', values):
+            plug = '%s.%s%s' %(node, attr, axis)
+            if backend.isSettable(plug):
+                self._queue((str(node), attr), axis, val)
+            else:
+                skipped.append(plug)
+        return skipped
+
+    def flush(self):
+        '''
+            Applies every queued write. The old values are kept so rollback() can put them back.
+        '''
+        queue = self.queue
+        queued = self.queued
+        self.queue = []
+        self.queued = {}
+        for node, attr in queue:
+            matrixCache.invalidateNode(node)
+            values = queued[(node, attr)]
+            if None in values:
+                plug = '%s.%s' %(node, attr)
+                self.applied.append((plug, None, cmds.getAttr(plug)))
+                cmds.setAttr(plug, values[None])
+            elif len(values) == 3:
+                plug = '%s.%s' %(node, attr)
+                self.applied.append((plug, 'XYZ', cmds.getAttr(plug)[0]))
+                cmds.setAttr(plug, values['X'], values['Y'], values['Z'])
+            else:
+                for axis in sorted(values):
+                    plug = '%s.%s%s' %(node, attr, axis)
+                    self.applied.append((plug, None, cmds.getAttr(plug)))
+                    cmds.setAttr(plug, values[axis])
+
+    def rollback(self):
+        '''
+            Drops the queued writes and puts back the old values of every applied write, newest first.
+        '''
+        self.queue = []
+        self.queued = {}
+        while self.applied:
+            plug, axes, oldValue = self.applied.pop()
+            matrixCache.invalidateNode(plug.split('.')[0])
+            if axes:
+                cmds.setAttr(plug, *oldValue)
+            else:
+                cmds.setAttr(plug, oldValue)
@@ -0,0 +1,123 @@
+'''
+    Headless tests for animIO's key writes, snapshotKeys and restoreKeys, on the benchmarks' stand-in scene.
+    Run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import math
+import os
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'benchmarks'))
+sys.path.insert(0, root)
+import sceneStandIn
+scene = sceneStandIn.install()
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+import animIO
+import keyReducer
+
+def curveFn(node, attr):
+    return oma2.MFnAnimCurve(scene.getNode(node).curves[attr])
+
+def curveKeys(node, attr):
+    '''
+        Returns node.attr's keys as (time, value, inType, outType) in the curve's units, None if it isn't animated.
+    '''
+    curve = scene.getNode(node).curves.get(attr)
+    if curve is None:
+        return None
+    fn = oma2.MFnAnimCurve(curve)
+    return [(fn.input(index).value, fn.value(index), fn.inTangentType(index), fn.outTangentType(index)) for index in range(fn.numKeys)]
+
+class WriteKeysTest(unittest.TestCase):
+
+    def setUp(self):
+        scene.reset()
+        self.node = scene.createNode('ctrl')
+
+    def test_writeKeysReplacesTheRange(self):
+        animIO.writeKeys(self.node, 'translateX', [1.0, 5.0, 10.0, 20.0], [0.0, 1.0, 2.0, 3.0])
+        animIO.writeKeys(self.node, 'translateX', [4.0, 6.0, 8.0, 10.0], [7.0, 8.0, 9.0, 10.0])
+        self.assertEqual([(time, value) for time, value, inType, outType in curveKeys(self.node, 'translateX')],
+                         [(1.0, 0.0), (4.0, 7.0), (6.0, 8.0), (8.0, 9.0), (10.0, 10.0), (20.0, 3.0)])
+
+    def test_rotateKeysInCurveUnits(self):
+        animIO.writeVectorKeys(self.node, 'rotate', [1.0, 2.0], [(90.0, 0.0, -45.0), (180.0, 10.0, 0.0)])
+        self.assertEqual([value for time, value, inType, outType in curveKeys(self.node, 'rotateX')], [math.pi/2.0, math.pi])
+        self.assertEqual(animIO.sampleValues([self.node], 'rotate', [2.0])[self.node], [(180.0, 10.0, 0.0)])
+
+    def test_reducedKeysAreLinear(self):
+        frames = [float(frame) for frame in range(1, 31)]
+        values = [abs(frame - 15.0) for frame in frames]
+        report = keyReducer.newReport()
+        animIO.writeKeys(self.node, 'translateY', frames, values, 0.01, report)
+        keys = curveKeys(self.node, 'translateY')
+        self.assertEqual([time for time, value, inType, outType in keys], [1.0, 15.0, 30.0])
+        self.assertEqual(set(inType for time, value, inType, outType in keys), set([oma2.MFnAnimCurve.kTangentLinear]))
+        self.assertEqual(report, {'sampled' : 30, 'written' : 3})
+
+    def test_setKeyValuesKeepsTangents(self):
+        animIO.writeStepKeys(self.node, 'translateZ', [1.0, 10.0], [0.0, 1.0])
+        animIO.setKeyValues(self.node, 'translateZ', [10.0, 20.0], [5.0, 6.0])
+        self.assertEqual(curveKeys(self.node, 'translateZ'),
+                         [(1.0, 0.0, oma2.MFnAnimCurve.kTangentGlobal, oma2.MFnAnimCurve.kTangentStep),
+                          (10.0, 5.0, oma2.MFnAnimCurve.kTangentGlobal, oma2.MFnAnimCurve.kTangentStep),
+                          (20.0, 6.0, oma2.MFnAnimCurve.kTangentGlobal, oma2.MFnAnimCurve.kTangentGlobal)])
+
+    def test_keyTimes(self):
+        animIO.writeKeys(self.node, 'translateX', [1.0, 5.0], [0.0, 1.0])
+        animIO.writeKeys(self.node, 'rotateY', [5.0, 9.0], [0.0, 1.0])
+        self.assertEqual(animIO.keyTimes(self.node, ['translateX', 'rotateY', 'rotateZ']), [1.0, 5.0, 9.0])
+
+class SnapshotRestoreTest(unittest.TestCase):
+
+    def setUp(self):
+        scene.reset()
+        self.node = scene.createNode('ctrl')
+        animIO.writeStepKeys(self.node, 'translateX', [1.0, 5.0, 10.0], [0.0, 3.0, 1.0])
+        animIO.writeKeys(self.node, 'rotateY', [1.0, 10.0], [0.0, 90.0])
+        #a fixed tangent, its angle has to come back too
+        curveFn(self.node, 'rotateY').setAngle(1, om2.MAngle(0.25, om2.MAngle.kRadians), True)
+        self.channels = ['translateX', 'rotateY', 'translateZ']
+        self.before = dict((attr, curveKeys(self.node, attr)) for attr in self.channels)
+        self.snapshot = animIO.snapshotKeys(self.node, self.channels)
+
+    def assertRestored(self):
+        for attr in self.channels:
+            self.assertEqual(curveKeys(self.node, attr), self.before[attr])
+        self.assertEqual(curveFn(self.node, 'rotateY').getTangentAngleWeight(1, True)[0].asRadians(), 0.25)
+
+    def test_snapshot(self):
+        self.assertIsNone(self.snapshot['translateZ'])
+        self.assertEqual([(time.value, value) for time, value, tangents in self.snapshot['translateX']], [(1.0, 0.0), (5.0, 3.0), (10.0, 1.0)])
+
+    def test_restoreAfterWrites(self):
+        #keys replaced with other tangents, keys added and a curve made that didn't exist
+        animIO.writeKeys(self.node, 'translateX', [2.0, 3.0, 4.0, 5.0], [9.0, 9.0, 9.0, 9.0])
+        animIO.writeKeys(self.node, 'rotateY', [1.0, 5.0, 10.0], [10.0, 20.0, 30.0], 0.01)
+        animIO.writeKeys(self.node, 'translateZ', [1.0, 2.0], [1.0, 2.0])
+        animIO.restoreKeys(self.node, self.snapshot)
+        self.assertRestored()
+
+    def test_restoreRemovedKeys(self):
+        animIO.writeKeys(self.node, 'translateX', [1.0, 10.0], [4.0, 4.0])
+        self.assertEqual(len(curveKeys(self.node, 'translateX')), 2)
+        animIO.restoreKeys(self.node, self.snapshot)
+        self.assertRestored()
+
+    def test_restoreUntouched(self):
+        animIO.restoreKeys(self.node, self.snapshot)
+        self.assertRestored()
+
+    def test_undoRestore(self):
+        animIO.writeKeys(self.node, 'translateX', [2.0, 3.0], [9.0, 9.0])
+        written = curveKeys(self.node, 'translateX')
+        animIO.restoreKeys(self.node, self.snapshot)
+        scene.undo()
+        self.assertEqual(curveKeys(self.node, 'translateX'), written)
+
+if __name__ == '__main__':
+    unittest.main()
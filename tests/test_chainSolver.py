@@ -0,0 +1,61 @@
+'''
+    Headless tests for chainSolver, run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import matrixMath
+import chainSolver
+
+#a four joint chain bent on the xy plane, its pole in front of the bend
+planarChain = [(0.0, 0.0, 0.0), (3.0, 2.0, 0.0), (6.0, 2.5, 0.0), (9.0, 0.0, 0.0)]
+planarPole = (4.5, 8.0, 0.0)
+#the same bone count with its inner joints pushed off the plane and a different shape, so no pole lands it exactly
+twistedTarget = [(0.0, 0.0, 0.0), (2.5, 2.0, 1.5), (6.0, 1.0, -1.0), (8.0, 0.0, 0.0)]
+
+def distance(a, b):
+    return matrixMath.vectorLength(matrixMath.subVector(a, b))
+
+class SolveChainPoleTest(unittest.TestCase):
+
+    def test_planarChainSolvesOnFirstEvaluation(self):
+        pvPos, residual, evaluations = chainSolver.solveChainPole(planarChain, planarChain, planarPole)
+        self.assertEqual(evaluations, 1)
+        self.assertLess(residual, 1e-3)
+
+    def test_recoversPoseFromKnownPole(self):
+        #pose the chain with a known pole, then solve the pole back from the posed joints
+        goal = (7.0, 1.0, 2.0)
+        pole = (3.0, 5.0, 6.0)
+        posed = chainSolver.fabrik(planarChain, goal, pole, planarPole)[0]
+        pvPos, residual, evaluations = chainSolver.solveChainPole(posed, planarChain, planarPole, tolerance=1e-4)
+        self.assertLess(residual, 1e-3)
+        solved = chainSolver.fabrik(planarChain, goal, pvPos, planarPole)[0]
+        self.assertLess(chainSolver.chainResidual(solved, posed), 1e-3)
+
+    def test_neverExceedsMaxIterations(self):
+        #with a zero tolerance the search always spends its whole budget
+        for maxIterations in list(range(1, 16)) + [30]:
+            pvPos, residual, evaluations = chainSolver.solveChainPole(twistedTarget, planarChain, planarPole,
+                                                                      tolerance=0.0, maxIterations=maxIterations)
+            self.assertLessEqual(evaluations, maxIterations)
+
+    def test_moreBudgetNeverWorse(self):
+        residuals = [chainSolver.solveChainPole(twistedTarget, planarChain, planarPole, tolerance=0.0, maxIterations=maxIterations)[1]
+                     for maxIterations in (1, 8, 10, 30)]
+        for residual, nextResidual in zip(residuals, residuals[1:]):
+            self.assertLessEqual(nextResidual, residual + 1e-9)
+
+    def test_straightChainReturnsGuess(self):
+        straight = [(0.0, 0.0, 0.0), (3.0, 0.0, 0.0), (6.0, 0.0, 0.0)]
+        pvPos, residual, evaluations = chainSolver.solveChainPole(straight)
+        self.assertEqual(evaluations, 1)
+        self.assertLess(residual, 1e-3)
+        self.assertLess(distance(pvPos, chainSolver.poleGuess(straight)), 1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
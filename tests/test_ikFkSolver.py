@@ -0,0 +1,204 @@
+'''
+    Headless tests for ikFkSolver and matrixSnap, posed and read back on the benchmarks' stand-in scene.
+    Run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import os
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'benchmarks'))
+sys.path.insert(0, root)
+import sceneStandIn
+scene = sceneStandIn.install()
+import maya.cmds as cmds
+import matrixMath
+import matrixSnap
+import chainSolver
+import ikFkSolver
+
+#an arm's ik joints, translate and jointOrient, each under the one before
+ikJntValues = [((10.0, 100.0, 0.0), (0.0, 0.0, -80.0)),
+               ((28.0, 0.0, -3.0), (0.0, 10.0, 0.0)),
+               ((26.0, 0.0, 3.0), (5.0, -10.0, 0.0))]
+#the fk controls' rotateAxis and rotateOrder, their fk joints are oriented to match the ik joints at rest
+fkCtlValues = [((10.0, 0.0, -20.0), 2),
+               ((0.0, 30.0, 0.0), 4),
+               ((-15.0, 0.0, 40.0), 1)]
+ikPose = [(20.0, -10.0, 35.0), (0.0, 0.0, -70.0), (15.0, 5.0, 0.0)]
+
+def worldMatrix(node):
+    return cmds.getAttr(node+'.worldMatrix')
+
+def positions(nodes):
+    return [matrixMath.getTranslation(worldMatrix(node)) for node in nodes]
+
+def setVector(node, attr, values):
+    cmds.setAttr('%s.%s' %(node, attr), *values)
+
+def buildArm():
+    '''
+        Builds a rig root, an ik chain and an fk chain whose joints sit on the ik joints at rest.
+        The fk joints are children of their controls, the controls' groups children of the fk joint above.
+        Returns (ikJnts, fkCtls, fkJnts).
+    '''
+    scene.reset()
+    cog = scene.createNode('COG_ctrl')
+    setVector(cog, 'translate', (5.0, 0.0, 0.0))
+    setVector(cog, 'rotate', (0.0, 30.0, 0.0))
+    ikJnts = []
+    parent = cog
+    for i, (translate, orient) in enumerate(ikJntValues):
+        parent = scene.createNode('ik_jnt%d' %(i), 'joint', parent)
+        setVector(parent, 'translate', translate)
+        scene.getNode(parent).values['jointOrient'] = list(orient)
+        ikJnts.append(parent)
+    fkCtls = []
+    fkJnts = []
+    parent = cog
+    for i, ((translate, orient), (rotateAxis, rotateOrder)) in enumerate(zip(ikJntValues, fkCtlValues)):
+        grp = scene.createNode('fk_ctrl%d_grp' %(i), 'transform', parent)
+        setVector(grp, 'translate', translate)
+        ctl = scene.createNode('fk_ctrl%d' %(i), 'transform', grp)
+        scene.getNode(ctl).values['rotateAxis'] = list(rotateAxis)
+        scene.getNode(ctl).values['rotateOrder'] = rotateOrder
+        jnt = scene.createNode('fk_jnt%d' %(i), 'joint', ctl)
+        jntOrient = matrixMath.multMatrix(matrixMath.eulerToMatrix(orient), matrixMath.transposeMatrix(matrixMath.eulerToMatrix(rotateAxis)))
+        scene.getNode(jnt).values['jointOrient'] = list(matrixMath.matrixToEuler(jntOrient))
+        fkCtls.append(ctl)
+        fkJnts.append(jnt)
+        parent = jnt
+    return ikJnts, fkCtls, fkJnts
+
+def matchFkToIk(ikJnts, fkCtls, fkJnts, offsets):
+    '''
+        Solves the fk controls onto the ik chain's current pose and sets them, like ikFkMatching.fkToIk.
+    '''
+    jointOffsets, parentOffsets = offsets
+    states = [matrixSnap.getSnapState(ctl) for ctl in fkCtls]
+    rotations = ikFkSolver.solveFkToIkRange([[worldMatrix(jnt)] for jnt in ikJnts], [cmds.getAttr(fkCtls[0]+'_grp.worldMatrix')],
+                                            jointOffsets, parentOffsets, states)
+    for ctl, rots in zip(fkCtls, rotations):
+        setVector(ctl, 'rotate', rots[0])
+
+def restOffsets(fkCtls, fkJnts):
+    return ikFkSolver.fkChainOffsets([worldMatrix(ctl) for ctl in fkCtls], [cmds.getAttr(ctl+'_grp.worldMatrix') for ctl in fkCtls],
+                                     [worldMatrix(jnt) for jnt in fkJnts])
+
+class IkFkRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ikJnts, self.fkCtls, self.fkJnts = buildArm()
+        self.restMatrices = [worldMatrix(jnt) for jnt in self.ikJnts]
+        self.restPositions = positions(self.ikJnts)
+        self.restPole = chainSolver.poleGuess(self.restPositions)
+        self.offsets = restOffsets(self.fkCtls, self.fkJnts)
+
+    def assertChainsMatch(self, jnts, otherJnts, positionTolerance=1e-4, rotationTolerance=1e-3):
+        positionErrors, rotationErrors = ikFkSolver.chainErrors([[worldMatrix(jnt)] for jnt in jnts],
+                                                                [[worldMatrix(jnt)] for jnt in otherJnts])
+        self.assertLess(positionErrors[0], positionTolerance)
+        self.assertLess(rotationErrors[0], rotationTolerance)
+
+    def test_restPoseMatches(self):
+        self.assertChainsMatch(self.fkJnts, self.ikJnts)
+
+    def test_fkToIk(self):
+        for jnt, rotate in zip(self.ikJnts, ikPose):
+            setVector(jnt, 'rotate', rotate)
+        matchFkToIk(self.ikJnts, self.fkCtls, self.fkJnts, self.offsets)
+        self.assertChainsMatch(self.fkJnts, self.ikJnts)
+
+    def test_ikToFkToIk(self):
+        for jnt, rotate in zip(self.ikJnts, ikPose):
+            setVector(jnt, 'rotate', rotate)
+        posed = positions(self.ikJnts)
+        matchFkToIk(self.ikJnts, self.fkCtls, self.fkJnts, self.offsets)
+        #the ik chain back onto the fk chain, solved against its rest pose and pole
+        ikMatrix, pvMatrix, residual = ikFkSolver.solveIkToFkChain([worldMatrix(jnt) for jnt in self.fkJnts], self.restMatrices,
+                                                                   self.restPole)
+        self.assertLess(residual, 1e-3)
+        self.assertLess(chainSolver.chainResidual([matrixMath.getTranslation(ikMatrix)], [posed[-1]]), 1e-6)
+        solved = chainSolver.fabrik(self.restPositions, matrixMath.getTranslation(ikMatrix), matrixMath.getTranslation(pvMatrix),
+                                    self.restPole)[0]
+        self.assertLess(chainSolver.chainResidual(solved, posed), 1e-3)
+
+    def test_ikToFkRangeMatchesSingleFrame(self):
+        fkJntMatrices = [worldMatrix(jnt) for jnt in self.fkJnts]
+        ikMatrix, pvMatrix, residual = ikFkSolver.solveIkToFkChain(fkJntMatrices, self.restMatrices, self.restPole)
+        ikMatrices, pvMatrices, residuals = ikFkSolver.solveIkToFkRange([[matrix, matrix] for matrix in fkJntMatrices],
+                                                                        ikJntMatrices=self.restMatrices, restPvPosition=self.restPole)
+        self.assertEqual(ikMatrices, [ikMatrix, ikMatrix])
+        self.assertEqual(pvMatrices, [pvMatrix, pvMatrix])
+        self.assertEqual(residuals, [residual, residual])
+
+    def test_boneLengthsIgnorePose(self):
+        restLengths = ikFkSolver.boneLengths(self.restMatrices)
+        for jnt, rotate in zip(self.ikJnts, ikPose):
+            setVector(jnt, 'rotate', rotate)
+        self.assertTrue(ikFkSolver.sameInputs(ikFkSolver.boneLengths([worldMatrix(jnt) for jnt in self.ikJnts]), restLengths))
+
+    def test_straightLimb(self):
+        #the fk chain straightened along its start to end direction, bone lengths kept
+        lengths = [matrixMath.vectorLength(matrixMath.subVector(b, a)) for a, b in zip(self.restPositions, self.restPositions[1:])]
+        direction = matrixMath.normalizeVector(matrixMath.subVector(self.restPositions[-1], self.restPositions[0]))
+        straight = [self.restPositions[0]]
+        for length in lengths:
+            straight.append(matrixMath.addVector(straight[-1], matrixMath.scaleVector(direction, length)))
+        fkJntMatrices = [matrixMath.setTranslation(matrixMath.identityMatrix(), position) for position in straight]
+        ikMatrix, pvMatrix = ikFkSolver.solveIkToFk(fkJntMatrices)
+        self.assertEqual(matrixMath.getTranslation(ikMatrix), matrixMath.getTranslation(fkJntMatrices[-1]))
+        self.assertIsNone(chainSolver.bendTwist(straight, matrixMath.getTranslation(pvMatrix)))
+        ikMatrix, pvMatrix, residual = ikFkSolver.solveIkToFkChain(fkJntMatrices, self.restMatrices, self.restPole)
+        self.assertLess(residual, 1e-3)
+        for value in pvMatrix:
+            self.assertEqual(value, value)
+
+class SolveSnapTest(unittest.TestCase):
+
+    def setUp(self):
+        scene.reset()
+        parent = scene.createNode('snap_parent')
+        setVector(parent, 'translate', (4.0, -3.0, 12.0))
+        setVector(parent, 'rotate', (35.0, -20.0, 70.0))
+        self.driven = scene.createNode('snap_jnt', 'joint', parent)
+        values = scene.getNode(self.driven).values
+        values['rotatePivot'] = [1.0, 2.0, -1.5]
+        values['rotatePivotTranslate'] = [0.5, 0.0, -0.25]
+        values['rotateAxis'] = [20.0, 0.0, -10.0]
+        values['jointOrient'] = [0.0, 45.0, 10.0]
+        values['rotateOrder'] = 4
+        self.translate = (3.0, -2.0, 7.0)
+        self.rotate = (30.0, -60.0, 15.0)
+        setVector(self.driven, 'translate', self.translate)
+        setVector(self.driven, 'rotate', self.rotate)
+
+    def test_recoversLocalValues(self):
+        state = matrixSnap.getSnapState(self.driven)
+        translate, rotate = matrixSnap.solveSnap(worldMatrix(self.driven), cmds.xform(self.driven, q=True, ws=True, rotatePivot=True),
+                                                 **state)
+        for value, expected in zip(translate, self.translate):
+            self.assertAlmostEqual(value, expected, 6)
+        rotation = matrixMath.eulerToMatrix(rotate, state['rotateOrder'])
+        for value, expected in zip(rotation, matrixMath.eulerToMatrix(self.rotate, state['rotateOrder'])):
+            self.assertAlmostEqual(value, expected, 6)
+
+    def test_snapLandsOnDriver(self):
+        #a node with a different parent, pivot and orients snapped onto the joint, like a parentConstraint
+        other = scene.createNode('snap_other')
+        setVector(other, 'rotate', (-10.0, 5.0, 90.0))
+        node = scene.createNode('snap_ctrl', 'transform', other)
+        values = scene.getNode(node).values
+        values['rotatePivot'] = [-2.0, 0.5, 0.0]
+        values['rotateAxis'] = [0.0, -30.0, 5.0]
+        values['rotateOrder'] = 3
+        driverPivot = cmds.xform(self.driven, q=True, ws=True, rotatePivot=True)
+        matrixSnap.snap(self.driven, node, 'parent')
+        for value, expected in zip(cmds.xform(node, q=True, ws=True, rotatePivot=True), driverPivot):
+            self.assertAlmostEqual(value, expected, 6)
+        self.assertLess(matrixMath.rotationAngle(worldMatrix(node), worldMatrix(self.driven)), 1e-4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+'''
+    Headless tests for keyReducer, run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import keyReducer
+
+#a baked channel, one sample per frame of a wave with a hold in the middle
+frames = [float(frame) for frame in range(1, 121)]
+values = [10.0*math.sin(frame*0.1) if frame < 40 or frame > 70 else 5.0 for frame in frames]
+
+def interpolate(keyFrames, keyValues, frame):
+    '''
+        Returns the value at frame of linear keys, like the reduced keys' linear tangents.
+    '''
+    for before, after, beforeValue, afterValue in zip(keyFrames, keyFrames[1:], keyValues, keyValues[1:]):
+        if before <= frame <= after:
+            return beforeValue + (afterValue - beforeValue)*(frame - before)/(after - before)
+    raise ValueError('frame %s is outside the keys' %(frame))
+
+class SimplifyTest(unittest.TestCase):
+
+    def test_lineKeepsItsEnds(self):
+        line = [2.0*frame - 3.0 for frame in frames]
+        self.assertEqual(keyReducer.simplify(frames, line, 1e-6), [0, len(frames) - 1])
+
+    def test_shortChannelsAreKept(self):
+        self.assertEqual(keyReducer.simplify([], [], 0.1), [])
+        self.assertEqual(keyReducer.simplify([1.0], [4.0], 0.1), [0])
+        self.assertEqual(keyReducer.simplify([1.0, 2.0], [4.0, 9.0], 0.1), [0, 1])
+
+    def test_everySampleWithinTolerance(self):
+        for tolerance in (0.0, 0.001, 0.01, 0.1, 1.0):
+            keyFrames, keyValues = keyReducer.reduceKeys(frames, values, tolerance)
+            self.assertEqual(keyFrames[0], frames[0])
+            self.assertEqual(keyFrames[-1], frames[-1])
+            for frame, value in zip(frames, values):
+                self.assertLessEqual(abs(interpolate(keyFrames, keyValues, frame) - value), tolerance + 1e-9)
+
+    def test_largerToleranceKeepsFewerKeys(self):
+        counts = [len(keyReducer.simplify(frames, values, tolerance)) for tolerance in (0.0, 0.01, 0.1, 1.0)]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertLess(counts[-1], counts[0])
+
+    def test_holdKeepsItsEnds(self):
+        #the hold is a straight line, only the samples where the wave meets it are kept
+        keep = keyReducer.simplify(frames, values, 0.0)
+        self.assertEqual([frames[i] for i in keep if 40.0 <= frames[i] <= 70.0], [40.0, 70.0])
+
+    def test_reduceKeysMatchesSimplify(self):
+        keep = keyReducer.simplify(frames, values, 0.05)
+        keyFrames, keyValues = keyReducer.reduceKeys(frames, values, 0.05)
+        self.assertEqual(keyFrames, [frames[i] for i in keep])
+        self.assertEqual(keyValues, [values[i] for i in keep])
+
+class ReportTest(unittest.TestCase):
+
+    def test_channelTolerance(self):
+        self.assertEqual(keyReducer.channelTolerance('rotateY', 0.01, 0.05), 0.05)
+        self.assertEqual(keyReducer.channelTolerance('translateY', 0.01, 0.05), 0.01)
+
+    def test_compressionRatio(self):
+        report = keyReducer.newReport()
+        self.assertEqual(keyReducer.compressionRatio(report), 1.0)
+        report['sampled'] += 3600
+        report['written'] += 240
+        self.assertEqual(keyReducer.compressionRatio(report), 15.0)
+        self.assertEqual(keyReducer.describe(report), 'Reduced 3600 baked keys to 240, 15.0x smaller')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+'''
+    Headless tests for matrixMath's euler conversions and filters, run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import matrixMath
+
+rotateOrders = range(6)
+#angles in rotate order, the middle one inside (-90, 90) so they come back unchanged
+orderedAngles = [(0.0, 0.0, 0.0), (30.0, -45.0, 60.0), (-120.0, 15.0, 170.0), (179.0, -80.0, -179.0), (5.0, 70.0, -35.0)]
+
+def ordered(angles, rotateOrder):
+    '''
+        Returns the x, y, z rotation of angles given in rotate order.
+    '''
+    rotation = [0.0, 0.0, 0.0]
+    for axis, angle in zip(matrixMath.rotateOrderAxes[rotateOrder], angles):
+        rotation[axis] = angle
+    return rotation
+
+def spin(frame, rotateOrder):
+    '''
+        A rotation that winds its first and last axes through their wrap points over 120 frames,
+        its middle axis swinging up to 60 degrees each way so it stays clear of gimbal lock.
+    '''
+    return ordered((frame*7.0 - 180.0, 60.0*math.sin(frame*0.1), frame*-5.0 + 30.0), rotateOrder)
+
+class MatrixToEulerTest(unittest.TestCase):
+
+    def assertMatricesEqual(self, a, b, places=6):
+        for value, expected in zip(a, b):
+            self.assertAlmostEqual(value, expected, places)
+
+    def test_eulerRoundTrip(self):
+        for rotateOrder in rotateOrders:
+            for angles in orderedAngles:
+                rotation = ordered(angles, rotateOrder)
+                euler = matrixMath.matrixToEuler(matrixMath.eulerToMatrix(rotation, rotateOrder), rotateOrder)
+                for angle, expected in zip(euler, rotation):
+                    self.assertAlmostEqual(angle, expected, 6)
+
+    def test_matrixRoundTrip(self):
+        #any rotation, the euler angles may differ but they give back the same matrix
+        for rotateOrder in rotateOrders:
+            for frame in range(0, 120, 7):
+                rotation = ordered((frame*7.0, frame*4.5 - 200.0, frame*-5.0 + 30.0), rotateOrder)
+                matrix = matrixMath.eulerToMatrix(rotation, rotateOrder)
+                self.assertMatricesEqual(matrixMath.eulerToMatrix(matrixMath.matrixToEuler(matrix, rotateOrder), rotateOrder), matrix)
+
+    def test_gimbalLock(self):
+        for rotateOrder in rotateOrders:
+            middle = matrixMath.rotateOrderAxes[rotateOrder][1]
+            for sign in (1.0, -1.0):
+                rotation = [25.0, -40.0, 65.0]
+                rotation[middle] = 90.0*sign
+                matrix = matrixMath.eulerToMatrix(rotation, rotateOrder)
+                euler = matrixMath.matrixToEuler(matrix, rotateOrder)
+                self.assertAlmostEqual(euler[middle], 90.0*sign, 6)
+                self.assertMatricesEqual(matrixMath.eulerToMatrix(euler, rotateOrder), matrix)
+
+    def test_scaleIsIgnored(self):
+        for rotateOrder in rotateOrders:
+            rotation = ordered(orderedAngles[1], rotateOrder)
+            matrix = matrixMath.eulerToMatrix(rotation, rotateOrder)
+            scaled = [value*scale for value, scale in zip(matrix, [2.0]*4 + [0.5]*4 + [3.0]*4 + [1.0]*4)]
+            for angle, expected in zip(matrixMath.matrixToEuler(scaled, rotateOrder), rotation):
+                self.assertAlmostEqual(angle, expected, 6)
+
+class FilterEulerTest(unittest.TestCase):
+
+    def test_filterEulerListIsContinuous(self):
+        for rotateOrder in rotateOrders:
+            matrices = [matrixMath.eulerToMatrix(spin(frame, rotateOrder), rotateOrder) for frame in range(120)]
+            eulers = [matrixMath.matrixToEuler(matrix, rotateOrder) for matrix in matrices]
+            filtered = matrixMath.filterEulerList(eulers, rotateOrder)
+            self.assertEqual(filtered[0], eulers[0])
+            for before, after in zip(filtered, filtered[1:]):
+                self.assertLess(max(abs(a - b) for a, b in zip(before, after)), 8.0)
+            for rotation, matrix in zip(filtered, matrices):
+                for value, expected in zip(matrixMath.eulerToMatrix(rotation, rotateOrder), matrix):
+                    self.assertAlmostEqual(value, expected, 6)
+
+    def test_filterEulerListFollowsPrevious(self):
+        for rotateOrder in rotateOrders:
+            filtered = matrixMath.filterEulerList([(10.0, 20.0, 30.0)], rotateOrder, previous=(365.0, 18.0, -335.0))
+            for angle, expected in zip(filtered[0], (370.0, 20.0, -330.0)):
+                self.assertAlmostEqual(angle, expected, 6)
+
+    def test_filterEulerPicksTheFlippedSolution(self):
+        for rotateOrder in rotateOrders:
+            first, middle, last = matrixMath.rotateOrderAxes[rotateOrder]
+            previous = [0.0, 0.0, 0.0]
+            previous[first] = 180.0
+            previous[middle] = 100.0
+            previous[last] = 180.0
+            #the same rotation as previous, given as the solution with its middle angle inside (-90, 90)
+            rotation = matrixMath.matrixToEuler(matrixMath.eulerToMatrix(previous, rotateOrder), rotateOrder)
+            for angle, expected in zip(matrixMath.filterEuler(rotation, previous, rotateOrder), previous):
+                self.assertAlmostEqual(angle, expected, 6)
+
+if __name__ == '__main__':
+    unittest.main()
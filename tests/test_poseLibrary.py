@@ -0,0 +1,114 @@
+'''
+    Headless tests for poseLibrary, saved to and read back from a temporary directory.
+    Run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import matrixMath
+import poseLibrary
+
+ctrlNames = ['Astrea01:COG_ctrl', 'Astrea01:ik_left_arm', 'Astrea01:left_arm_poleVec']
+
+def poseFrame(offset):
+    '''
+        Returns one matrix per control, moved and turned by offset so every frame is different.
+    '''
+    return [matrixMath.composeMatrix((offset + i, 2.0*offset, -i), (10.0*offset, 5.0*i, -offset)) for i in range(len(ctrlNames))]
+
+class PoseLibraryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.libraryDir = os.path.join(tempfile.mkdtemp(), 'poses')
+        self.library = poseLibrary.PoseLibrary(self.libraryDir)
+
+    def tearDown(self):
+        self.library.close()
+        shutil.rmtree(os.path.dirname(self.libraryDir))
+
+    def assertMatricesEqual(self, matrices, expectedMatrices):
+        self.assertEqual(len(matrices), len(expectedMatrices))
+        for matrix, expected in zip(matrices, expectedMatrices):
+            for value, expectedValue in zip(matrix, expected):
+                #stored as float32
+                self.assertAlmostEqual(value, expectedValue, 4)
+
+    def test_writeRead(self):
+        pivotMatrix = matrixMath.composeMatrix((1.0, 0.0, 3.0))
+        self.library.savePose('idle', 'Astrea01:', ctrlNames, [poseFrame(1.0)], pivotMatrix=pivotMatrix)
+        self.assertMatricesEqual(self.library.readMatrices('idle'), poseFrame(1.0))
+        entry = self.library.getPose('idle')
+        self.assertEqual(entry['ctrls'], ['COG_ctrl', 'ik_left_arm', 'left_arm_poleVec'])
+        self.assertEqual(entry['pivotMatrix'], pivotMatrix)
+        self.assertEqual(self.library.poseNames('Astrea01:'), ['idle'])
+        self.assertEqual(self.library.poseNames('Astrea02:'), [])
+
+    def test_readControlsByName(self):
+        self.library.savePose('idle', 'Astrea01:', ctrlNames, [poseFrame(1.0)])
+        #another copy of the rig, only some of the controls, in another order
+        matrices = self.library.readMatrices('idle', ctrlNames=['Astrea02:left_arm_poleVec', 'Astrea02:COG_ctrl'])
+        self.assertMatricesEqual(matrices, [poseFrame(1.0)[2], poseFrame(1.0)[0]])
+
+    def test_readFrames(self):
+        frames = [10.0, 11.0, 12.0]
+        self.library.savePose('walk', 'Astrea01:', ctrlNames, [poseFrame(frame) for frame in frames], frames=frames)
+        read = list(self.library.readFrames('walk'))
+        self.assertEqual([frame for frame, matrices in read], frames)
+        for frame, matrices in read:
+            self.assertMatricesEqual(matrices, poseFrame(frame))
+        self.assertMatricesEqual(self.library.readMatrices('walk', 2), poseFrame(12.0))
+
+    def test_reopen(self):
+        self.library.savePose('idle', 'Astrea01:', ctrlNames, [poseFrame(1.0)])
+        self.library.close()
+        library = poseLibrary.PoseLibrary(self.libraryDir)
+        try:
+            self.assertEqual(library.poseNames(), ['idle'])
+            self.assertMatricesEqual(library.readMatrices('idle'), poseFrame(1.0))
+        finally:
+            library.close()
+
+    def test_mismatchedFrame(self):
+        with self.assertRaises(ValueError):
+            self.library.savePose('idle', 'Astrea01:', ctrlNames, [poseFrame(1.0)[:2]])
+
+    def test_compact(self):
+        self.library.compactRatio = 1.0
+        for offset in (1.0, 2.0, 3.0):
+            self.library.savePose('idle', 'Astrea01:', ctrlNames, [poseFrame(offset)])
+        self.library.savePose('jump', 'Astrea01:', ctrlNames, [poseFrame(4.0), poseFrame(5.0)])
+        poseBytes = len(ctrlNames)*poseLibrary.bytesPerMatrix
+        self.assertEqual(self.library.wastedBytes(), 2*poseBytes)
+        self.assertEqual(self.library.compact(), 2*poseBytes)
+        self.assertEqual(self.library.wastedBytes(), 0)
+        self.assertEqual(os.path.getsize(self.library.dataFile), 3*poseBytes)
+        self.assertMatricesEqual(self.library.readMatrices('idle'), poseFrame(3.0))
+        self.assertMatricesEqual(self.library.readMatrices('jump', 1), poseFrame(5.0))
+
+    def test_compactsWhenWasteful(self):
+        self.library.savePose('idle', 'Astrea01:', ctrlNames, [poseFrame(1.0)])
+        self.library.savePose('jump', 'Astrea01:', ctrlNames, [poseFrame(2.0)])
+        #half of the file is wasted, not more than compactRatio of it
+        self.library.deletePose('idle')
+        self.assertEqual(self.library.wastedBytes(), len(ctrlNames)*poseLibrary.bytesPerMatrix)
+        self.library.savePose('jump', 'Astrea01:', ctrlNames, [poseFrame(3.0)])
+        self.assertEqual(self.library.wastedBytes(), 0)
+        self.assertEqual(self.library.poseNames(), ['jump'])
+        self.assertMatricesEqual(self.library.readMatrices('jump'), poseFrame(3.0))
+
+    def test_emptyDataFile(self):
+        #a pose without controls writes no bytes, the empty data file is read without mapping it
+        self.library.savePose('empty', 'Astrea01:', [], [[]])
+        self.assertEqual(os.path.getsize(self.library.dataFile), 0)
+        self.assertEqual(self.library.readMatrices('empty'), [])
+        self.assertEqual(list(self.library.readFrames('empty')), [(None, [])])
+        self.assertEqual(self.library.compact(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
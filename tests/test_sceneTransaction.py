@@ -0,0 +1,87 @@
+'''
+    Headless tests for sceneTransaction, written and rolled back on the benchmarks' stand-in scene.
+    Run from the repository's root with:
+        python -m unittest discover tests
+'''
+
+import os
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'benchmarks'))
+sys.path.insert(0, root)
+import sceneStandIn
+scene = sceneStandIn.install()
+import maya.cmds as cmds
+import matrixCache
+import sceneTransaction
+
+class SceneTransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        scene.reset()
+        self.node = scene.createNode('ctrl')
+        cmds.setAttr(self.node+'.translate', 1.0, 2.0, 3.0)
+        cmds.setAttr(self.node+'.rotate', 10.0, 20.0, 30.0)
+        cmds.setAttr(self.node+'.visibility', 1)
+
+    def values(self):
+        return (cmds.getAttr(self.node+'.translate')[0], cmds.getAttr(self.node+'.rotate')[0], cmds.getAttr(self.node+'.visibility'))
+
+    def test_flushOnExit(self):
+        with sceneTransaction.SceneTransaction('test') as transaction:
+            self.assertEqual(transaction.queueChannels(self.node, 'translate', (4.0, 5.0, 6.0)), [])
+            transaction.queueAttr(self.node+'.visibility', 0)
+            #nothing is written until the flush
+            self.assertEqual(self.values(), ((1.0, 2.0, 3.0), (10.0, 20.0, 30.0), 1))
+        self.assertEqual(self.values(), ((4.0, 5.0, 6.0), (10.0, 20.0, 30.0), 0))
+
+    def test_laterWriteReplaces(self):
+        with sceneTransaction.SceneTransaction('test') as transaction:
+            transaction.queueChannels(self.node, 'rotate', (0.0, 0.0, 0.0))
+            transaction.queueChannels(self.node, 'rotate', (40.0, 50.0, 60.0))
+        self.assertEqual(self.values()[1], (40.0, 50.0, 60.0))
+
+    def test_lockedChannelsAreSkipped(self):
+        scene.getNode(self.node).locked.add('translateY')
+        with sceneTransaction.SceneTransaction('test') as transaction:
+            skipped = transaction.queueChannels(self.node, 'translate', (4.0, 5.0, 6.0))
+        self.assertEqual(skipped, [self.node+'.translateY'])
+        self.assertEqual(self.values()[0], (4.0, 2.0, 6.0))
+
+    def test_failureDropsQueuedWrites(self):
+        with self.assertRaises(RuntimeError):
+            with sceneTransaction.SceneTransaction('test') as transaction:
+                transaction.queueChannels(self.node, 'translate', (4.0, 5.0, 6.0))
+                raise RuntimeError('solve failed')
+        self.assertEqual(self.values(), ((1.0, 2.0, 3.0), (10.0, 20.0, 30.0), 1))
+
+    def test_rollback(self):
+        scene.getNode(self.node).locked.add('rotateZ')
+        with self.assertRaises(RuntimeError):
+            with sceneTransaction.SceneTransaction('test') as transaction:
+                #a whole compound, single channels and a scalar, applied before the failure
+                transaction.queueChannels(self.node, 'translate', (4.0, 5.0, 6.0))
+                transaction.queueChannels(self.node, 'rotate', (40.0, 50.0, 60.0))
+                transaction.queueAttr(self.node+'.visibility', 0)
+                transaction.flush()
+                self.assertEqual(self.values(), ((4.0, 5.0, 6.0), (40.0, 50.0, 30.0), 0))
+                transaction.queueChannels(self.node, 'translate', (7.0, 8.0, 9.0))
+                transaction.flush()
+                raise RuntimeError('solve failed')
+        self.assertEqual(self.values(), ((1.0, 2.0, 3.0), (10.0, 20.0, 30.0), 1))
+        self.assertEqual(transaction.applied, [])
+
+    def test_matrixCacheOperation(self):
+        cache = matrixCache.getCache()
+        operations = cache.operations
+        with self.assertRaises(RuntimeError):
+            with sceneTransaction.SceneTransaction('outer'):
+                with sceneTransaction.SceneTransaction('inner'):
+                    self.assertEqual(cache.operations, operations + 2)
+                raise RuntimeError('solve failed')
+        self.assertEqual(cache.operations, operations)
+
+if __name__ == '__main__':
+    unittest.main()